@@ -0,0 +1,228 @@
+"""
+Acoustic fingerprints for spotting the same episode under another URL.
+
+The same audio often arrives twice: as an RSS enclosure and a YouTube
+link, or republished by a feed under a new URL and title. A fingerprint is
+computed once per episode at ingest from a downsampled spectrogram: the ingest
+ffmpeg pass also emits 8 kHz mono PCM, which a Fingerprinter consumes as it
+arrives. The audio is cut into 1 s frames every 0.25 s, and each frame's
+energy in 33 log-spaced bands (250-3500 Hz) becomes a 32-bit code. Each bit
+records whether the energy difference between neighbouring bands grew or
+shrank since the previous frame. This is the Haitsma-Kalker scheme: robust to
+re-encoding, bitrate and loudness changes, and a couple of KB per minute.
+
+For lookup, every episode also stores a sample of its codes (the ~1/16
+picked by a hash of the code itself, so two copies sample the same places
+whatever their offset) as index keys. Candidates sharing enough keys are
+verified by aligning the code sequences. The alignment tolerates a few
+offsets, so inserted or removed ad breaks don't hide a duplicate.
+"""
+import os
+import subprocess
+from collections import Counter
+
+import numpy as np
+from bson.binary import Binary
+
+FINGERPRINT_DEDUP = os.getenv('FINGERPRINT_DEDUP', 'true').lower() == 'true'
+
+SAMPLE_RATE = 8000
+FRAME_SAMPLES = 8000        # 1 s
+HOP_SAMPLES = 2000          # 0.25 s
+HOP_S = HOP_SAMPLES / SAMPLE_RATE
+BAND_EDGES_HZ = np.geomspace(250, 3500, 34)
+READ_SAMPLES = HOP_SAMPLES * 240  # decode a minute at a time
+
+# Fraction of codes kept as index keys, and keys a candidate must share
+KEY_SAMPLING_BITS = 4  # 1/16
+MIN_KEY_HITS = int(os.getenv('FINGERPRINT_MIN_KEY_HITS', '20'))
+MAX_CANDIDATES = 5
+
+# Verification: frames within MATCH_MAX_BIT_ERRORS of 32 bits match; a
+# duplicate needs MIN_COVERAGE of both episodes' frames matched under its
+# best MATCH_OFFSETS alignments
+MATCH_MAX_BIT_ERRORS = 10
+MATCH_OFFSETS = 3
+# Codes this frequent (steady noise, music beds) say nothing about alignment
+MAX_CODE_REPEATS = 32
+MIN_COVERAGE = float(os.getenv('FINGERPRINT_MIN_COVERAGE', '0.6'))
+
+FINGERPRINT_VERSION = 1
+FINGERPRINT_TIMEOUT_S = 1800
+
+_BAND_BINS = np.round(BAND_EDGES_HZ * FRAME_SAMPLES / SAMPLE_RATE).astype(int)
+_WINDOW = np.hanning(FRAME_SAMPLES).astype(np.float32)
+_BIT_WEIGHTS = (1 << np.arange(32, dtype=np.uint64))
+
+
+def _iter_pcm(path, headers=None):
+    """Raw 8 kHz mono s16le PCM blocks of `path` (a file or URL), decoded by ffmpeg."""
+    header_args = []
+    if headers:
+        header_args = ["-headers", "".join(f"{name}: {value}\r\n" for name, value in headers.items())]
+    process = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", *header_args, "-i", str(path),
+         "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    try:
+        while True:
+            data = process.stdout.read(READ_SAMPLES * 2)
+            if not data:
+                break
+            yield data
+        stderr = process.stderr.read().decode(errors='replace').strip()
+        if process.wait(timeout=FINGERPRINT_TIMEOUT_S) != 0:
+            raise RuntimeError(f"ffmpeg failed to decode {path}: {stderr}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def _band_energies(frames):
+    spectrum = np.abs(np.fft.rfft(frames * _WINDOW, axis=1)) ** 2
+    return np.add.reduceat(spectrum[:, :_BAND_BINS[-1]], _BAND_BINS[:-1], axis=1)
+
+
+class Fingerprinter:
+    """Incremental fingerprint of a PCM stream (SAMPLE_RATE mono s16le).
+
+    feed() takes raw PCM bytes as they are decoded (e.g. the ingest ffmpeg
+    pass); codes() returns the sub-fingerprint codes so far.
+    """
+
+    def __init__(self):
+        self._pending = bytearray()
+        self._buffer = np.empty(0, dtype=np.float32)
+        self._previous = None  # band differences of the last frame of the previous block
+        self._codes = []
+
+    def feed(self, data):
+        self._pending += data
+        if len(self._pending) >= READ_SAMPLES * 2:
+            self._drain()
+
+    def _drain(self):
+        usable = len(self._pending) // 2 * 2
+        if not usable:
+            return
+        block = np.frombuffer(bytes(self._pending[:usable]), dtype='<i2').astype(np.float32)
+        del self._pending[:usable]
+        buffer = np.concatenate([self._buffer, block])
+        if len(buffer) < FRAME_SAMPLES:
+            self._buffer = buffer
+            return
+        count = (len(buffer) - FRAME_SAMPLES) // HOP_SAMPLES + 1
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, FRAME_SAMPLES)[::HOP_SAMPLES][:count]
+        energies = _band_energies(frames)
+        differences = energies[:, :-1] - energies[:, 1:]
+        if self._previous is not None:
+            differences = np.vstack([self._previous, differences])
+        self._previous = differences[-1:]
+        bits = (differences[1:] - differences[:-1]) > 0
+        self._codes.append((bits * _BIT_WEIGHTS).sum(axis=1).astype(np.uint32))
+        self._buffer = buffer[count * HOP_SAMPLES:]
+
+    def codes(self):
+        """Sub-fingerprint codes: a uint32 array, one code per HOP_S."""
+        self._drain()
+        return np.concatenate(self._codes) if self._codes else np.empty(0, dtype=np.uint32)
+
+
+def fingerprint_file(path, headers=None, on_block=None):
+    """Sub-fingerprint codes of an audio file or URL, decoded by ffmpeg on its own.
+
+    Used when the audio isn't ingested (ingest off, or only a published
+    transcript). `headers` are sent with a URL; `on_block` is called after
+    every decoded block (e.g. to keep a download slot alive).
+    """
+    fingerprinter = Fingerprinter()
+    for block in _iter_pcm(path, headers):
+        fingerprinter.feed(block)
+        if on_block:
+            on_block()
+    return fingerprinter.codes()
+
+
+def index_keys(codes):
+    """Codes kept as lookup keys: a content-defined ~1/16 sample (silence excluded)."""
+    hashed = (codes.astype(np.uint64) * np.uint64(2654435761)) & np.uint64(0xFFFFFFFF)
+    keep = (hashed >> np.uint64(32 - KEY_SAMPLING_BITS)) == 0
+    return sorted(int(code) for code in np.unique(codes[keep & (codes != 0)]))
+
+
+def _bit_errors(a, b):
+    return np.unpackbits((a ^ b).view(np.uint8).reshape(-1, 4), axis=1).sum(axis=1)
+
+
+def compare(codes, other):
+    """Fraction of each sequence's frames matched by the other: (coverage of codes, coverage of other)."""
+    if not len(codes) or not len(other):
+        return 0.0, 0.0
+    positions = {}
+    for j, code in enumerate(other.tolist()):
+        if code:
+            positions.setdefault(code, []).append(j)
+    votes = Counter()
+    for i, code in enumerate(codes.tolist()):
+        candidates = positions.get(code, ())
+        if len(candidates) <= MAX_CODE_REPEATS:
+            for j in candidates:
+                votes[j - i] += 1
+
+    # Distinct alignments (neighbouring offsets are the same alignment, frames overlap)
+    offsets = []
+    for offset, _ in votes.most_common(50):
+        if all(abs(offset - chosen) > 4 for chosen in offsets):
+            offsets.append(offset)
+            if len(offsets) == MATCH_OFFSETS:
+                break
+
+    matched = np.zeros(len(codes), dtype=bool)
+    matched_other = np.zeros(len(other), dtype=bool)
+    for offset in offsets:
+        start, end = max(0, -offset), min(len(codes), len(other) - offset)
+        if end <= start:
+            continue
+        close = _bit_errors(codes[start:end], other[start + offset:end + offset]) <= MATCH_MAX_BIT_ERRORS
+        matched[start:end] |= close
+        matched_other[start + offset:end + offset] |= close
+    return float(matched.mean()), float(matched_other.mean())
+
+
+def to_document(codes, url):
+    """MongoDB representation of a fingerprint (codes stored little-endian)."""
+    return {
+        'url': url,
+        'version': FINGERPRINT_VERSION,
+        'hop_s': HOP_S,
+        'duration': round(len(codes) * HOP_S, 1),
+        'codes': Binary(codes.astype('<u4').tobytes()),
+        'keys': index_keys(codes),
+    }
+
+
+def codes_from_document(document):
+    if not document or document.get('version') != FINGERPRINT_VERSION:
+        return None
+    return np.frombuffer(bytes(document['codes']), dtype='<u4').astype(np.uint32)
+
+
+def find_duplicate(db, url, codes):
+    """(url, coverage) of the existing episode whose audio best matches `codes`, or None.
+
+    A match must cover MIN_COVERAGE of both episodes' frames.
+    """
+    keys = index_keys(codes)
+    if not keys:
+        return None
+    best = None
+    for candidate in db.find_fingerprint_candidates(keys, url, MIN_KEY_HITS, MAX_CANDIDATES):
+        other = codes_from_document(db.get_fingerprint(candidate['url']))
+        if other is None:
+            continue
+        coverage = min(compare(codes, other))
+        if coverage >= MIN_COVERAGE and (best is None or coverage > best[1]):
+            best = (candidate['url'], coverage)
+    return best
@@ -0,0 +1,159 @@
+"""
+Audio ingest: normalize downloaded audio once, right after download.
+
+The downloaded `bestaudio` file (often 44.1 kHz stereo at 128-320 kbps) is
+decoded a single time by ffmpeg into two outputs:
+
+- a transcription copy at Whisper's native 16 kHz mono (Opus or FLAC), so
+  every later transcription, re-run or chunk split decodes a small file
+  that needs no resampling;
+- a low-bitrate mono AAC playback copy for the web player.
+
+The same pass can also stream raw PCM to a callback (e.g. the 8 kHz mono
+audio an acoustic fingerprint is computed from), so nothing downstream has to
+decode the file again for it.
+
+The original is deleted once both copies are recorded, unless
+INGEST_KEEP_ORIGINAL is set.
+"""
+import os
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+INGEST_TRANSCODE = os.getenv('INGEST_TRANSCODE', 'true').lower() == 'true'
+INGEST_KEEP_ORIGINAL = os.getenv('INGEST_KEEP_ORIGINAL', 'false').lower() == 'true'
+
+# 'opus' (small, lossy speech codec) or 'flac' (lossless)
+TRANSCRIPTION_FORMAT = os.getenv('INGEST_TRANSCRIPTION_FORMAT', 'opus')
+TRANSCRIPTION_OPUS_BITRATE = os.getenv('INGEST_TRANSCRIPTION_BITRATE', '32k')
+PLAYBACK_BITRATE = os.getenv('INGEST_PLAYBACK_BITRATE', '48k')
+
+TRANSCRIPTION_SUFFIX = '.16k'
+PLAYBACK_SUFFIX = '.play'
+
+PCM_READ_BYTES = 1 << 20
+
+
+def _transcription_codec():
+    """(extension, ffmpeg codec arguments) of the transcription copy."""
+    if TRANSCRIPTION_FORMAT == 'flac':
+        return '.flac', ['-c:a', 'flac', '-sample_fmt', 's16']
+    return '.opus', ['-c:a', 'libopus', '-b:a', TRANSCRIPTION_OPUS_BITRATE, '-application', 'voip']
+
+
+class AudioIngestor:
+    def __init__(self, audio_dir):
+        self.audio_dir = Path(audio_dir)
+        self.debug = True
+
+    def _debug_log(self, message):
+        """Debug logging with timestamp"""
+        if self.debug:
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] INGEST: {message}")
+
+    def output_paths(self, source_path):
+        """(transcription copy, playback copy) paths for a source file, next to it."""
+        source_path = Path(source_path)
+        stem = source_path.stem
+        for suffix in (TRANSCRIPTION_SUFFIX, PLAYBACK_SUFFIX):
+            if stem.endswith(suffix):
+                stem = stem[:-len(suffix)]
+        extension, _ = _transcription_codec()
+        return (
+            source_path.parent / f"{stem}{TRANSCRIPTION_SUFFIX}{extension}",
+            source_path.parent / f"{stem}{PLAYBACK_SUFFIX}.m4a",
+        )
+
+    def ingest(self, source_path, pcm_sink=None, pcm_sample_rate=8000):
+        """Transcode `source_path` into its transcription and playback copies.
+
+        With `pcm_sink`, the same ffmpeg pass also decodes mono s16le PCM at
+        `pcm_sample_rate` and hands it to `pcm_sink(bytes)` block by block.
+
+        Returns {'transcription_path', 'playback_path', 'original_bytes',
+        'transcription_bytes', 'playback_bytes'}; the copies sit next to the source.
+        """
+        source_path = Path(source_path)
+        transcription_path, playback_path = self.output_paths(source_path)
+        extension, codec_args = _transcription_codec()
+
+        # Writes go to temporary names first, so an interrupted ingest never
+        # leaves a truncated file that a later run would reuse
+        outputs = [(transcription_path, [
+            '-map', '0:a:0', '-ac', '1', '-ar', '16000', *codec_args,
+        ])]
+        # The playback copy can itself be the source when re-ingesting without the original
+        if source_path != playback_path:
+            outputs.append((playback_path, [
+                '-map', '0:a:0', '-ac', '1', '-c:a', 'aac', '-b:a', PLAYBACK_BITRATE, '-movflags', '+faststart',
+            ]))
+
+        cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-y', '-i', str(source_path)]
+        temp_paths = []
+        for final_path, args in outputs:
+            temp_path = final_path.with_name(f"{final_path.stem}.tmp{final_path.suffix}")
+            temp_paths.append((temp_path, final_path))
+            cmd += ['-vn', *args, str(temp_path)]
+        if pcm_sink:
+            cmd += ['-vn', '-map', '0:a:0', '-ac', '1', '-ar', str(pcm_sample_rate), '-f', 's16le', 'pipe:1']
+
+        self._debug_log(f"Transcoding {source_path.name} → 16 kHz mono {extension[1:]} + {PLAYBACK_BITRATE} playback copy")
+        try:
+            self._run(cmd, pcm_sink)
+        except Exception as e:
+            for temp_path, _ in temp_paths:
+                temp_path.unlink(missing_ok=True)
+            raise RuntimeError(f"ffmpeg failed to ingest {source_path.name}: {e}")
+
+        for temp_path, final_path in temp_paths:
+            os.replace(temp_path, final_path)
+
+        result = {
+            'transcription_path': transcription_path,
+            'playback_path': playback_path,
+            'original_bytes': source_path.stat().st_size,
+            'transcription_bytes': transcription_path.stat().st_size,
+            'playback_bytes': playback_path.stat().st_size,
+        }
+        self._debug_log(f"Sizes: original {result['original_bytes'] / 1e6:.1f} MB, "
+                        f"transcription {result['transcription_bytes'] / 1e6:.1f} MB, "
+                        f"playback {result['playback_bytes'] / 1e6:.1f} MB")
+        return result
+
+    def _run(self, cmd, pcm_sink):
+        """Run ffmpeg, streaming its stdout to `pcm_sink` if given."""
+        if not pcm_sink:
+            try:
+                subprocess.run(cmd, capture_output=True, text=True, check=True)
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(e.stderr.strip())
+            return
+        # stderr goes to a file so a chatty ffmpeg can't block while stdout is read
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+            try:
+                while True:
+                    data = process.stdout.read(PCM_READ_BYTES)
+                    if not data:
+                        break
+                    pcm_sink(data)
+                returncode = process.wait()
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+            if returncode != 0:
+                stderr.seek(0)
+                raise RuntimeError(stderr.read().decode(errors='replace').strip())
+
+    def discard_original(self, source_path):
+        """Delete the downloaded original once its copies are recorded (unless INGEST_KEEP_ORIGINAL)."""
+        source_path = Path(source_path)
+        if INGEST_KEEP_ORIGINAL or source_path in self.output_paths(source_path):
+            return False
+        source_path.unlink(missing_ok=True)
+        self._debug_log(f"Removed original {source_path.name}")
+        return True
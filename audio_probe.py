@@ -0,0 +1,79 @@
+"""
+Audio probe: one ffprobe call per audio file, cached.
+
+Duration, codec, sample rate, channels and bitrate of a file are read with a
+single ffprobe run and kept in a per-process cache keyed by the file's path,
+size and modification time, so the downloader, transcriber, chunking and
+ingest steps never probe the same file twice. The pipeline also stores the
+result on the episode as `audio_info`.
+"""
+import json
+import os
+import subprocess
+from collections import OrderedDict
+
+PROBE_TIMEOUT_S = 30
+PROBE_CACHE_SIZE = 256
+
+_probe_cache = OrderedDict()
+
+
+def _cache_key(path):
+    stat = os.stat(path)
+    return os.path.realpath(path), stat.st_size, stat.st_mtime_ns
+
+
+def _to_number(value, cast):
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _run_ffprobe(path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-print_format", "json", "-show_format",
+         "-show_streams", "-select_streams", "a:0", str(path)],
+        capture_output=True, text=True, timeout=PROBE_TIMEOUT_S, check=True,
+    )
+    info = json.loads(result.stdout)
+    fmt = info.get('format', {})
+    stream = (info.get('streams') or [{}])[0]
+    return {
+        'duration': _to_number(stream.get('duration') or fmt.get('duration'), float),
+        'codec': stream.get('codec_name'),
+        'sample_rate': _to_number(stream.get('sample_rate'), int),
+        'channels': stream.get('channels'),
+        'bit_rate': _to_number(stream.get('bit_rate') or fmt.get('bit_rate'), int),
+        'format': fmt.get('format_name'),
+        'size': _to_number(fmt.get('size'), int),
+    }
+
+
+def probe_audio(path):
+    """Audio metadata of `path`: {'duration', 'codec', 'sample_rate', 'channels', 'bit_rate', 'format', 'size'}.
+
+    Returns None if the file is missing or ffprobe fails.
+    """
+    try:
+        key = _cache_key(path)
+    except OSError:
+        return None
+    if key in _probe_cache:
+        _probe_cache.move_to_end(key)
+        return dict(_probe_cache[key])
+
+    try:
+        info = _run_ffprobe(path)
+    except (subprocess.SubprocessError, OSError, ValueError):
+        return None
+    _probe_cache[key] = info
+    while len(_probe_cache) > PROBE_CACHE_SIZE:
+        _probe_cache.popitem(last=False)
+    return dict(info)
+
+
+def probe_duration(path):
+    """Duration of `path` in seconds (None if unknown)."""
+    info = probe_audio(path)
+    return info['duration'] if info else None
@@ -0,0 +1,312 @@
+"""
+Batch re-summarization of whole feeds, categories or date ranges.
+
+Instead of one synchronous OpenAI call per episode, matching episodes are
+paged through (ordered by _id, with the last submitted id stored as a
+resumable cursor), turned into chat-completion requests and submitted through
+the OpenAI Batch API at a fraction of the cost. A low-priority Celery task
+polls the submitted batches and writes finished summaries back in bulk.
+
+All progress lives on the job document in MongoDB, so a job survives worker
+restarts: running `advance_batch_job` again simply continues where it stopped,
+including for a job that failed. Each page is recorded on the job with an
+idempotency key before it is submitted; after a crash between submitting and
+recording the batch, the key finds the submitted batch instead of sending the
+page again.
+"""
+import io
+import json
+import os
+from datetime import datetime
+
+from database import PodcastDB
+from summarizer import PodcastSummarizer, SUMMARY_MODEL, SUMMARY_TEMPERATURE, SUMMARY_MAX_TOKENS
+
+# Episodes per submitted batch (one page of the selection)
+BATCH_PAGE_SIZE = int(os.getenv('BATCH_RESUMMARIZE_PAGE_SIZE', '200'))
+
+# Batches allowed in flight per job before waiting for results
+BATCH_MAX_IN_FLIGHT = int(os.getenv('BATCH_RESUMMARIZE_MAX_IN_FLIGHT', '5'))
+
+# How often the job re-checks submitted batches
+BATCH_POLL_INTERVAL_S = int(os.getenv('BATCH_RESUMMARIZE_POLL_S', '300'))
+
+# 'openai' for the real Batch API, 'local' for the in-process stand-in
+BATCH_BACKEND = os.getenv('BATCH_RESUMMARIZE_BACKEND', 'openai')
+
+# Recent batches searched for an idempotency key when recovering a submission
+BATCH_RECOVERY_SEARCH = 100
+
+
+def _debug_log(message):
+    """Debug logging with timestamp"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] BATCH RESUMMARIZER: {message}")
+
+
+class OpenAIBatchBackend:
+    """Submits requests through the OpenAI Batch API (/v1/chat/completions, 24h window)."""
+
+    def __init__(self):
+        from openai import OpenAI
+        self.client = OpenAI()
+
+    def submit(self, requests, idempotency_key=None):
+        payload = "\n".join(json.dumps(r) for r in requests).encode('utf-8')
+        input_file = self.client.files.create(file=("resummarize.jsonl", io.BytesIO(payload)), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+            metadata={'idempotency_key': idempotency_key} if idempotency_key else None,
+        )
+        return batch.id
+
+    def find(self, idempotency_key):
+        """Id of a recent batch submitted with `idempotency_key`, or None."""
+        for batch in self.client.batches.list(limit=BATCH_RECOVERY_SEARCH).data:
+            if (batch.metadata or {}).get('idempotency_key') == idempotency_key:
+                return batch.id
+        return None
+
+    def status(self, batch_id):
+        """Return 'in_progress', 'completed' or 'failed'."""
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status == 'completed':
+            return 'completed'
+        if batch.status in ('failed', 'expired', 'cancelled'):
+            return 'failed'
+        return 'in_progress'
+
+    def results(self, batch_id):
+        """Return {custom_id: summary text or None on error}."""
+        batch = self.client.batches.retrieve(batch_id)
+        results = {}
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get('response') or {}
+                if response.get('status_code') == 200:
+                    results[item['custom_id']] = response['body']['choices'][0]['message']['content']
+                else:
+                    results[item['custom_id']] = None
+        if batch.error_file_id:
+            for line in self.client.files.content(batch.error_file_id).text.splitlines():
+                if line.strip():
+                    results.setdefault(json.loads(line)['custom_id'], None)
+        return results
+
+
+class LocalBatchBackend:
+    """In-process stand-in for the Batch API, used in tests and local development.
+
+    Batches complete immediately; each request is answered by `responder`,
+    a callable taking the request body and returning the summary text.
+    """
+    _batches = {}
+    _keys = {}
+
+    def __init__(self, responder=None):
+        self.responder = responder or self._echo_responder
+
+    @staticmethod
+    def _echo_responder(body):
+        title = body['messages'][-1]['content'][:80]
+        return f"[local batch summary] {title}"
+
+    def submit(self, requests, idempotency_key=None):
+        batch_id = f"local_batch_{len(self._batches) + 1}"
+        self._batches[batch_id] = {r['custom_id']: self.responder(r['body']) for r in requests}
+        if idempotency_key:
+            self._keys[idempotency_key] = batch_id
+        return batch_id
+
+    def find(self, idempotency_key):
+        return self._keys.get(idempotency_key)
+
+    def status(self, batch_id):
+        return 'completed' if batch_id in self._batches else 'failed'
+
+    def results(self, batch_id):
+        return dict(self._batches.get(batch_id, {}))
+
+
+def get_batch_backend():
+    """Backend selected by BATCH_RESUMMARIZE_BACKEND."""
+    if BATCH_BACKEND == 'local':
+        return LocalBatchBackend()
+    return OpenAIBatchBackend()
+
+
+class BatchResummarizer:
+    def __init__(self, db=None, backend=None, summarizer=None):
+        self.db = db or PodcastDB()
+        self.backend = backend or get_batch_backend()
+        self.summarizer = summarizer or PodcastSummarizer()
+        self._feeds = {}
+
+    def _get_feed(self, feed_id):
+        if not feed_id:
+            return None
+        key = str(feed_id)
+        if key not in self._feeds:
+            self._feeds[key] = self.db.get_feed_by_id(key)
+        return self._feeds[key]
+
+    def _resolve_category(self, job, episode):
+        """Same priority as resummarize_episode: job override > episode's category > feed's category."""
+        category = job.get('category')
+        if category is None:
+            category = episode.get('prompt_category', '')
+        feed = self._get_feed(episode.get('feed_id'))
+        if not category and feed:
+            category = feed.get('category', '')
+        custom_instructions = feed.get('customPromptInstructions', '') if feed else ''
+        return category, custom_instructions
+
+    def _build_request(self, job, episode):
+        category, custom_instructions = self._resolve_category(job, episode)
+        messages, _, _ = self.summarizer.build_messages(
+            episode['transcript'], episode['title'], custom_instructions, category
+        )
+        request = {
+            'custom_id': str(episode['_id']),
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': {
+                'model': SUMMARY_MODEL,
+                'messages': messages,
+                'temperature': SUMMARY_TEMPERATURE,
+                'max_tokens': SUMMARY_MAX_TOKENS,
+            },
+        }
+        return request, category
+
+    def _collect(self, job):
+        """Write back results of finished batches. Returns True if any batch is still running."""
+        still_running = False
+        for pending in job.get('pending_batches', []):
+            status = self.backend.status(pending['batch_id'])
+            if status == 'in_progress':
+                still_running = True
+                continue
+
+            results = self.backend.results(pending['batch_id']) if status == 'completed' else {}
+            updates = []
+            for episode_id in pending['episode_ids']:
+                summary = results.get(episode_id)
+                if summary:
+                    updates.append((episode_id, {
+                        'summary': summary,
+                        'prompt_category': pending['categories'].get(episode_id, ''),
+                        'summary_batch_job': str(job['_id']),
+                    }))
+            self.db.bulk_update_episodes(updates)
+
+            failed = len(pending['episode_ids']) - len(updates)
+            self.db.update_batch_job(job['_id'], {
+                '$pull': {'pending_batches': {'batch_id': pending['batch_id']}},
+                '$inc': {'counts.completed': len(updates), 'counts.failed': failed},
+            })
+            _debug_log(f"Batch {pending['batch_id']} {status}: {len(updates)} summaries written, {failed} failed")
+        return still_running
+
+    def _submit_next_page(self, job):
+        """Submit the next page of the selection.
+
+        Returns False once the selection is exhausted, or if another run
+        claimed the page first (that run submits it).
+        """
+        episodes = self.db.select_episodes_for_batch(
+            job['selection'], after_id=job.get('cursor'), limit=BATCH_PAGE_SIZE
+        )
+        if not episodes:
+            self.db.update_batch_job(job['_id'], {'$set': {'exhausted': True}})
+            return False
+
+        requests = []
+        categories = {}
+        for episode in episodes:
+            request, category = self._build_request(job, episode)
+            requests.append(request)
+            categories[request['custom_id']] = category
+
+        episode_ids = [r['custom_id'] for r in requests]
+        # The page is claimed before it is submitted: the claim only succeeds
+        # from the cursor this run read, so two runs can't both submit it, and a
+        # crash after submitting is recovered from its key (see _recover_submission)
+        submission = {
+            'idempotency_key': f"{job['_id']}:{episode_ids[-1]}",
+            'episode_ids': episode_ids,
+            'categories': categories,
+        }
+        if not self.db.claim_batch_page(job['_id'], job.get('cursor'), submission):
+            _debug_log(f"Page after {job.get('cursor')} already claimed by another run")
+            return False
+        batch_id = self.backend.submit(requests, idempotency_key=submission['idempotency_key'])
+        self._record_batch(job, batch_id, submission)
+        _debug_log(f"Submitted batch {batch_id} with {len(episode_ids)} episodes")
+        return True
+
+    def _record_batch(self, job, batch_id, submission):
+        """Add a submitted page to the pending batches and move the cursor past it."""
+        self.db.update_batch_job(job['_id'], {
+            '$set': {'cursor': submission['episode_ids'][-1]},
+            '$unset': {'submitting': ''},
+            '$push': {'pending_batches': {
+                'batch_id': batch_id,
+                'episode_ids': submission['episode_ids'],
+                'categories': submission['categories'],
+                'submitted_at': datetime.utcnow(),
+            }},
+            '$inc': {'counts.submitted': len(submission['episode_ids'])},
+        })
+
+    def _recover_submission(self, job):
+        """Settle a page whose submission was interrupted: record its batch if it went out."""
+        submission = job['submitting']
+        batch_id = self.backend.find(submission['idempotency_key'])
+        if batch_id:
+            self._record_batch(job, batch_id, submission)
+            _debug_log(f"Recovered batch {batch_id} submitted before an interruption")
+        else:
+            # Never submitted: the page is submitted again from the unchanged cursor
+            self.db.update_batch_job(job['_id'], {'$unset': {'submitting': ''}})
+
+    def advance(self, job_id):
+        """Make as much progress on a job as possible without blocking.
+
+        Returns the job status: 'running' while batches are outstanding, 'completed' when done.
+        """
+        job = self.db.get_batch_job(job_id)
+        if not job:
+            raise RuntimeError(f"Batch job {job_id} not found")
+        if job['status'] == 'completed':
+            return job['status']
+        # A failed job resumes from its cursor and pending batches
+        self.db.update_batch_job(job_id, {'$set': {'status': 'running'}, '$unset': {'error_message': ''}})
+        if job.get('submitting'):
+            self._recover_submission(job)
+
+        while True:
+            still_running = self._collect(job)
+            job = self.db.get_batch_job(job_id)
+            submitted = False
+            while not job.get('exhausted') and len(job.get('pending_batches', [])) < BATCH_MAX_IN_FLIGHT:
+                if not self._submit_next_page(job):
+                    break
+                submitted = True
+                job = self.db.get_batch_job(job_id)
+            # Loop again only if new batches went out; backends that finish
+            # instantly (the local stand-in) are then collected right away
+            if not submitted:
+                break
+
+        job = self.db.get_batch_job(job_id)
+        if job.get('exhausted') and not job.get('pending_batches') and not still_running:
+            self.db.update_batch_job(job_id, {'$set': {'status': 'completed', 'completed_at': datetime.utcnow()}})
+            _debug_log(f"Job {job_id} completed: {job['counts']}")
+            return 'completed'
+        return 'running'
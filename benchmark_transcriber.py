@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Transcription benchmark - run AudioTranscriber over a grid of model sizes,
+compute types, beam sizes, thread counts and inference modes on the same
+audio and CPU.
+
+Each run reports the real-time factor (wall seconds per audio second, lower
+is better), throughput (audio seconds per wall second), peak RSS, CPU
+utilization and, given a reference transcript, word error rate. Audio is
+either a file or synthetic speech of a configurable length (espeak-ng /
+espeak reading a bundled passage, so the reference is known). Results can
+be appended as JSON lines to track regressions over time.
+"""
+import itertools
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import click
+
+from audio_probe import probe_duration
+from metrics import StageMetrics
+from transcriber import AudioTranscriber, _available_cpus, _available_memory_mb, _warm_models
+
+# Passage read by the speech synthesizer for synthetic benchmark audio
+SYNTHETIC_PASSAGE = (
+    "Welcome back to the show. Today we are talking about how small teams ship software. "
+    "Our guest has spent ten years building developer tools and running product at two startups. "
+    "We cover how they decide what to build next, why they prefer weekly releases over big launches, "
+    "and what changed once language models became part of everyday engineering work. "
+    "Later in the episode we look at pricing, hiring the first designer, and the metrics "
+    "that actually predicted whether customers would stay after the first month."
+)
+
+MODES = ('sequential', 'batched')
+
+
+def _normalize_words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = _normalize_words(reference)
+    hyp = _normalize_words(hypothesis)
+    if not ref:
+        return None
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def synthesize_audio(duration_s, out_dir):
+    """Synthetic speech of at least `duration_s` seconds. Returns (path, reference text)."""
+    tts = shutil.which('espeak-ng') or shutil.which('espeak')
+    if not tts:
+        raise click.ClickException("Synthetic audio needs espeak-ng or espeak; pass an AUDIO_FILE instead")
+
+    clip = os.path.join(out_dir, 'passage.wav')
+    subprocess.run([tts, '-w', clip, SYNTHETIC_PASSAGE], check=True, capture_output=True)
+    clip_duration = probe_duration(clip)
+    if not clip_duration:
+        raise click.ClickException("Could not read duration of the synthesized passage")
+
+    # Whole repetitions only, so the reference transcript stays exact
+    loops = max(1, -(-int(duration_s) // int(clip_duration)))
+    audio = os.path.join(out_dir, f'synthetic_{loops}x.wav')
+    subprocess.run(
+        ['ffmpeg', '-y', '-stream_loop', str(loops - 1), '-i', clip, '-ar', '16000', '-ac', '1', audio],
+        check=True, capture_output=True,
+    )
+    return audio, " ".join([SYNTHETIC_PASSAGE] * loops)
+
+
+def run_config(audio_file, duration, reference, model_size, compute_type, beam_size, threads, mode, language=None):
+    """Transcribe `audio_file` once with one configuration and return its measurements."""
+    transcriber = AudioTranscriber(
+        model_size=model_size, workers=1, batched=(mode == 'batched'), beam_size=beam_size,
+        language=language, compute_type=compute_type, cpu_threads=threads,
+    )
+    transcriber.debug = False
+    # Every configuration starts cold: models warm from an earlier run would hide load time
+    _warm_models.clear()
+    detect_seconds = None
+    if language is None:
+        detect_start = time.perf_counter()
+        transcriber.resolve_language(audio_file, duration)
+        detect_seconds = time.perf_counter() - detect_start
+        # Detection loaded the multilingual model; the transcription model is timed from cold too
+        _warm_models.clear()
+
+    # Model loading is reported separately from transcription
+    load_start = time.perf_counter()
+    _ = transcriber.model
+    load_seconds = time.perf_counter() - load_start
+
+    with StageMetrics('benchmark') as stage:
+        segments = list(transcriber._iter_segments(audio_file, duration))
+    wall = stage.data['wall_time_s']
+    hypothesis = " ".join(text for _, _, text in segments)
+
+    return {
+        'model': transcriber.model_name,
+        'compute_type': compute_type,
+        'beam_size': beam_size,
+        'threads': threads,  # 0 = CTranslate2's default
+        'mode': mode,
+        'batch_size': transcriber.batch_size,
+        'language': transcriber.language,
+        'chunk_s': transcriber.chunk_s,
+        'audio_seconds': round(duration, 1),
+        'load_seconds': round(load_seconds, 2),
+        'detect_seconds': round(detect_seconds, 2) if detect_seconds is not None else None,
+        'wall_seconds': round(wall, 2),
+        'real_time_factor': round(wall / duration, 4),
+        'throughput': round(duration / wall, 2),
+        'peak_rss_mb': stage.data['peak_rss_mb'],
+        'cpu_seconds': stage.data['cpu_time_s'],
+        'cpu_utilization': round(stage.data['cpu_time_s'] / wall / _available_cpus(), 3),
+        'segments': len(segments),
+        'words': len(hypothesis.split()),
+        'wer': round(word_error_rate(reference, hypothesis), 4) if reference else None,
+    }
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5)
+        return result.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _split_option(value, cast=str):
+    return [cast(v.strip()) for v in value.split(',') if v.strip()]
+
+
+@click.command()
+@click.argument('audio_file', required=False, type=click.Path(exists=True, dir_okay=False))
+@click.option('--duration', 'synthetic_duration', default=300, show_default=True,
+              help='Length in seconds of synthetic speech, used when no AUDIO_FILE is given')
+@click.option('--reference', type=click.Path(exists=True, dir_okay=False),
+              help='Reference transcript of AUDIO_FILE, for word error rate')
+@click.option('--model', '--models', 'models', default='base', show_default=True,
+              help='Comma-separated Whisper model sizes')
+@click.option('--compute-types', default='int8', show_default=True, help='Comma-separated: int8, int8_float32, float32, ...')
+@click.option('--beam-sizes', default='5', show_default=True, help='Comma-separated beam sizes')
+@click.option('--threads', default='0', show_default=True, help="Comma-separated CPU thread counts (0 = CTranslate2's default)")
+@click.option('--modes', default='sequential,batched', show_default=True, help='Comma-separated: sequential, batched')
+@click.option('--language', default=None, help='Pin the language instead of detecting it')
+@click.option('--json-output', is_flag=True, help='Print one JSON object per run instead of a table')
+@click.option('--output', type=click.Path(dir_okay=False), help='Append one JSON line per run to this file')
+def benchmark(audio_file, synthetic_duration, reference, models, compute_types, beam_sizes, threads, modes,
+              language, json_output, output):
+    """Benchmark transcription of AUDIO_FILE (or synthetic speech) across configurations."""
+    modes = _split_option(modes)
+    for mode in modes:
+        if mode not in MODES:
+            raise click.BadParameter(f"Unknown mode: {mode}", param_hint='--modes')
+
+    with tempfile.TemporaryDirectory(prefix='whisper_bench_') as tmp_dir:
+        if audio_file:
+            source = os.path.basename(audio_file)
+            reference_text = open(reference, encoding='utf-8').read() if reference else None
+        else:
+            audio_file, reference_text = synthesize_audio(synthetic_duration, tmp_dir)
+            source = 'synthetic'
+
+        duration = probe_duration(audio_file)
+        if not duration:
+            raise click.ClickException(f"Could not read duration of {audio_file}")
+
+        run_info = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'commit': _git_commit(),
+            'host': platform.node(),
+            'cpus': _available_cpus(),
+            'memory_available_mb': round(_available_memory_mb() or 0),
+            'audio': source,
+        }
+
+        results = []
+        grid = itertools.product(
+            _split_option(models), _split_option(compute_types), _split_option(beam_sizes, int),
+            _split_option(threads, int), modes,
+        )
+        for model_size, compute_type, beam_size, thread_count, mode in grid:
+            if not json_output:
+                click.echo(f"⏱️  Running {model_size} {compute_type} beam={beam_size} "
+                           f"threads={thread_count or 'default'} {mode}...")
+            result = dict(run_info, **run_config(
+                audio_file, duration, reference_text, model_size, compute_type, beam_size, thread_count, mode,
+                language=language,
+            ))
+            results.append(result)
+            if output:
+                with open(output, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(result) + "\n")
+
+    if json_output:
+        for result in results:
+            click.echo(json.dumps(result))
+        return
+
+    click.echo(f"\n{'model':<10}{'compute':<14}{'beam':>5}{'thr':>5}{'mode':>12}{'RTF':>9}{'x real':>8}"
+               f"{'peak MB':>9}{'CPU %':>7}{'WER':>8}")
+    for r in results:
+        wer = f"{r['wer'] * 100:.1f}%" if r['wer'] is not None else '-'
+        click.echo(f"{r['model']:<10}{r['compute_type']:<14}{r['beam_size']:>5}{r['threads'] or 'def':>5}{r['mode']:>12}"
+                   f"{r['real_time_factor']:>9}{r['throughput']:>8}{r['peak_rss_mb']:>9}"
+                   f"{r['cpu_utilization'] * 100:>7.0f}{wer:>8}")
+    if len(results) > 1:
+        fastest = min(results, key=lambda r: r['real_time_factor'])
+        click.echo(f"\n🚀 Fastest: {fastest['model']} {fastest['compute_type']} beam={fastest['beam_size']} "
+                   f"threads={fastest['threads'] or 'default'} {fastest['mode']} "
+                   f"({results[0]['real_time_factor'] / fastest['real_time_factor']:.2f}x the first run)")
+
+
+if __name__ == "__main__":
+    benchmark()
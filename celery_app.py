@@ -1,4 +1,5 @@
 from celery import Celery
+from kombu import Queue
 
 # Create a Celery instance
 # The first argument is the name of the current module, which is 'celery_app'
@@ -10,6 +11,24 @@ celery_app = Celery(
     backend='redis://redis:6379/0'
 )
 
+# Priority lanes.
+# - high:   interactive work triggered from the UI (manual adds, retries,
+#           resummarize/reclean) — should finish in minutes even during a backfill
+# - normal: feed ingestion from the scheduled feeder
+# - low:    bulk reprocessing of the library
+QUEUE_HIGH = 'high'
+QUEUE_NORMAL = 'normal'
+QUEUE_LOW = 'low'
+
+# Network-bound audio prefetch, served by its own thread-pool worker so
+# downloads run ahead of (and never occupy) the CPU-bound analysis workers
+QUEUE_DOWNLOAD = 'download'
+
+# Tasks are acknowledged on completion (acks_late), and Redis redelivers any
+# task unacknowledged after the visibility timeout. It must exceed the longest
+# task (multi-hour episodes on slow workers), or that task runs twice at once.
+VISIBILITY_TIMEOUT_S = 12 * 3600
+
 # Import tasks directly to ensure they are registered
 import tasks
 
@@ -20,6 +39,43 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+
+    # Queues and default routing. Callers override the lane per call with
+    # `apply_async(queue=...)`, e.g. a manual add goes to QUEUE_HIGH.
+    task_queues=(
+        Queue(QUEUE_HIGH),
+        Queue(QUEUE_NORMAL),
+        Queue(QUEUE_LOW),
+        Queue(QUEUE_DOWNLOAD),
+    ),
+    task_default_queue=QUEUE_NORMAL,
+    task_routes={
+        'tasks.analyze_episode': {'queue': QUEUE_NORMAL},
+        'tasks.resummarize_episode': {'queue': QUEUE_HIGH},
+        'tasks.reclean_episode': {'queue': QUEUE_HIGH},
+        'tasks.advance_batch_job': {'queue': QUEUE_LOW},
+        'tasks.prefetch_audio': {'queue': QUEUE_DOWNLOAD},
+        'tasks.restore_audio': {'queue': QUEUE_DOWNLOAD},
+        'tasks.fingerprint_episode': {'queue': QUEUE_DOWNLOAD},
+        'tasks.enforce_storage_quota': {'queue': QUEUE_LOW},
+    },
+
+    # Fairness between lanes comes from how workers are assigned to queues
+    # (see docker-compose), not from a broker setting:
+    # - the shared `-Q high,normal,low` worker takes turns between its queues
+    #   (kombu's Redis transport rotates them after every fetch), so low-priority
+    #   work always gets a turn and can't starve;
+    # - the dedicated `-Q high` worker (INTERACTIVE_WORKER_CONCURRENCY slots) is
+    #   the weight: interactive requests get reserved capacity on top of their
+    #   share of the shared worker, so they never queue behind a backfill.
+    # Episodes run for tens of minutes, so each process reserves only the task
+    # it is running and acknowledges it on completion; otherwise a worker would
+    # sit on prefetched backlog while a high-priority request waits.
+    broker_transport_options={'visibility_timeout': VISIBILITY_TIMEOUT_S},
+    result_backend_transport_options={'visibility_timeout': VISIBILITY_TIMEOUT_S},
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
 )
 
 if __name__ == '__main__':
@@ -6,10 +6,13 @@ import os
 from datetime import datetime
 from langfuse.openai import openai  # Langfuse OpenAI wrapper for automatic tracing
 from langfuse import Langfuse, observe
+from rate_limiter import RateLimitedError, estimate_tokens, get_openai_limiter, retry_after_from_error
 
 class TranscriptCleaner:
     def __init__(self):
         self.debug = True
+        # Token usage of the most recent OpenAI call (read by the pipeline metrics)
+        self.last_usage = {}
         # Langfuse OpenAI wrapper is automatically configured via env vars
         # No manual OpenAI client initialization needed
 
@@ -90,6 +93,11 @@ Transcript:
             self._debug_log("⚙️  Temperature: 0.3 (conservative for cleaning)")
             self._debug_log("📝 Max output tokens: 4000")
 
+            # Wait for cluster-wide capacity (requests/min and tokens/min)
+            limiter = get_openai_limiter()
+            estimated_tokens = estimate_tokens(messages, 4000)
+            limiter.acquire(estimated_tokens)
+
             start_time = time.time()
 
             # Use Langfuse OpenAI wrapper (automatic tracing + prompt linking)
@@ -112,6 +120,12 @@ Transcript:
             input_tokens = usage.prompt_tokens
             output_tokens = usage.completion_tokens
             total_tokens = usage.total_tokens
+            limiter.reconcile(estimated_tokens, total_tokens)
+            self.last_usage = {
+                'model': response.model,
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+            }
 
             self._debug_log(f"✅ OpenAI cleaning completed in {elapsed:.2f}s")
             self._debug_log(f"📊 Token usage: {input_tokens} input + {output_tokens} output = {total_tokens} total")
@@ -123,6 +137,12 @@ Transcript:
 
             return cleaned
 
+        except RateLimitedError:
+            raise
+        except openai.RateLimitError as e:
+            retry_after = retry_after_from_error(e)
+            self._debug_log(f"⏳ OpenAI rate limit hit during cleaning (retry after: {retry_after}s)")
+            raise RateLimitedError(f"OpenAI rate limit during cleaning: {str(e)}", retry_after=retry_after)
         except Exception as e:
             self._debug_log(f"❌ Error with OpenAI cleaning: {str(e)}")
             raise RuntimeError(f"Failed to clean transcript with OpenAI: {str(e)}")
\ No newline at end of file
@@ -1,11 +1,18 @@
 """
 MongoDB database connection and models
 """
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from datetime import datetime
 import os
 
+# Ordered stages of the analysis pipeline. Each stage persists its output on the
+# episode together with a marker, so a rerun can resume at the first incomplete one.
+PIPELINE_STAGES = ['downloaded', 'ingested', 'transcribed', 'cleaned', 'summarized']
+
 class PodcastDB:
+    # Indexes of the fingerprints collection, created once per process
+    _fingerprint_indexes_ready = False
+
     def __init__(self):
         connection_string = os.getenv("MONGO_CONNECTION_STRING")
         db_name = os.getenv("MONGO_DB_NAME", "podcast_analyzer")
@@ -14,9 +21,15 @@ class PodcastDB:
         self.episodes = self.db.episodes
         self.feeds = self.db.feeds
         self.feeder_status = self.db.feeder_status
+        self.batch_jobs = self.db.batch_jobs
+        self.storage_status = self.db.storage_status
+        self.fingerprints = self.db.fingerprints
         
-    def create_placeholder(self, url, title="", feed_id=None, feed_title=None):
-        """Create a placeholder record for a new episode."""
+    def create_placeholder(self, url, title="", feed_id=None, feed_title=None, transcript_links=None):
+        """Create a placeholder record for a new episode.
+
+        transcript_links: <podcast:transcript> links from the feed entry, used instead of Whisper when timed.
+        """
         if self.episode_exists(url):
             return self.get_episode(url)
             
@@ -34,6 +47,8 @@ class PodcastDB:
             placeholder['feed_id'] = feed_id
         if feed_title:
             placeholder['feed_title'] = feed_title
+        if transcript_links:
+            placeholder['transcript_links'] = transcript_links
             
         result = self.episodes.insert_one(placeholder)
         return self.episodes.find_one({'_id': result.inserted_id})
@@ -49,9 +64,10 @@ class PodcastDB:
         # Check if episode already exists
         existing = self.episodes.find_one({'url': episode_data['url']})
         if existing:
+            # Live progress only describes a run in flight
             self.episodes.update_one(
                 {'url': episode_data['url']}, 
-                {'$set': episode_data}
+                {'$set': episode_data, '$unset': {'progress': ''}}
             )
             return existing['_id']
         else:
@@ -111,7 +127,7 @@ class PodcastDB:
         )
 
     def update_episode_status(self, url, status, error_message=None):
-        """Update the status of an episode."""
+        """Update the status of an episode (dropping the live progress of the previous run)."""
         update_data = {
             'status': status,
             'updated_at': datetime.utcnow()
@@ -119,11 +135,52 @@ class PodcastDB:
         if error_message:
             update_data['error_message'] = error_message
             
+        return self.episodes.update_one(
+            {'url': url},
+            {'$set': update_data, '$unset': {'progress': ''}}
+        )
+
+    def save_stage(self, url, stage, stage_data):
+        """Persist the output of a pipeline stage and mark the stage as completed."""
+        update_data = dict(stage_data)
+        update_data['pipeline_stage'] = stage
+        update_data[f'stages.{stage}'] = datetime.utcnow()
+        update_data['updated_at'] = datetime.utcnow()
         return self.episodes.update_one(
             {'url': url},
             {'$set': update_data}
         )
 
+    def record_stage_metrics(self, url, stage, metrics):
+        """Store resource metrics (timings, RSS, tokens, ...) for one pipeline stage."""
+        return self.episodes.update_one(
+            {'url': url},
+            {'$set': {f'metrics.{stage}': metrics, 'updated_at': datetime.utcnow()}}
+        )
+
+    def update_progress(self, url, stage, progress):
+        """Store live progress (percent, real-time factor, ETA) of the stage currently running."""
+        return self.episodes.update_one(
+            {'url': url},
+            {'$set': {'progress': dict(progress, stage=stage, updated_at=datetime.utcnow())}}
+        )
+
+    def list_episode_metrics(self, feed_id=None):
+        """List stage metrics of all episodes that have them, with feed titles."""
+        from bson.objectid import ObjectId
+        query = {'metrics': {'$exists': True}}
+        if feed_id:
+            query['feed_id'] = ObjectId(feed_id)
+        return list(self.episodes.find(query, {'url': 1, 'feed_id': 1, 'feed_title': 1, 'metrics': 1}))
+
+    def reset_stages(self, url):
+        """Forget all stage checkpoints so the next run starts from scratch."""
+        return self.episodes.update_one(
+            {'url': url},
+            {'$unset': {'pipeline_stage': '', 'stages': ''},
+             '$set': {'updated_at': datetime.utcnow()}}
+        )
+
     def episode_exists(self, url):
         """Check if an episode with the given URL already exists and is not hidden."""
         return self.episodes.count_documents({"url": url, "hidden": {"$ne": True}}) > 0
@@ -145,20 +202,28 @@ class PodcastDB:
         )
 
     def retry_failed_episode(self, episode_id):
-        """Retry a failed episode by resetting its status to pending."""
+        """Retry a failed episode by resetting its status to pending.
+
+        Stage checkpoints are kept, so the rerun resumes at the first incomplete stage.
+        """
         from bson.objectid import ObjectId
         return self.episodes.update_one(
             {'_id': ObjectId(episode_id)},
-            {'$set': {'status': 'pending', 'updated_at': datetime.utcnow()}}
+            {'$set': {'status': 'pending', 'updated_at': datetime.utcnow()}, '$unset': {'progress': ''}}
         )
 
+    def count_backlog(self):
+        """Number of episodes waiting for or undergoing analysis."""
+        return self.episodes.count_documents({'status': {'$in': ['pending', 'processing']}})
+
     def delete_episode(self, episode_id):
         """Delete an episode from the database."""
         from bson.objectid import ObjectId
         return self.episodes.delete_one({'_id': ObjectId(episode_id)})
 
     # RSS Feed Management Methods
-    def add_feed(self, feed_url, title="", custom_instructions="", category=""):
+    def add_feed(self, feed_url, title="", custom_instructions="", category="", transcription_profile="",
+                 language=""):
         """Add a new RSS feed."""
         if self.feed_exists(feed_url):
             return self.get_feed(feed_url)
@@ -169,6 +234,8 @@ class PodcastDB:
             'active': True,
             'customPromptInstructions': custom_instructions,
             'category': category,
+            'transcription_profile': transcription_profile,
+            'language': language,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
@@ -248,4 +315,169 @@ class PodcastDB:
             {'_id': 'feeder_main'},
             {'$set': update_data},
             upsert=True
-        )
\ No newline at end of file
+        )
+
+    # Audio Storage Methods
+    def mark_audio_played(self, file_path):
+        """Record that an episode's audio was just played (drives least-recently-played eviction)."""
+        return self.episodes.update_one(
+            {'file_path': file_path},
+            {'$set': {'last_played_at': datetime.utcnow()}}
+        )
+
+    def list_stored_audio(self):
+        """Episodes with audio on disk, with only the fields storage management needs."""
+        return list(self.episodes.find(
+            {'file_path': {'$nin': [None, '']}},
+            {'url': 1, 'title': 1, 'status': 1, 'file_path': 1, 'transcription_file_path': 1,
+             'audio_tier': 1, 'created_at': 1, 'last_played_at': 1}
+        ))
+
+    def count_evicted_audio(self):
+        """Number of episodes whose audio was evicted (re-fetchable from the original URL)."""
+        return self.episodes.count_documents({'audio_tier': 'evicted'})
+
+    def get_storage_status(self):
+        """Stats of the last storage management run (None if it never ran)."""
+        return self.storage_status.find_one({'_id': 'storage_main'})
+
+    def try_start_storage_run(self, stale_after_s):
+        """Claim the storage run lock; False if another run is in progress (and not stale)."""
+        from datetime import timedelta
+        from pymongo.errors import DuplicateKeyError
+        now = datetime.utcnow()
+        try:
+            self.storage_status.update_one(
+                {'_id': 'storage_main', '$or': [
+                    {'is_running': {'$ne': True}},
+                    {'started_at': {'$lt': now - timedelta(seconds=stale_after_s)}},
+                ]},
+                {'$set': {'is_running': True, 'started_at': now}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # No match, so the upsert collided with the existing (locked) document
+            return False
+        return True
+
+    def update_storage_status(self, stats):
+        """Store the stats of a finished storage management run and release the run lock."""
+        return self.storage_status.update_one(
+            {'_id': 'storage_main'},
+            {'$set': {**stats, 'is_running': False, 'last_run_time': datetime.utcnow()}},
+            upsert=True
+        )
+
+    # Audio Fingerprint Methods
+    def save_fingerprint(self, fingerprint):
+        """Store an episode's audio fingerprint (see audio_fingerprint.to_document)."""
+        if not PodcastDB._fingerprint_indexes_ready:
+            self.fingerprints.create_index('url', unique=True)
+            self.fingerprints.create_index('keys')
+            PodcastDB._fingerprint_indexes_ready = True
+        return self.fingerprints.update_one(
+            {'url': fingerprint['url']},
+            {'$set': {**fingerprint, 'created_at': datetime.utcnow()}},
+            upsert=True
+        )
+
+    def get_fingerprint(self, url):
+        """The stored fingerprint of an episode, or None."""
+        return self.fingerprints.find_one({'url': url})
+
+    def find_fingerprint_candidates(self, keys, exclude_url, min_hits, limit):
+        """Fingerprints sharing at least `min_hits` index keys with `keys`, most shared first.
+
+        Returns [{'url', 'hits'}]; candidates still need verifying (audio_fingerprint.compare).
+        """
+        return list(self.fingerprints.aggregate([
+            {'$match': {'keys': {'$in': keys}, 'url': {'$ne': exclude_url}}},
+            {'$project': {'_id': 0, 'url': 1, 'hits': {'$size': {'$setIntersection': ['$keys', keys]}}}},
+            {'$match': {'hits': {'$gte': min_hits}}},
+            {'$sort': {'hits': -1}},
+            {'$limit': limit},
+        ]))
+
+    def delete_fingerprint(self, url):
+        """Delete an episode's audio fingerprint."""
+        return self.fingerprints.delete_one({'url': url})
+
+    # Batch Re-summarization Job Methods
+    def create_batch_job(self, selection, category=None):
+        """Create a batch re-summarization job for the given episode selection."""
+        job = {
+            'selection': selection,
+            'category': category,
+            'status': 'pending',
+            'cursor': None,
+            'exhausted': False,
+            'pending_batches': [],
+            'counts': {'submitted': 0, 'completed': 0, 'failed': 0},
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow()
+        }
+        result = self.batch_jobs.insert_one(job)
+        return self.batch_jobs.find_one({'_id': result.inserted_id})
+
+    def get_batch_job(self, job_id):
+        """Get a batch job by its MongoDB ObjectId."""
+        from bson.objectid import ObjectId
+        return self.batch_jobs.find_one({'_id': ObjectId(job_id)})
+
+    def update_batch_job(self, job_id, update):
+        """Apply a raw MongoDB update document to a batch job."""
+        from bson.objectid import ObjectId
+        update.setdefault('$set', {})['updated_at'] = datetime.utcnow()
+        return self.batch_jobs.update_one({'_id': ObjectId(job_id)}, update)
+
+    def claim_batch_page(self, job_id, cursor, submission):
+        """Record `submission` as the page being submitted, unless another run got there first.
+
+        Succeeds only while no submission is in flight and the cursor is still
+        `cursor`. Returns True if this caller owns the page.
+        """
+        from bson.objectid import ObjectId
+        result = self.batch_jobs.update_one(
+            {'_id': ObjectId(job_id), 'submitting': {'$exists': False}, 'cursor': cursor},
+            {'$set': {'submitting': submission, 'updated_at': datetime.utcnow()}},
+        )
+        return result.modified_count == 1
+
+    def select_episodes_for_batch(self, selection, after_id=None, limit=100):
+        """Page through completed episodes matching a batch selection, ordered by _id.
+
+        selection may contain feed_id, category (episode prompt_category) and
+        since/until (datetimes, compared against created_at).
+        """
+        from bson.objectid import ObjectId
+        query = {
+            'status': 'completed',
+            'hidden': {'$ne': True},
+            'transcript': {'$exists': True, '$ne': ''},
+        }
+        if selection.get('feed_id'):
+            query['feed_id'] = ObjectId(selection['feed_id'])
+        if selection.get('category') is not None:
+            query['prompt_category'] = selection['category']
+        created = {}
+        if selection.get('since'):
+            created['$gte'] = selection['since']
+        if selection.get('until'):
+            created['$lt'] = selection['until']
+        if created:
+            query['created_at'] = created
+        if after_id:
+            query['_id'] = {'$gt': ObjectId(after_id)}
+        return list(self.episodes.find(query).sort('_id', 1).limit(limit))
+
+    def bulk_update_episodes(self, updates):
+        """Write many episode updates in one round trip. updates: [(episode_id, fields)]."""
+        from bson.objectid import ObjectId
+        if not updates:
+            return None
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne({'_id': ObjectId(episode_id)}, {'$set': {**fields, 'updated_at': now}})
+            for episode_id, fields in updates
+        ]
+        return self.episodes.bulk_write(operations, ordered=False)
@@ -0,0 +1,220 @@
+"""
+Cluster-wide download slots and bandwidth limiting backed by Redis.
+
+Every download, whether a prefetch on the download queue or an analysis
+fetching its own audio, takes a slot before it opens a connection: at most
+DOWNLOAD_MAX_CONCURRENT downloads run at once across all workers, and at
+most DOWNLOAD_MAX_PER_HOST against any one host (so a backfill doesn't
+hammer a single CDN). Slots are leases that expire, so a crashed worker
+can't hold one forever. Downloaded bytes are drawn from a shared token
+bucket, capping total bandwidth at DOWNLOAD_MAX_BYTES_PER_S.
+
+Like the OpenAI rate limiter, everything fails open when Redis is down.
+"""
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+import redis
+
+from rate_limiter import REDIS_URL
+
+DOWNLOAD_MAX_CONCURRENT = int(os.getenv('DOWNLOAD_MAX_CONCURRENT', '8'))
+DOWNLOAD_MAX_PER_HOST = int(os.getenv('DOWNLOAD_MAX_PER_HOST', '2'))
+# Total download bandwidth across the cluster (0 = unlimited)
+DOWNLOAD_MAX_BYTES_PER_S = int(os.getenv('DOWNLOAD_MAX_BYTES_PER_S', '0'))
+
+# How long a caller waits for a free slot before giving up (0 = don't wait;
+# the prefetch task retries later instead of holding a download thread)
+DOWNLOAD_SLOT_MAX_WAIT_S = float(os.getenv('DOWNLOAD_SLOT_MAX_WAIT_S', '900'))
+# Slot lease length; renewed while the download makes progress
+DOWNLOAD_SLOT_TTL_S = 300
+DOWNLOAD_SLOT_POLL_S = 2
+
+# Take a slot from every semaphore, or from none of them.
+# Each key is a sorted set of holder -> lease expiry.
+# KEYS: semaphore keys. ARGV: now, expiry, holder, limit_1, limit_2, ...
+_ACQUIRE_SLOT_LUA = """
+local now = tonumber(ARGV[1])
+for i = 1, #KEYS do
+  redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now)
+  if redis.call('ZCARD', KEYS[i]) >= tonumber(ARGV[3 + i]) then
+    return 0
+  end
+end
+for i = 1, #KEYS do
+  redis.call('ZADD', KEYS[i], ARGV[2], ARGV[3])
+  redis.call('EXPIRE', KEYS[i], math.ceil(tonumber(ARGV[2]) - now) + 60)
+end
+return 1
+"""
+
+# Take `cost` bytes from a bucket refilling at `rate` bytes per second
+# (one second of burst). Returns the seconds to wait ("0" on success).
+# KEYS: bucket key. ARGV: rate, cost
+_ACQUIRE_BYTES_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or rate
+local ts = tonumber(data[2]) or now
+tokens = math.min(rate, tokens + math.max(0, now - ts) * rate)
+if tokens < cost then
+  return tostring((cost - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens - cost, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 60)
+return '0'
+"""
+
+
+class DownloadSlotTimeout(RuntimeError):
+    """No download slot freed up within the caller's wait (DOWNLOAD_SLOT_MAX_WAIT_S by default)."""
+
+
+def _host(url):
+    return (urlparse(url).hostname or 'unknown').lower()
+
+
+class DownloadManager:
+    def __init__(self, redis_url=REDIS_URL, max_concurrent=DOWNLOAD_MAX_CONCURRENT,
+                 max_per_host=DOWNLOAD_MAX_PER_HOST, max_bytes_per_s=DOWNLOAD_MAX_BYTES_PER_S,
+                 prefix='downloads'):
+        self.max_concurrent = max_concurrent
+        self.max_per_host = max_per_host
+        self.max_bytes_per_s = max_bytes_per_s
+        self.prefix = prefix
+        self.debug = True
+        self.redis = redis.Redis.from_url(redis_url)
+        self._acquire_slot_script = self.redis.register_script(_ACQUIRE_SLOT_LUA)
+        self._acquire_bytes_script = self.redis.register_script(_ACQUIRE_BYTES_LUA)
+
+    def _debug_log(self, message):
+        """Debug logging with timestamp"""
+        if self.debug:
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] DOWNLOAD MANAGER: {message}")
+
+    def _slot_keys(self, host):
+        return [f"{self.prefix}:slots", f"{self.prefix}:host:{host}"]
+
+    def _try_acquire(self, keys, holder):
+        now = time.time()
+        return bool(self._acquire_slot_script(
+            keys=keys,
+            args=[now, now + DOWNLOAD_SLOT_TTL_S, holder, self.max_concurrent, self.max_per_host],
+        ))
+
+    def _release(self, keys, holder):
+        try:
+            for key in keys:
+                self.redis.zrem(key, holder)
+        except redis.RedisError:
+            pass
+
+    def _renew(self, keys, holder):
+        try:
+            for key in keys:
+                self.redis.zadd(key, {holder: time.time() + DOWNLOAD_SLOT_TTL_S}, xx=True)
+        except redis.RedisError:
+            pass
+
+    @contextmanager
+    def slot(self, url, max_wait=DOWNLOAD_SLOT_MAX_WAIT_S):
+        """Hold a global and a per-host download slot for `url`.
+
+        Yields a throttle callback: call it with the byte count of every chunk
+        received. It blocks to keep the cluster under DOWNLOAD_MAX_BYTES_PER_S
+        and keeps the slot lease alive. Raises DownloadSlotTimeout if no slot
+        frees up within `max_wait` (with 0, as soon as none is free).
+        """
+        host = _host(url)
+        keys = self._slot_keys(host)
+        holder = uuid.uuid4().hex
+        deadline = time.time() + max_wait
+        acquired = False
+        waited = False
+        while True:
+            try:
+                acquired = self._try_acquire(keys, holder)
+            except redis.RedisError as e:
+                self._debug_log(f"⚠️  Redis unavailable, downloading without limits: {e}")
+                break
+            if acquired:
+                break
+            if time.time() + DOWNLOAD_SLOT_POLL_S > deadline:
+                raise DownloadSlotTimeout(f"No download slot for {host} within {max_wait:.0f}s" if max_wait
+                                          else f"No download slot free for {host}")
+            if not waited:
+                self._debug_log(f"⏳ Waiting for a download slot ({host})")
+                waited = True
+            time.sleep(DOWNLOAD_SLOT_POLL_S)
+
+        renewed_at = time.time()
+
+        def throttle(nbytes):
+            nonlocal renewed_at
+            self.acquire_bandwidth(nbytes)
+            if acquired and time.time() - renewed_at > DOWNLOAD_SLOT_TTL_S / 3:
+                self._renew(keys, holder)
+                renewed_at = time.time()
+
+        try:
+            yield throttle
+        finally:
+            if acquired:
+                self._release(keys, holder)
+
+    def acquire_bandwidth(self, nbytes):
+        """Block until `nbytes` fit in the cluster-wide bandwidth budget."""
+        if self.max_bytes_per_s <= 0 or nbytes <= 0:
+            return
+        # A chunk larger than one second of budget is paid for in pieces
+        while nbytes > 0:
+            cost = min(nbytes, self.max_bytes_per_s)
+            try:
+                wait = float(self._acquire_bytes_script(
+                    keys=[f"{self.prefix}:bandwidth"], args=[self.max_bytes_per_s, cost],
+                ))
+            except redis.RedisError:
+                return
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            nbytes -= cost
+
+    def stats(self):
+        """Downloads in flight: {'active', 'max_concurrent', 'max_per_host', 'hosts': {host: n}}."""
+        now = time.time()
+        try:
+            active = self.redis.zcount(f"{self.prefix}:slots", now, '+inf')
+            hosts = {}
+            for key in self.redis.scan_iter(match=f"{self.prefix}:host:*"):
+                count = self.redis.zcount(key, now, '+inf')
+                if count:
+                    hosts[key.decode().split(':', 2)[2]] = count
+        except redis.RedisError:
+            return None
+        return {
+            'active': active,
+            'max_concurrent': self.max_concurrent,
+            'max_per_host': self.max_per_host,
+            'max_bytes_per_s': self.max_bytes_per_s or None,
+            'hosts': hosts,
+        }
+
+
+_manager = None
+
+
+def get_download_manager():
+    """Process-wide manager instance (shares one Redis connection pool)."""
+    global _manager
+    if _manager is None:
+        _manager = DownloadManager()
+    return _manager
@@ -1,112 +1,231 @@
 """
-Podcast downloader using yt-dlp
+Podcast downloader: direct HTTP for audio enclosures, yt-dlp for everything else.
+
+Each episode's audio goes to a path derived from its URL alone:
+audio/<h[0:2]>/<h[2:4]>/<h>.<ext> with h = sha1(url). Directories stay small
+however large the library grows, the file for an episode is known without
+scanning, and concurrent workers never pick up each other's downloads.
 """
+import hashlib
 import yt_dlp
 import os
 import time
-import subprocess
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import unquote, urlparse
+from audio_probe import probe_audio
+from http_downloader import EnclosureDownloader, exclusive_lock
+from download_manager import DOWNLOAD_SLOT_MAX_WAIT_S, DownloadSlotTimeout, get_download_manager
+
+# Use auto-generated captions when a video has no uploaded ones
+CAPTIONS_ALLOW_AUTOMATIC = os.getenv('CAPTIONS_ALLOW_AUTOMATIC', 'true').lower() == 'true'
+
+YDL_BASE_OPTS = {
+    # Add options to bypass bot detection
+    'extractor_args': {
+        'youtube': {
+            'player_client': ['android', 'web'],
+            'player_skip': ['webpage', 'configs'],
+        }
+    },
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
 
 class PodcastDownloader:
     def __init__(self, audio_dir):
         self.audio_dir = Path(audio_dir)
         self.audio_dir.mkdir(exist_ok=True)
         self.debug = True
-        
+        self.http = EnclosureDownloader()
+
     def _debug_log(self, message):
         """Debug logging with timestamp"""
         if self.debug:
             timestamp = datetime.now().strftime("%H:%M:%S")
             print(f"[{timestamp}] DOWNLOADER: {message}")
     
-    def _get_duration_from_file(self, file_path):
-        """Extract duration from audio file using ffprobe"""
+
+    def audio_stem(self, url):
+        """Sharded path of an episode's audio, without extension."""
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return self.audio_dir / digest[:2] / digest[2:4] / digest
+
+    @staticmethod
+    def _finished_audio(stem):
+        """A finished audio file under `stem`, whatever its extension (None if there isn't one)"""
+        return next((p for p in stem.parent.glob(f"{stem.name}.*")
+                     if p.suffix not in ('.part', '.ytdl', '.json', '.lock')), None)
+
+    def _result(self, url, file_path, title, duration):
+        """Episode data for a downloaded file (one cached ffprobe run; the transcriber reuses it)"""
+        file_size = file_path.stat().st_size / (1024 * 1024)  # Size in MB
+        self._debug_log(f"Found downloaded file: {file_path}")
+        self._debug_log(f"File size: {file_size:.2f} MB")
+
+        audio_info = probe_audio(file_path)
+        if audio_info:
+            self._debug_log(f"Audio: {audio_info['codec']}, {audio_info['sample_rate']} Hz, "
+                            f"{audio_info['channels']} ch, {(audio_info['bit_rate'] or 0) // 1000} kbps")
+        final_duration = duration if duration and duration > 0 else int((audio_info or {}).get('duration') or 0)
+        self._debug_log(f"Final duration: {final_duration//60}:{final_duration%60:02d}")
+        return {
+            'title': title,
+            'duration': final_duration,
+            'file_path': f'audio/{file_path.resolve().relative_to(self.audio_dir.resolve()).as_posix()}',
+            'file_size': file_path.stat().st_size,
+            'audio_info': audio_info,
+            'url': url
+        }
+
+    def _download_direct(self, url, title=None, throttle=None):
+        """Stream a plain audio enclosure over HTTP (resumable, verified)"""
+        self._debug_log("Direct audio enclosure, downloading over HTTP...")
+        download_start = time.time()
+        stem = self.audio_stem(url)
+        stem.parent.mkdir(parents=True, exist_ok=True)
+        # The Content-Type rename happens under the lock too, so a concurrent download never sees it half done
+        with exclusive_lock(str(stem) + '.lock'):
+            file_path = self._finished_audio(stem)
+            if file_path:
+                self._debug_log(f"{file_path.name} is already downloaded; reusing it")
+            else:
+                result = self.http.download(url, stem.with_suffix(self.http.extension_for(url)), throttle=throttle)
+                download_elapsed = time.time() - download_start
+                self._debug_log(f"Download completed in {download_elapsed:.2f}s "
+                                f"({result['bytes_transferred'] / 1e6 / max(download_elapsed, 1e-3):.1f} MB/s)")
+
+                # URLs without an audio extension get theirs from the Content-Type
+                file_path = result['path']
+                extension = self.http.extension_for(url, result['content_type'])
+                if file_path.suffix != extension:
+                    file_path = file_path.rename(stem.with_suffix(extension))
+        return self._result(url, file_path, title or Path(unquote(urlparse(url).path)).stem or 'Unknown', 0)
+
+    def download(self, url, title=None, max_wait=DOWNLOAD_SLOT_MAX_WAIT_S):
+        """Download podcast audio from URL (within the cluster-wide download slots and bandwidth cap).
+
+        Raises DownloadSlotTimeout if no slot frees up within `max_wait` seconds.
+        """
+        self._debug_log(f"Starting download from: {url}")
         try:
-            result = subprocess.run(
-                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1:nokey=1', file_path],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                return int(float(result.stdout.strip()))
+            with get_download_manager().slot(url, max_wait=max_wait) as throttle:
+                if self.http.is_direct_audio(url):
+                    return self._download_direct(url, title, throttle)
+                return self._download_with_ytdlp(url, throttle)
+        except DownloadSlotTimeout:
+            raise
         except Exception as e:
-            self._debug_log(f"ffprobe error: {e}")
-        return 0
-    
-    def download(self, url):
-        """Download podcast audio from URL"""
-        self._debug_log(f"Starting download from: {url}")
-        
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': str(self.audio_dir / '%(title)s.%(ext)s'),
-            'extractaudio': True,
-            'audioformat': 'mp3',
-            'audioquality': '192K',
-            # Add options to bypass bot detection
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android', 'web'],
-                    'player_skip': ['webpage', 'configs'],
+            self._debug_log(f"Error downloading {url}: {str(e)}")
+            return None
+
+    def fetch_captions(self, url, language=None):
+        """Captions of a video page as WebVTT, without downloading the media.
+
+        Uploaded captions win over automatic ones; languages are tried in the
+        order `language`, the video's own language, English. Returns
+        {'text', 'language', 'automatic', 'title', 'duration'} or None.
+        """
+        try:
+            with yt_dlp.YoutubeDL(dict(YDL_BASE_OPTS, skip_download=True, quiet=True)) as ydl:
+                info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            self._debug_log(f"Could not read captions of {url}: {str(e)}")
+            return None
+
+        wanted = [lang for lang in (language, info.get('language'), 'en') if lang]
+        for key, automatic in (('subtitles', False), ('automatic_captions', True)):
+            if automatic and not CAPTIONS_ALLOW_AUTOMATIC:
+                continue
+            tracks = info.get(key) or {}
+            for lang in wanted:
+                code = next((c for c in tracks if c == lang or c.split('-')[0] == lang), None)
+                track = next((f for f in tracks.get(code) or [] if f.get('ext') == 'vtt'), None)
+                if not track:
+                    continue
+                try:
+                    response = self.http.session.get(track['url'], timeout=30)
+                    response.raise_for_status()
+                except Exception as e:
+                    self._debug_log(f"Could not fetch {code} captions: {str(e)}")
+                    continue
+                response.encoding = 'utf-8'
+                self._debug_log(f"Using {'automatic' if automatic else 'uploaded'} {code} captions")
+                return {
+                    'text': response.text,
+                    'language': code.split('-')[0],
+                    'automatic': automatic,
+                    'title': info.get('title'),
+                    'duration': int(info.get('duration') or 0),
                 }
-            },
-            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        }
+        return None
+
+    def stream_source(self, url):
+        """(media URL, HTTP headers) ffmpeg can read an episode's audio from, without downloading it.
+
+        Enclosures are read as they are; pages are resolved to their best audio
+        format with yt-dlp.
+        """
+        if self.http.is_direct_audio(url):
+            return url, None
+        with yt_dlp.YoutubeDL(dict(YDL_BASE_OPTS, format='bestaudio/best', skip_download=True, quiet=True)) as ydl:
+            info = ydl.extract_info(url, download=False)
+        if not info.get('url'):
+            raise RuntimeError(f"No streamable audio format for {url}")
+        return info['url'], info.get('http_headers')
+
+    def _download_with_ytdlp(self, url, throttle=None):
+        """Download a page's audio with yt-dlp"""
+        received = {}
+
+        def progress_hook(status):
+            # yt-dlp reports running totals; throttle on the increments
+            if throttle and status.get('downloaded_bytes') is not None:
+                key = status.get('tmpfilename') or status.get('filename')
+                delta = status['downloaded_bytes'] - received.get(key, 0)
+                received[key] = status['downloaded_bytes']
+                throttle(delta)
+
+        ydl_opts = dict(
+            YDL_BASE_OPTS,
+            format='bestaudio/best',
+            outtmpl=str(self.audio_stem(url)) + '.%(ext)s',
+            extractaudio=True,
+            audioformat='mp3',
+            audioquality='192K',
+            progress_hooks=[progress_hook],
+        )
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             try:
-                # Extract info first to get metadata
-                self._debug_log("Extracting video metadata...")
-                start_time = time.time()
-                info = ydl.extract_info(url, download=False)
-                elapsed = time.time() - start_time
+                # Metadata and download in one pass (no second extraction)
+                self._debug_log("Extracting metadata and downloading audio...")
+                download_start = time.time()
+                # yt-dlp's own .part file is shared too; it reuses a file finished meanwhile
+                self.audio_stem(url).parent.mkdir(parents=True, exist_ok=True)
+                with exclusive_lock(str(self.audio_stem(url)) + '.lock'):
+                    info = ydl.extract_info(url, download=True)
+                download_elapsed = time.time() - download_start
                 
                 title = info.get('title', 'Unknown')
-                duration = info.get('duration', 0)
+                duration = int(info.get('duration') or 0)
                 
-                self._debug_log(f"Metadata extraction took {elapsed:.2f}s")
+                self._debug_log(f"Download completed in {download_elapsed:.2f}s")
                 self._debug_log(f"Title: {title}")
                 self._debug_log(f"Duration: {duration//60}:{duration%60:02d}")
                 
-                # Now download
-                self._debug_log("Starting audio download...")
-                download_start = time.time()
-                ydl.download([url])
-                download_elapsed = time.time() - download_start
-                self._debug_log(f"Download completed in {download_elapsed:.2f}s")
-                
-                # Find the downloaded file
-                self._debug_log("Locating downloaded file...")
-                safe_title = title.replace(':', '：')  # YT-DLP may replace colons
-                downloaded_files = list(self.audio_dir.glob(f"*{safe_title}*"))
-                
-                if not downloaded_files:
-                    self._debug_log("File not found with exact title, searching for most recent file...")
-                    # Try finding the most recently created file
-                    all_files = list(self.audio_dir.iterdir())
-                    if all_files:
-                        downloaded_files = [max(all_files, key=lambda x: x.stat().st_mtime)]
-                
-                if downloaded_files:
-                    file_path = downloaded_files[0]
-                    file_size = file_path.stat().st_size / (1024 * 1024)  # Size in MB
-                    self._debug_log(f"Found downloaded file: {file_path}")
-                    self._debug_log(f"File size: {file_size:.2f} MB")
-                    
-                    final_duration = duration if duration > 0 else self._get_duration_from_file(str(file_path))
-                    self._debug_log(f"Final duration: {final_duration//60}:{final_duration%60:02d}")
-                    return {
-                        'title': title,
-                        'duration': final_duration,
-                        'file_path': f'audio/{file_path.name}',
-                        'url': url
-                    }
+                # yt-dlp reports where it wrote the file; only the extension isn't known up front
+                requested = info.get('requested_downloads') or []
+                if requested and requested[0].get('filepath'):
+                    file_path = Path(requested[0]['filepath'])
+                else:
+                    file_path = self._finished_audio(self.audio_stem(url))
+
+                if file_path and file_path.exists():
+                    return self._result(url, file_path, title, duration)
                 
                 self._debug_log("No downloaded file found")
                 return None
                 
             except Exception as e:
                 self._debug_log(f"Error downloading {url}: {str(e)}")
-                return None
\ No newline at end of file
+                return None
@@ -5,11 +5,15 @@ Use this for finding the feeds: https://feedfinder.davidbreder.com/
 """
 import feedparser
 import click
+import requests
 from dotenv import load_dotenv
 
 # Import the new Celery task
-from tasks import analyze_episode
+from tasks import enqueue_analysis
 from database import PodcastDB
+from celery_app import QUEUE_NORMAL
+from http_downloader import HTTP_TIMEOUT_S, USER_AGENT
+from published_transcripts import transcript_links_from_feed
 
 # Load environment variables from .env file
 load_dotenv()
@@ -36,7 +40,15 @@ def process_feeds():
         feed_url = feed['url']
         feed_title = feed.get('title', 'Unknown Feed')
         click.echo(f"\n- Checking feed: {feed_title} ({feed_url})")
-        parsed_feed = feedparser.parse(feed_url)
+        # Fetched once: feedparser drops the attributes of <podcast:transcript>,
+        # so transcript links are read from the same document separately
+        try:
+            response = requests.get(feed_url, timeout=HTTP_TIMEOUT_S, headers={'User-Agent': USER_AGENT})
+            response.raise_for_status()
+        except requests.RequestException as e:
+            click.echo(f"  ❌ Error fetching feed: {e}")
+            continue
+        parsed_feed = feedparser.parse(response.content)
         
         if parsed_feed.bozo:
             click.echo(f"  ❌ Error parsing feed: {parsed_feed.bozo_exception}")
@@ -89,9 +101,13 @@ def process_feeds():
         # Now, create placeholder and queue this episode for processing
         try:
             click.echo("  📝 Creating placeholder in database...")
-            db.create_placeholder(episode_url, episode_title, feed['_id'], feed_title)
+            transcript_links = transcript_links_from_feed(response.content)
+            if transcript_links:
+                click.echo(f"  📜 Published transcript: {', '.join(link['type'] or '?' for link in transcript_links)}")
+            db.create_placeholder(episode_url, episode_title, feed['_id'], feed_title,
+                                  transcript_links=transcript_links)
             click.echo("  ⏳ Queueing episode for analysis...")
-            analyze_episode.delay(episode_url)
+            enqueue_analysis(episode_url, queue=QUEUE_NORMAL)
             click.echo("  👍 Episode successfully queued.")
         except Exception as e:
             click.echo(f"  ❌ Failed to queue episode: {episode_title}")
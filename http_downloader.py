@@ -0,0 +1,293 @@
+"""
+Direct HTTP downloader for plain audio enclosures.
+
+RSS enclosures are ordinary audio files, so they don't need yt-dlp (which
+resolves metadata twice and restarts a dropped download from zero). This
+downloader streams them over a pooled requests session, resumes partial
+files with Range/If-Range requests, and verifies the result against
+Content-Length (plus Content-MD5 / Digest checksums when the server sends
+them) before atomically moving it into place. yt-dlp stays in charge of
+YouTube-style pages.
+
+Download paths derive from the episode URL, so two workers fetching the same
+episode (a prefetch and an analysis retry, a restore and an analysis) would
+share one partial file; each download holds an exclusive lock on its target
+instead, and the second one reuses the file the first one finished.
+"""
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+AUDIO_EXTENSIONS = {'.mp3', '.m4a', '.aac', '.mp4', '.ogg', '.oga', '.opus', '.wav', '.flac', '.webm'}
+
+# Pages that need an extractor rather than a plain GET
+YT_DLP_HOSTS = ('youtube.com', 'youtu.be', 'vimeo.com', 'soundcloud.com', 'twitch.tv', 'dailymotion.com')
+
+CONTENT_TYPE_EXTENSIONS = {
+    'audio/mpeg': '.mp3', 'audio/mp3': '.mp3', 'audio/mp4': '.m4a', 'audio/x-m4a': '.m4a', 'audio/aac': '.aac',
+    'audio/ogg': '.ogg', 'audio/opus': '.opus', 'audio/wav': '.wav', 'audio/x-wav': '.wav', 'audio/flac': '.flac',
+    'audio/webm': '.webm',
+}
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_DOWNLOAD_POOL_SIZE', '10'))
+HTTP_TIMEOUT_S = float(os.getenv('HTTP_DOWNLOAD_TIMEOUT_S', '30'))
+HTTP_CHUNK_BYTES = 1 << 20
+
+# Connection drops resumed from the partial file before giving up
+HTTP_MAX_RESUMES = int(os.getenv('HTTP_DOWNLOAD_MAX_RESUMES', '5'))
+HTTP_RESUME_DELAY_S = 2
+
+USER_AGENT = 'Mozilla/5.0 (compatible; podcast-analyzer/1.0)'
+
+
+class DownloadIntegrityError(RuntimeError):
+    """The downloaded file does not match the size or checksum the server announced."""
+
+
+@contextmanager
+def exclusive_lock(lock_path):
+    """Hold an exclusive lock on `lock_path` across threads and processes.
+
+    Yields True if the lock was held by someone else and had to be waited for.
+    The lock file is removed on release.
+    """
+    lock_path = Path(lock_path)
+    waited = False
+    while True:
+        fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            waited = True
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        # The previous holder may have removed the file while we waited: lock the current one
+        try:
+            if os.fstat(fd).st_ino == os.stat(lock_path).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+    try:
+        yield waited
+    finally:
+        lock_path.unlink(missing_ok=True)
+        os.close(fd)
+
+
+def is_page_url(url):
+    """True for YouTube-style pages that need yt-dlp."""
+    host = (urlparse(url).hostname or '').lower()
+    return any(host == h or host.endswith('.' + h) for h in YT_DLP_HOSTS)
+
+
+def _extension_from_url(url):
+    suffix = Path(unquote(urlparse(url).path)).suffix.lower()
+    return suffix if suffix in AUDIO_EXTENSIONS else None
+
+
+def _extension_from_content_type(content_type):
+    return CONTENT_TYPE_EXTENSIONS.get((content_type or '').split(';')[0].strip().lower())
+
+
+def _expected_digests(headers):
+    """{algorithm: expected hex digest} from Content-MD5 and Digest headers."""
+    digests = {}
+    content_md5 = headers.get('Content-MD5')
+    if content_md5:
+        try:
+            digests['md5'] = base64.b64decode(content_md5).hex()
+        except ValueError:
+            pass
+    for part in (headers.get('Digest') or '').split(','):
+        algorithm, _, value = part.strip().partition('=')
+        name = {'md5': 'md5', 'sha-256': 'sha256'}.get(algorithm.lower())
+        if name and value:
+            try:
+                digests[name] = base64.b64decode(value).hex()
+            except ValueError:
+                pass
+    return digests
+
+
+class EnclosureDownloader:
+    def __init__(self, session=None):
+        self.session = session or self._build_session()
+        self.debug = True
+
+    @staticmethod
+    def _build_session():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    def _debug_log(self, message):
+        """Debug logging with timestamp"""
+        if self.debug:
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] HTTP DOWNLOADER: {message}")
+
+    def is_direct_audio(self, url):
+        """True if `url` is a plain audio file (by extension, else by a HEAD request's Content-Type)."""
+        if urlparse(url).scheme not in ('http', 'https') or is_page_url(url):
+            return False
+        if _extension_from_url(url):
+            return True
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=HTTP_TIMEOUT_S)
+        except requests.RequestException:
+            return False
+        return response.ok and (response.headers.get('Content-Type') or '').startswith('audio/')
+
+    @staticmethod
+    def extension_for(url, content_type=None):
+        """File extension of an enclosure, from its URL or else its Content-Type ('.mp3' if neither tells)."""
+        return _extension_from_url(url) or _extension_from_content_type(content_type) or '.mp3'
+
+    @staticmethod
+    def _state_path(part_path):
+        return part_path.with_name(part_path.name + '.json')
+
+    def _load_state(self, part_path):
+        try:
+            return json.loads(self._state_path(part_path).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, part_path, state):
+        self._state_path(part_path).write_text(json.dumps(state))
+
+    def _discard_partial(self, part_path):
+        part_path.unlink(missing_ok=True)
+        self._state_path(part_path).unlink(missing_ok=True)
+
+    def _request(self, url, part_path, state):
+        """Open a (possibly ranged) GET. Returns (response, append)."""
+        headers = {}
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        validator = state.get('etag') or state.get('last_modified')
+        if offset and validator:
+            headers['Range'] = f'bytes={offset}-'
+            # The server only honours the range if the file is unchanged
+            headers['If-Range'] = validator
+        elif offset:
+            self._discard_partial(part_path)
+
+        response = self.session.get(url, headers=headers, stream=True, timeout=HTTP_TIMEOUT_S, allow_redirects=True)
+        if response.status_code == 416 and offset:
+            # Range past the end: the partial file is already complete (verified below)
+            response.close()
+            return None, True
+        response.raise_for_status()
+
+        if response.status_code == 206:
+            total = response.headers.get('Content-Range', '').rpartition('/')[2]
+            if total.isdigit():
+                state['total'] = int(total)
+            return response, True
+
+        # Full response: new download, or the server ignored/invalidated the range
+        if offset:
+            self._debug_log("Server sent the whole file; restarting download")
+        length = response.headers.get('Content-Length')
+        state.clear()
+        state.update({
+            'total': int(length) if length and length.isdigit() and 'Content-Encoding' not in response.headers else None,
+            'etag': response.headers.get('ETag') if not response.headers.get('ETag', '').startswith('W/') else None,
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_type': response.headers.get('Content-Type'),
+            'digests': _expected_digests(response.headers),
+        })
+        return response, False
+
+    def _verify(self, part_path, state):
+        size = part_path.stat().st_size
+        if state.get('total') is not None and size != state['total']:
+            raise DownloadIntegrityError(f"Expected {state['total']} bytes, got {size}")
+        for algorithm, expected in (state.get('digests') or {}).items():
+            digest = hashlib.new(algorithm)
+            with open(part_path, 'rb') as f:
+                for block in iter(lambda: f.read(HTTP_CHUNK_BYTES), b''):
+                    digest.update(block)
+            if digest.hexdigest() != expected:
+                raise DownloadIntegrityError(f"{algorithm} checksum mismatch")
+
+    def download(self, url, dest_path, throttle=None):
+        """Download `url` to `dest_path`, resuming any partial file left by an earlier attempt.
+
+        `throttle`, if given, is called with the byte count of every chunk
+        written (for bandwidth limiting). Returns {'path', 'bytes',
+        'bytes_transferred', 'resumed', 'etag', 'content_type'}. Concurrent
+        downloads to the same `dest_path` run one at a time.
+        """
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        with exclusive_lock(dest_path.with_name(dest_path.name + '.lock')) as waited:
+            if waited and dest_path.exists():
+                self._debug_log(f"{dest_path.name} was downloaded by a concurrent download; reusing it")
+                return {
+                    'path': dest_path,
+                    'bytes': dest_path.stat().st_size,
+                    'bytes_transferred': 0,
+                    'resumed': False,
+                    'etag': None,
+                    'content_type': None,
+                }
+            return self._download_locked(url, dest_path, throttle)
+
+    def _download_locked(self, url, dest_path, throttle):
+        part_path = dest_path.with_name(dest_path.name + '.part')
+        state = self._load_state(part_path) if part_path.exists() else {}
+        resumed = part_path.exists() and part_path.stat().st_size > 0
+        transferred = 0
+
+        attempt = 0
+        while True:
+            try:
+                response, append = self._request(url, part_path, state)
+                self._save_state(part_path, state)
+                if response is not None:
+                    with response, open(part_path, 'ab' if append else 'wb') as f:
+                        for block in response.iter_content(HTTP_CHUNK_BYTES):
+                            f.write(block)
+                            transferred += len(block)
+                            if throttle:
+                                throttle(len(block))
+                self._verify(part_path, state)
+                break
+            except DownloadIntegrityError:
+                self._discard_partial(part_path)
+                raise
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                attempt += 1
+                if attempt > HTTP_MAX_RESUMES:
+                    raise
+                size = part_path.stat().st_size if part_path.exists() else 0
+                self._debug_log(f"Connection lost at {size / 1e6:.1f} MB ({e}); resuming ({attempt}/{HTTP_MAX_RESUMES})")
+                resumed = True
+                time.sleep(HTTP_RESUME_DELAY_S)
+
+        os.replace(part_path, dest_path)
+        self._state_path(part_path).unlink(missing_ok=True)
+        self._debug_log(f"Downloaded {dest_path.name}: {dest_path.stat().st_size / 1e6:.1f} MB"
+                        + (" (resumed)" if resumed else ""))
+        return {
+            'path': dest_path,
+            'bytes': dest_path.stat().st_size,
+            'bytes_transferred': transferred,
+            'resumed': resumed,
+            'etag': state.get('etag'),
+            'content_type': state.get('content_type'),
+        }
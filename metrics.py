@@ -0,0 +1,127 @@
+"""
+Per-stage resource metrics for the analysis pipeline.
+
+Each pipeline step runs inside a StageMetrics block that records wall time,
+CPU time (including ffmpeg/ffprobe child processes) and peak RSS. Steps add
+their own domain numbers (audio duration, real-time factor, tokens, bytes
+downloaded) and the result is stored on the episode under `metrics.<stage>`.
+"""
+import resource
+import threading
+import time
+
+# How often the RSS sampler reads /proc/self/status while a stage runs
+RSS_SAMPLE_INTERVAL_S = 0.5
+
+# Numeric fields that are aggregated into percentiles
+METRIC_FIELDS = [
+    'wall_time_s', 'cpu_time_s', 'peak_rss_mb', 'audio_duration_s', 'real_time_factor',
+    'input_tokens', 'output_tokens', 'bytes_downloaded',
+]
+
+PERCENTILES = [50, 90, 99]
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (None if /proc is unavailable)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class StageMetrics:
+    """Context manager measuring one pipeline stage."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.data = {}
+        self._peak_rss_mb = 0.0
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def _sample_rss(self):
+        while not self._stop.is_set():
+            rss = current_rss_mb()
+            if rss is not None:
+                self._peak_rss_mb = max(self._peak_rss_mb, rss)
+            self._stop.wait(RSS_SAMPLE_INTERVAL_S)
+
+    def __enter__(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._sampler.join()
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        children_cpu = (
+            (children.ru_utime - self._children_start.ru_utime)
+            + (children.ru_stime - self._children_start.ru_stime)
+        )
+        peak_rss_mb = self._peak_rss_mb
+        if not peak_rss_mb:
+            # No /proc: fall back to the process high-water mark (KB on Linux)
+            peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.data.update({
+            'wall_time_s': round(time.perf_counter() - self._wall_start, 3),
+            'cpu_time_s': round(time.process_time() - self._cpu_start + children_cpu, 3),
+            'peak_rss_mb': round(peak_rss_mb, 1),
+        })
+        return False
+
+    def update(self, **values):
+        """Attach stage-specific values (tokens, audio duration, model, ...)."""
+        self.data.update({k: v for k, v in values.items() if v is not None})
+        if self.data.get('audio_duration_s') and 'wall_time_s' in self.data:
+            self.data['real_time_factor'] = round(self.data['wall_time_s'] / self.data['audio_duration_s'], 4)
+        return self
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def aggregate_metrics(episodes, group_by='feed'):
+    """Aggregate episode metrics into percentiles.
+
+    Returns {group: {stage: {field: {'count', 'p50', 'p90', 'p99'}}}}, where the
+    group is the episode's feed title or the model a stage ran with.
+    """
+    samples = {}
+    for episode in episodes:
+        for stage, stage_metrics in (episode.get('metrics') or {}).items():
+            if group_by == 'model':
+                group = stage_metrics.get('model', 'unknown')
+            else:
+                group = episode.get('feed_title') or 'Manual Submission'
+            fields = samples.setdefault(group, {}).setdefault(stage, {})
+            for field in METRIC_FIELDS:
+                value = stage_metrics.get(field)
+                if isinstance(value, (int, float)):
+                    fields.setdefault(field, []).append(value)
+
+    result = {}
+    for group, stages in samples.items():
+        for stage, fields in stages.items():
+            for field, values in fields.items():
+                summary = {'count': len(values)}
+                for pct in PERCENTILES:
+                    summary[f'p{pct}'] = round(percentile(values, pct), 4)
+                result.setdefault(group, {}).setdefault(stage, {})[field] = summary
+    return result
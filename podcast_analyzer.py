@@ -12,6 +12,8 @@ from dotenv import load_dotenv
 
 # Import the new Celery task
 from tasks import analyze_episode
+from celery_app import QUEUE_HIGH
+from database import PodcastDB
 
 # Load environment variables from .env file
 load_dotenv()
@@ -29,9 +31,13 @@ def analyze(url, force):
     Queue a podcast episode for analysis.
     """
     try:
-        # Instead of calling the function directly, we call '.delay()' to send it to the Celery queue
+        # Instead of calling the function directly, we send it to the Celery queue.
+        # Manual requests go to the high-priority lane so they don't wait behind feed backlog.
         click.echo(f"Queuing episode for analysis: {url}")
-        analyze_episode.delay(url, force)
+        # The pipeline checkpoints each stage onto the episode record, so it must exist first
+        # (no title: the downloaded one is used)
+        PodcastDB().create_placeholder(url)
+        analyze_episode.apply_async(args=[url, force], queue=QUEUE_HIGH)
         click.echo("Episode successfully queued.")
     except Exception as e:
         click.echo(f"An unexpected error occurred while queuing: {e}", err=True)
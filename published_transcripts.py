@@ -0,0 +1,173 @@
+"""
+Published transcripts: use a transcript the publisher already made instead of Whisper.
+
+Podcasting 2.0 feeds link transcripts per episode with <podcast:transcript>
+tags (SRT, WebVTT or JSON), and video pages often carry captions. Both are
+parsed here into the same (start, end, text) segments Whisper produces, so
+the pipeline stores them with a SegmentIndex and continues with cleaning and
+summarization as if the episode had been transcribed. Untimed formats (HTML,
+plain text) are ignored, since the transcript tools need timestamps.
+"""
+import html
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+
+import requests
+
+from http_downloader import HTTP_TIMEOUT_S, USER_AGENT
+
+PUBLISHED_TRANSCRIPTS = os.getenv('PUBLISHED_TRANSCRIPTS', 'true').lower() == 'true'
+
+# Both namespace URIs seen in the wild for the podcast namespace
+PODCAST_NAMESPACES = (
+    'https://podcastindex.org/namespace/1.0',
+    'https://github.com/Podcastindex-org/podcast-namespace/blob/main/docs/1.0.md',
+)
+
+# Timed transcript types, most structured first
+TRANSCRIPT_TYPES = {
+    'application/json': 'json',
+    'text/vtt': 'vtt',
+    'application/x-subrip': 'srt',
+    'application/srt': 'srt',
+    'text/srt': 'srt',
+}
+
+# Word-level JSON segments are merged into sentences up to this length
+JSON_SEGMENT_MAX_CHARS = 300
+
+_TIMESTAMP = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{2})(?:[.,](\d{1,3}))?')
+_TAG = re.compile(r'<[^>]*>')
+
+
+def transcript_links_from_feed(feed_xml, item_index=0):
+    """<podcast:transcript> links of the `item_index`-th item of an RSS document.
+
+    Returns [{'url', 'type', 'language', 'rel'}] (empty if the feed can't be parsed).
+    """
+    try:
+        root = ET.fromstring(feed_xml)
+    except ET.ParseError:
+        return []
+    items = list(root.iter('item'))
+    if item_index >= len(items):
+        return []
+    links = []
+    for namespace in PODCAST_NAMESPACES:
+        for tag in items[item_index].findall(f'{{{namespace}}}transcript'):
+            if tag.get('url'):
+                links.append({
+                    'url': tag.get('url'),
+                    'type': (tag.get('type') or '').split(';')[0].strip().lower(),
+                    'language': (tag.get('language') or '').lower() or None,
+                    'rel': tag.get('rel'),
+                })
+    return links
+
+
+def choose_transcript_link(links, language=None):
+    """Best timed transcript link: matching `language` first, then the most structured type."""
+    timed = [link for link in links or [] if link.get('type') in TRANSCRIPT_TYPES]
+    if not timed:
+        return None
+    order = list(TRANSCRIPT_TYPES)
+
+    def rank(link):
+        link_language = (link.get('language') or '').split('-')[0]
+        return (bool(language) and link_language != language, order.index(link['type']))
+    return min(timed, key=rank)
+
+
+def _seconds(timestamp):
+    match = _TIMESTAMP.match(timestamp.strip())
+    if not match:
+        raise ValueError(f"Bad timestamp: {timestamp!r}")
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int((millis or '0').ljust(3, '0')) / 1000
+
+
+def parse_cues(text):
+    """Segments of an SRT or WebVTT document.
+
+    Markup (<v Speaker>, inline timestamps, styling) is stripped. Lines
+    repeated from the previous cue are dropped, which collapses the rolling
+    two-line cues of automatic video captions into plain text.
+    """
+    segments = []
+    last_line = None
+    for block in re.split(r'\n\s*\n', text.replace('\r\n', '\n').replace('\r', '\n')):
+        lines = block.strip('\n').split('\n')
+        timing = next((i for i, line in enumerate(lines) if '-->' in line), None)
+        if timing is None:
+            # WEBVTT header, NOTE and STYLE blocks
+            continue
+        start, _, end = lines[timing].partition('-->')
+        try:
+            start, end = _seconds(start), _seconds(end.split()[0])
+        except (ValueError, IndexError):
+            continue
+        words = []
+        for line in lines[timing + 1:]:
+            line = html.unescape(_TAG.sub('', line)).strip()
+            if line and line != last_line:
+                words.append(line)
+                last_line = line
+        if words:
+            segments.append((start, end, " ".join(words)))
+    return segments
+
+
+def parse_json_transcript(data):
+    """Segments of a podcast namespace JSON transcript, merged into sentences."""
+    segments = []
+    current = None
+    for item in data.get('segments') or []:
+        body = (item.get('body') or '').strip()
+        if not body:
+            continue
+        start, end = float(item.get('startTime', 0)), float(item.get('endTime', item.get('startTime', 0)))
+        speaker = item.get('speaker')
+        if current and current['speaker'] == speaker and len(current['text']) < JSON_SEGMENT_MAX_CHARS \
+                and not current['text'].endswith(('.', '?', '!')):
+            current['text'] += " " + body
+            current['end'] = end
+            continue
+        if current:
+            segments.append((current['start'], current['end'], current['text']))
+        current = {'start': start, 'end': end, 'text': body, 'speaker': speaker}
+    if current:
+        segments.append((current['start'], current['end'], current['text']))
+    return segments
+
+
+def parse_transcript(content, transcript_type):
+    """Segments of a transcript document of the given TRANSCRIPT_TYPES type."""
+    if TRANSCRIPT_TYPES.get(transcript_type) == 'json':
+        return parse_json_transcript(json.loads(content))
+    return parse_cues(content)
+
+
+def fetch_published_transcript(links, language=None):
+    """Download and parse the best published transcript.
+
+    Returns {'segments', 'url', 'type', 'language'} or None if no timed
+    transcript is linked or it can't be fetched.
+    """
+    link = choose_transcript_link(links, language)
+    if not link:
+        return None
+    try:
+        response = requests.get(link['url'], timeout=HTTP_TIMEOUT_S, headers={'User-Agent': USER_AGENT})
+        response.raise_for_status()
+        if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+            # Transcripts are UTF-8 in practice; requests guesses Latin-1 for text/* without a charset
+            response.encoding = 'utf-8'
+        segments = parse_transcript(response.text, link['type'])
+    except (requests.RequestException, ValueError) as e:
+        print(f"⚠️  [TRANSCRIPT] - Could not use published transcript {link['url']}: {e}")
+        return None
+    if not segments:
+        return None
+    return {'segments': segments, 'url': link['url'], 'type': link['type'], 'language': link.get('language')}
@@ -0,0 +1,176 @@
+"""
+Cluster-wide OpenAI rate limiting backed by Redis.
+
+Every worker draws from the same two token buckets (requests per minute and
+tokens per minute), so adding workers raises throughput up to the provider's
+limit instead of producing more 429s. Requests that still get rate limited
+surface as RateLimitedError, which the Celery tasks retry with exponential
+backoff and jitter, honoring the provider's Retry-After hint.
+"""
+import os
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import redis
+
+REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://redis:6379/0')
+
+# Provider limits for the account/model in use (gpt-4o-mini defaults for tier 1)
+OPENAI_RPM_LIMIT = int(os.getenv('OPENAI_RPM_LIMIT', '500'))
+OPENAI_TPM_LIMIT = int(os.getenv('OPENAI_TPM_LIMIT', '200000'))
+
+# How long a caller blocks waiting for capacity before giving up with
+# RateLimitedError (the task is then retried instead of holding a worker slot).
+RATE_LIMIT_MAX_WAIT_S = float(os.getenv('RATE_LIMIT_MAX_WAIT_S', '120'))
+
+# Backoff for task retries after a rate-limit error
+RETRY_BASE_DELAY_S = float(os.getenv('OPENAI_RETRY_BASE_DELAY_S', '10'))
+RETRY_MAX_DELAY_S = float(os.getenv('OPENAI_RETRY_MAX_DELAY_S', '600'))
+OPENAI_RATE_LIMIT_MAX_RETRIES = int(os.getenv('OPENAI_RATE_LIMIT_MAX_RETRIES', '8'))
+
+# Atomically take `cost` from every bucket, or from none of them.
+# KEYS: bucket keys. ARGV: capacity_1, cost_1, capacity_2, cost_2, ...
+# Buckets refill continuously at capacity per 60 seconds. Returns the number of
+# seconds to wait before retrying ("0" on success) as a string, since Redis
+# truncates Lua numbers to integers.
+_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local wait = 0
+local levels = {}
+for i = 1, #KEYS do
+  local capacity = tonumber(ARGV[2 * i - 1])
+  local cost = tonumber(ARGV[2 * i])
+  local rate = capacity / 60.0
+  local data = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+  local tokens = tonumber(data[1]) or capacity
+  local ts = tonumber(data[2]) or now
+  tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+  levels[i] = tokens
+  if tokens < cost then
+    wait = math.max(wait, (cost - tokens) / rate)
+  end
+end
+if wait > 0 then
+  return tostring(wait)
+end
+for i = 1, #KEYS do
+  redis.call('HSET', KEYS[i], 'tokens', levels[i] - tonumber(ARGV[2 * i]), 'ts', now)
+  redis.call('EXPIRE', KEYS[i], 120)
+end
+return '0'
+"""
+
+
+class RateLimitedError(RuntimeError):
+    """An OpenAI call was rejected (or would be) because of rate limits."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_from_error(error):
+    """Extract the Retry-After hint (seconds) from an OpenAI API error, if any."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            # HTTP-date form
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with jitter, never shorter than the server's Retry-After."""
+    ceiling = min(RETRY_MAX_DELAY_S, RETRY_BASE_DELAY_S * (2 ** attempt))
+    # "Equal jitter": keep half of the exponential delay, randomize the rest
+    delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+    if retry_after:
+        delay = max(delay, retry_after + random.uniform(0, 1))
+    return int(delay) + 1
+
+
+def estimate_tokens(messages, max_tokens):
+    """Rough token cost of a chat request (1 token ≈ 4 characters) plus its output budget."""
+    prompt_chars = sum(len(str(m.get('content', ''))) for m in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+class OpenAIRateLimiter:
+    def __init__(self, redis_url=REDIS_URL, rpm=OPENAI_RPM_LIMIT, tpm=OPENAI_TPM_LIMIT,
+                 prefix='ratelimit:openai'):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests_key = f"{prefix}:requests"
+        self.tokens_key = f"{prefix}:tokens"
+        self.debug = True
+        self.redis = redis.Redis.from_url(redis_url)
+        self._acquire_script = self.redis.register_script(_ACQUIRE_LUA)
+
+    def _debug_log(self, message):
+        """Debug logging with timestamp"""
+        if self.debug:
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] RATE LIMITER: {message}")
+
+    def acquire(self, tokens, max_wait=RATE_LIMIT_MAX_WAIT_S):
+        """Block until one request and `tokens` tokens are available cluster-wide.
+
+        Raises RateLimitedError if capacity doesn't free up within `max_wait`.
+        If Redis is unreachable the call is let through (fail open).
+        """
+        # A single request larger than the whole bucket could never be admitted
+        tokens = min(tokens, self.tpm)
+        deadline = time.time() + max_wait
+        while True:
+            try:
+                wait = float(self._acquire_script(
+                    keys=[self.requests_key, self.tokens_key],
+                    args=[self.rpm, 1, self.tpm, tokens],
+                ))
+            except redis.RedisError as e:
+                self._debug_log(f"⚠️  Redis unavailable, skipping rate limiting: {e}")
+                return
+            if wait <= 0:
+                return
+            if time.time() + wait > deadline:
+                raise RateLimitedError(
+                    f"OpenAI rate limit budget exhausted (need {tokens} tokens)", retry_after=wait
+                )
+            self._debug_log(f"⏳ Waiting {wait:.1f}s for OpenAI capacity ({tokens} tokens)")
+            time.sleep(wait)
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        """Return over-estimated tokens to the bucket (or charge the shortfall)."""
+        delta = min(estimated_tokens, self.tpm) - actual_tokens
+        if not delta:
+            return
+        try:
+            # An expired bucket is already full; don't recreate it half-empty
+            if self.redis.exists(self.tokens_key):
+                self.redis.hincrbyfloat(self.tokens_key, 'tokens', delta)
+        except redis.RedisError:
+            pass
+
+
+_limiter = None
+
+
+def get_openai_limiter():
+    """Process-wide limiter instance (shares one Redis connection pool)."""
+    global _limiter
+    if _limiter is None:
+        _limiter = OpenAIRateLimiter()
+    return _limiter
@@ -19,6 +19,7 @@ load_dotenv()
 from feed_processor import process_feeds
 from init_feeds import init_default_feeds
 from database import PodcastDB
+from storage_manager import STORAGE_MANAGEMENT
 
 # Configuration
 FEEDER_INTERVAL_MINUTES = int(os.getenv('FEEDER_INTERVAL_MINUTES', '60'))
@@ -44,6 +45,11 @@ def scheduled_feed_processing():
         # Mark as completed successfully
         db.update_feeder_status(is_running=False, status='success')
         log_message("✅ Feed processing completed successfully")
+        if STORAGE_MANAGEMENT:
+            # Plays since the last run may have changed what to archive or evict
+            from tasks import enforce_storage_quota
+            from celery_app import QUEUE_LOW
+            enforce_storage_quota.apply_async(queue=QUEUE_LOW)
     except Exception as e:
         # Mark as failed
         db.update_feeder_status(is_running=False, status='failed', error_message=str(e))
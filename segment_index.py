@@ -0,0 +1,111 @@
+"""
+Compact, columnar index of transcript segment timestamps.
+
+Segments are stored as three packed arrays instead of a list of
+{start, end, text} objects: float32 start and end times (seconds) and
+uint32 character offsets of each segment into the raw transcript, which
+is the segment texts joined with single spaces. The index costs 12 bytes
+per segment and answers both "what is said at time T" and "when is
+character N said" with a binary search.
+"""
+import sys
+from array import array
+from bisect import bisect_right
+
+from bson.binary import Binary
+
+# Bumped whenever the stored layout changes
+INDEX_VERSION = 1
+
+
+def _pack(values):
+    """Array bytes in little-endian order, independent of the host."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return Binary(values.tobytes())
+
+
+def _unpack(typecode, data):
+    values = array(typecode)
+    values.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class SegmentIndex:
+    def __init__(self, starts, ends, offsets, text):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.text = text
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Build the index from (start, end, text) segments in time order.
+
+        The transcript text is the segment texts joined with a space, exactly
+        as the transcriber joins them.
+        """
+        starts, ends, offsets = array('f'), array('f'), array('I')
+        texts = []
+        position = 0
+        for start, end, text in segments:
+            starts.append(start)
+            ends.append(end)
+            offsets.append(position)
+            texts.append(text)
+            position += len(text) + 1
+        return cls(starts, ends, offsets, " ".join(texts))
+
+    @classmethod
+    def from_document(cls, document, text):
+        """Load an index stored on an episode; `text` is the episode's raw transcript."""
+        if not document or document.get('version') != INDEX_VERSION:
+            return None
+        return cls(
+            _unpack('f', document['starts']),
+            _unpack('f', document['ends']),
+            _unpack('I', document['offsets']),
+            text,
+        )
+
+    def to_document(self):
+        """MongoDB representation (the text itself is stored as raw_transcript)."""
+        return {
+            'version': INDEX_VERSION,
+            'count': len(self),
+            'starts': _pack(self.starts),
+            'ends': _pack(self.ends),
+            'offsets': _pack(self.offsets),
+        }
+
+    def segment(self, i):
+        """Segment i as {'index', 'start', 'end', 'offset', 'text'}."""
+        offset = self.offsets[i]
+        text_end = self.offsets[i + 1] - 1 if i + 1 < len(self) else len(self.text)
+        return {
+            'index': i,
+            'start': round(self.starts[i], 2),
+            'end': round(self.ends[i], 2),
+            'offset': offset,
+            'text': self.text[offset:text_end],
+        }
+
+    def segment_at_time(self, seconds):
+        """Segment being spoken at `seconds` (the last one starting at or before it)."""
+        if not len(self):
+            return None
+        i = max(0, bisect_right(self.starts, seconds) - 1)
+        return self.segment(i)
+
+    def segment_at_offset(self, offset):
+        """Segment containing character `offset` of the transcript."""
+        if not len(self):
+            return None
+        i = max(0, bisect_right(self.offsets, offset) - 1)
+        return self.segment(i)
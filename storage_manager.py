@@ -0,0 +1,211 @@
+"""
+Audio storage management: tiering, a disk quota and least-recently-played eviction.
+
+Audio of analyzed episodes is kept for web playback, so data/audio would
+otherwise grow without bound. Each run of the storage manager:
+
+1. keeps episodes added or played within AUDIO_FULL_QUALITY_DAYS as they are;
+2. transcodes older ones to low-bitrate mono Opus ("archived") and drops
+   their 16 kHz transcription copy, which only transcription needs. At most
+   AUDIO_ARCHIVE_MAX_PER_RUN are transcoded per run, so a backlog is worked
+   off over several runs instead of tying up a worker;
+3. if audio still exceeds AUDIO_QUOTA_GB, deletes the audio of the least
+   recently played episodes ("evicted") until usage is back under the quota.
+
+Evicted audio is re-fetched from the episode's original URL on demand.
+Only completed episodes are touched; audio of queued or running analyses is
+never archived or evicted. Both tiering and the quota are opt-in (off by default).
+"""
+import os
+import subprocess
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from audio_ingest import PLAYBACK_SUFFIX, TRANSCRIPTION_SUFFIX
+
+AUDIO_QUOTA_GB = float(os.getenv('AUDIO_QUOTA_GB', '0'))  # 0 = no quota
+AUDIO_FULL_QUALITY_DAYS = int(os.getenv('AUDIO_FULL_QUALITY_DAYS', '0'))  # 0 = never archive
+AUDIO_ARCHIVE_BITRATE = os.getenv('AUDIO_ARCHIVE_BITRATE', '24k')
+AUDIO_ARCHIVE_MAX_PER_RUN = int(os.getenv('AUDIO_ARCHIVE_MAX_PER_RUN', '20'))
+
+STORAGE_MANAGEMENT = AUDIO_QUOTA_GB > 0 or AUDIO_FULL_QUALITY_DAYS > 0
+
+ARCHIVE_SUFFIX = '.archive'
+TIER_FULL = 'full'
+TIER_ARCHIVED = 'archived'
+TIER_EVICTED = 'evicted'
+
+# A run still marked as running after this long is assumed dead
+STORAGE_RUN_STALE_S = 6 * 3600
+
+
+class StorageManager:
+    def __init__(self, db, data_dir="data"):
+        self.db = db
+        self.data_dir = Path(data_dir)
+        self.quota_bytes = int(AUDIO_QUOTA_GB * 1024 ** 3)
+        self.debug = True
+
+    def _debug_log(self, message):
+        """Debug logging with timestamp"""
+        if self.debug:
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] STORAGE: {message}")
+
+    def _audio_files(self, episode):
+        """Paths of the episode's audio files that exist on disk."""
+        paths = []
+        for key in ('file_path', 'transcription_file_path'):
+            if episode.get(key) and (self.data_dir / episode[key]).is_file():
+                paths.append(self.data_dir / episode[key])
+        return paths
+
+    def _episode_bytes(self, episode):
+        return sum(path.stat().st_size for path in self._audio_files(episode))
+
+    @staticmethod
+    def _last_used(episode):
+        """When the episode's audio was last needed: its last play, else when it was added."""
+        return episode.get('last_played_at') or episode.get('created_at') or datetime.min
+
+    def usage(self, episodes=None):
+        """Disk usage of episode audio: {'total_bytes', 'quota_bytes', 'episodes': {tier: count}}."""
+        if episodes is None:
+            episodes = self.db.list_stored_audio()
+        tiers = {TIER_FULL: 0, TIER_ARCHIVED: 0}
+        total = 0
+        for episode in episodes:
+            total += self._episode_bytes(episode)
+            tier = episode.get('audio_tier') or TIER_FULL
+            tiers[tier] = tiers.get(tier, 0) + 1
+        tiers[TIER_EVICTED] = self.db.count_evicted_audio()
+        return {'total_bytes': total, 'quota_bytes': self.quota_bytes or None, 'episodes': tiers}
+
+    def archive(self, episode):
+        """Transcode the episode's playback audio to low-bitrate Opus. Returns the bytes freed."""
+        source = self.data_dir / episode['file_path']
+        if not source.is_file():
+            return 0
+        # Only the known suffixes are stripped: legacy titles may contain dots ("Ep. 12 Foo.mp3")
+        stem = source.stem
+        for suffix in (TRANSCRIPTION_SUFFIX, PLAYBACK_SUFFIX, ARCHIVE_SUFFIX):
+            if stem.endswith(suffix):
+                stem = stem[:-len(suffix)]
+        target = source.with_name(f"{stem}{ARCHIVE_SUFFIX}.opus")
+        temp = target.with_name(f"{target.stem}.tmp{target.suffix}")
+        before = self._episode_bytes(episode)
+        try:
+            subprocess.run(
+                ['ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-y', '-i', str(source), '-vn',
+                 '-map', '0:a:0', '-ac', '1', '-c:a', 'libopus', '-b:a', AUDIO_ARCHIVE_BITRATE,
+                 '-application', 'voip', str(temp)],
+                capture_output=True, text=True, check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            temp.unlink(missing_ok=True)
+            self._debug_log(f"⚠️  Could not archive {source.name}: {e.stderr.strip()}")
+            return 0
+        os.replace(temp, target)
+
+        file_path = str(target.relative_to(self.data_dir))
+        self.db.update_episode(episode['url'], {
+            'file_path': file_path,
+            'transcription_file_path': None,
+            'audio_tier': TIER_ARCHIVED,
+            'audio_archived_at': datetime.utcnow(),
+        })
+        for path in self._audio_files(episode):
+            if path != target:
+                path.unlink(missing_ok=True)
+        freed = before - target.stat().st_size
+        self._debug_log(f"📦 Archived {episode.get('title') or episode['url']} ({freed / 1e6:.1f} MB freed)")
+        return freed
+
+    def evict(self, episode):
+        """Delete the episode's audio (it can be re-fetched from its URL). Returns the bytes freed."""
+        freed = self._episode_bytes(episode)
+        self.db.update_episode(episode['url'], {
+            'file_path': None,
+            'transcription_file_path': None,
+            'audio_tier': TIER_EVICTED,
+            'audio_evicted_at': datetime.utcnow(),
+        })
+        for path in self._audio_files(episode):
+            path.unlink(missing_ok=True)
+        self._debug_log(f"🗑️  Evicted {episode.get('title') or episode['url']} ({freed / 1e6:.1f} MB freed)")
+        return freed
+
+    def enforce(self):
+        """Archive old audio and evict least-recently-played audio over the quota.
+
+        Returns the run's stats, or None if another run is in progress.
+        """
+        if not self.db.try_start_storage_run(STORAGE_RUN_STALE_S):
+            self._debug_log("Another storage run is in progress, skipping")
+            return None
+
+        stats = {'archived': 0, 'evicted': 0, 'bytes_freed': 0}
+        try:
+            # Oldest first: archive and eviction both go least recently used first
+            episodes = sorted(
+                (e for e in self.db.list_stored_audio() if e.get('status') == 'completed'),
+                key=self._last_used,
+            )
+            if AUDIO_FULL_QUALITY_DAYS > 0:
+                cutoff = datetime.utcnow() - timedelta(days=AUDIO_FULL_QUALITY_DAYS)
+                transcodes = 0
+                for episode in episodes:
+                    if self._last_used(episode) >= cutoff:
+                        break
+                    if episode.get('audio_tier') != TIER_ARCHIVED:
+                        if transcodes >= AUDIO_ARCHIVE_MAX_PER_RUN:
+                            self._debug_log(f"Transcoded {transcodes} episodes; the rest waits for the next run")
+                            break
+                        transcodes += 1
+                        freed = self.archive(episode)
+                        if freed:
+                            stats['archived'] += 1
+                            stats['bytes_freed'] += freed
+
+            usage = self.usage()
+            if self.quota_bytes and usage['total_bytes'] > self.quota_bytes:
+                excess = usage['total_bytes'] - self.quota_bytes
+                # Re-read: archiving changed paths and sizes
+                episodes = sorted(
+                    (e for e in self.db.list_stored_audio() if e.get('status') == 'completed'),
+                    key=self._last_used,
+                )
+                for episode in episodes:
+                    if excess <= 0:
+                        break
+                    freed = self.evict(episode)
+                    stats['evicted'] += 1
+                    stats['bytes_freed'] += freed
+                    excess -= freed
+                usage = self.usage()
+                if excess > 0:
+                    self._debug_log(f"⚠️  Still {excess / 1e6:.0f} MB over quota (remaining audio is in use)")
+            stats['usage'] = usage
+        finally:
+            self.db.update_storage_status({'last_run': stats})
+        self._debug_log(f"Run done: {stats['archived']} archived, {stats['evicted']} evicted, "
+                        f"{stats['bytes_freed'] / 1e6:.1f} MB freed")
+        return stats
+
+    def restore(self, url, downloader):
+        """Re-fetch evicted audio from the episode's original URL. Returns the new file_path."""
+        episode = self.db.get_episode(url)
+        if episode and episode.get('file_path') and (self.data_dir / episode['file_path']).is_file():
+            return episode['file_path']
+        result = downloader.download(url, title=(episode or {}).get('title') or None)
+        if not result:
+            raise RuntimeError(f"Could not re-fetch audio for {url}")
+        self.db.update_episode(url, {
+            'file_path': result['file_path'],
+            'audio_tier': TIER_FULL,
+            'audio_restored_at': datetime.utcnow(),
+            # A restore is a request to play, so the audio isn't evicted again right away
+            'last_played_at': datetime.utcnow(),
+        })
+        self._debug_log(f"♻️  Restored audio of {url}: {result['file_path']}")
+        return result['file_path']
@@ -6,6 +6,12 @@ import os
 from datetime import datetime
 from langfuse.openai import openai  # Langfuse OpenAI wrapper for automatic tracing
 from langfuse import Langfuse, observe
+from rate_limiter import RateLimitedError, estimate_tokens, get_openai_limiter, retry_after_from_error
+
+# OpenAI request settings for summaries (shared with batch re-summarization)
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_TEMPERATURE = 0.7
+SUMMARY_MAX_TOKENS = 2000
 
 # Map category keys to Langfuse prompt names
 CATEGORY_PROMPT_MAP = {
@@ -28,6 +34,8 @@ CATEGORY_DISPLAY_NAMES = {
 class PodcastSummarizer:
     def __init__(self):
         self.debug = True
+        # Token usage of the most recent OpenAI call (read by the pipeline metrics)
+        self.last_usage = {}
         # Langfuse OpenAI wrapper is automatically configured via env vars
         # No manual OpenAI client initialization needed
 
@@ -54,21 +62,18 @@ class PodcastSummarizer:
         """Generate summary from transcript using OpenAI API with Langfuse Chat Prompt Management"""
         return self._internal_summarize(transcript, title, custom_instructions, category)
 
-    def _internal_summarize(self, transcript, title="Podcast Episode", custom_instructions="", category=""):
-        """Core summarization logic shared by both methods"""
-        self._debug_log(f"Starting summarization for: {title}")
-        self._debug_log(f"Transcript length: {len(transcript)} characters, {len(transcript.split())} words")
+    def build_messages(self, transcript, title="Podcast Episode", custom_instructions="", category=""):
+        """Build the chat messages for a summary request.
 
+        Returns (messages, langfuse_prompt, prompt_name); langfuse_prompt is None
+        when the hardcoded fallback prompt was used.
+        """
         # Resolve category to prompt name
         category_key = (category or '').strip().lower()
         prompt_name = CATEGORY_PROMPT_MAP.get(category_key, 'podcast-summarization')
         category_display = CATEGORY_DISPLAY_NAMES.get(category_key, 'General')
         self._debug_log(f"📂 Category: [{category_display}] → prompt: {prompt_name}")
 
-        # Calculate estimated tokens (rough approximation: 1 token ≈ 4 characters)
-        estimated_input_tokens = len(transcript) // 4
-        self._debug_log(f"Estimated input tokens: ~{estimated_input_tokens}")
-
         # Get chat prompt from Langfuse Prompt Management
         messages = []
         langfuse_prompt = None  # For linking prompt to observation
@@ -212,20 +217,38 @@ Here is the transcript:
                 }
             ]
 
+        return messages, langfuse_prompt, prompt_name
+
+    def _internal_summarize(self, transcript, title="Podcast Episode", custom_instructions="", category=""):
+        """Core summarization logic shared by both methods"""
+        self._debug_log(f"Starting summarization for: {title}")
+        self._debug_log(f"Transcript length: {len(transcript)} characters, {len(transcript.split())} words")
+
+        # Calculate estimated tokens (rough approximation: 1 token ≈ 4 characters)
+        estimated_input_tokens = len(transcript) // 4
+        self._debug_log(f"Estimated input tokens: ~{estimated_input_tokens}")
+
+        messages, langfuse_prompt, prompt_name = self.build_messages(transcript, title, custom_instructions, category)
+
         try:
             self._debug_log("🚀 Sending request to OpenAI API...")
-            self._debug_log("📡 Model: gpt-4o-mini (fast & free)")
-            self._debug_log("⚙️  Temperature: 0.7 (balanced creativity)")
-            self._debug_log("📝 Max output tokens: 2000")
+            self._debug_log(f"📡 Model: {SUMMARY_MODEL} (fast & free)")
+            self._debug_log(f"⚙️  Temperature: {SUMMARY_TEMPERATURE} (balanced creativity)")
+            self._debug_log(f"📝 Max output tokens: {SUMMARY_MAX_TOKENS}")
+
+            # Wait for cluster-wide capacity (requests/min and tokens/min)
+            limiter = get_openai_limiter()
+            estimated_tokens = estimate_tokens(messages, SUMMARY_MAX_TOKENS)
+            limiter.acquire(estimated_tokens)
 
             start_time = time.time()
 
             # Use Langfuse OpenAI wrapper (automatic tracing + prompt linking)
             response = openai.chat.completions.create(
-                model="gpt-4o-mini",
+                model=SUMMARY_MODEL,
                 messages=messages,
-                temperature=0.7,
-                max_tokens=2000,
+                temperature=SUMMARY_TEMPERATURE,
+                max_tokens=SUMMARY_MAX_TOKENS,
                 langfuse_prompt=langfuse_prompt  # Links chat prompt to observation
             )
 
@@ -240,6 +263,12 @@ Here is the transcript:
             input_tokens = usage.prompt_tokens
             output_tokens = usage.completion_tokens
             total_tokens = usage.total_tokens
+            limiter.reconcile(estimated_tokens, total_tokens)
+            self.last_usage = {
+                'model': response.model,
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+            }
 
             self._debug_log(f"✅ OpenAI summarization completed in {elapsed:.2f}s")
             self._debug_log(f"📊 Token usage: {input_tokens} input + {output_tokens} output = {total_tokens} total")
@@ -251,6 +280,12 @@ Here is the transcript:
 
             return summary
 
+        except RateLimitedError:
+            raise
+        except openai.RateLimitError as e:
+            retry_after = retry_after_from_error(e)
+            self._debug_log(f"⏳ OpenAI rate limit hit during summarization (retry after: {retry_after}s)")
+            raise RateLimitedError(f"OpenAI rate limit during summarization: {str(e)}", retry_after=retry_after)
         except Exception as e:
             self._debug_log(f"❌ Error with OpenAI summarization: {str(e)}")
             raise RuntimeError(f"Failed to generate summary with OpenAI: {str(e)}")
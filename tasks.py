@@ -1,14 +1,32 @@
+import hashlib
 import os
+import random
+import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from celery_app import celery_app
+from celery import chord, current_task
+from celery_app import celery_app, QUEUE_DOWNLOAD, QUEUE_LOW, QUEUE_NORMAL
 from downloader import PodcastDownloader
-from transcriber import AudioTranscriber
+from download_manager import DOWNLOAD_SLOT_MAX_WAIT_S, DownloadSlotTimeout, get_download_manager
+from http_downloader import is_page_url
+from published_transcripts import PUBLISHED_TRANSCRIPTS, fetch_published_transcript, parse_cues
+from audio_fingerprint import (
+    FINGERPRINT_DEDUP, SAMPLE_RATE as FINGERPRINT_SAMPLE_RATE, Fingerprinter, codes_from_document,
+    find_duplicate, fingerprint_file, to_document,
+)
+from audio_ingest import AudioIngestor, INGEST_TRANSCODE
+from audio_probe import probe_audio, probe_duration
+from transcriber import AudioTranscriber, select_profile
+from segment_index import SegmentIndex
 from cleaner import TranscriptCleaner
 from summarizer import PodcastSummarizer
-from database import PodcastDB
+from database import PodcastDB, PIPELINE_STAGES
+from metrics import StageMetrics
+from storage_manager import StorageManager, STORAGE_MANAGEMENT
 from langfuse import Langfuse, observe
+from rate_limiter import RateLimitedError, backoff_delay, OPENAI_RATE_LIMIT_MAX_RETRIES
 
 # Create data directories
 DATA_DIR = Path("data")
@@ -16,6 +34,37 @@ AUDIO_DIR = DATA_DIR / "audio"
 TRANSCRIPTS_DIR = DATA_DIR / "transcripts"
 SUMMARIES_DIR = DATA_DIR / "summaries"
 
+# Automatic retries of a failed analysis. Each retry resumes from the last
+# checkpointed stage; the delay doubles with every attempt.
+ANALYZE_MAX_RETRIES = int(os.getenv('ANALYZE_MAX_RETRIES', '2'))
+ANALYZE_RETRY_DELAY_S = int(os.getenv('ANALYZE_RETRY_DELAY_S', '60'))
+
+# Streaming mode: clean transcript pieces while transcription is still running.
+# STREAMING_CLEAN_WORKERS caps concurrent cleaning calls per episode.
+STREAMING_PIPELINE = os.getenv('STREAMING_PIPELINE', 'false').lower() == 'true'
+STREAMING_CLEAN_WORKERS = int(os.getenv('STREAMING_CLEAN_WORKERS', '3'))
+
+# Distributed mode: episodes at least this long are split into chunks on the
+# shared data volume and transcribed as a Celery chord across all workers.
+DISTRIBUTED_TRANSCRIPTION = os.getenv('DISTRIBUTED_TRANSCRIPTION', 'false').lower() == 'true'
+DISTRIBUTED_MIN_DURATION_S = int(os.getenv('DISTRIBUTED_MIN_DURATION_S', '5400'))
+CHUNKS_DIR = DATA_DIR / "chunks"
+
+# Prefetch: new episodes are downloaded on the download queue first and only
+# then handed to the analysis lane, so transcription workers never wait on
+# the network. PREFETCH_MAX_RETRIES bounds retries of a failed prefetch before
+# the analysis is enqueued anyway (and downloads the audio itself). A prefetch
+# that finds every download slot taken doesn't wait on a download thread: it is
+# re-queued after about PREFETCH_SLOT_RETRY_S, without using up its retries.
+PREFETCH_DOWNLOADS = os.getenv('PREFETCH_DOWNLOADS', 'true').lower() == 'true'
+PREFETCH_MAX_RETRIES = int(os.getenv('PREFETCH_MAX_RETRIES', '2'))
+PREFETCH_RETRY_DELAY_S = int(os.getenv('PREFETCH_RETRY_DELAY_S', '120'))
+PREFETCH_SLOT_RETRY_S = int(os.getenv('PREFETCH_SLOT_RETRY_S', '30'))
+
+# Retries of a batch re-summarization step after an error (a failed poll, the
+# network) before its job is marked failed; a failed job can still be resumed
+BATCH_MAX_RETRIES = int(os.getenv('BATCH_RESUMMARIZE_MAX_RETRIES', '10'))
+
 def setup_directories():
     """Ensure data directories exist."""
     AUDIO_DIR.mkdir(parents=True, exist_ok=True)
@@ -23,16 +72,418 @@ def setup_directories():
     SUMMARIES_DIR.mkdir(parents=True, exist_ok=True)
 
 
-@celery_app.task(bind=True)
+@celery_app.task(bind=True, max_retries=ANALYZE_MAX_RETRIES)
 @observe(name="podcast_episode_analysis")
-def analyze_episode(self, url, force=False):
+def analyze_episode(self, url, force=False, rate_limit_retries=0):
     """
     Main function to process a single podcast episode.
     Uses lightweight Langfuse tracing with per-episode sessions.
+
+    Failed runs are re-enqueued automatically (up to ANALYZE_MAX_RETRIES) and
+    resume from the last completed stage instead of starting over. Rate-limit
+    retries (`rate_limit_retries` so far) have their own, larger budget and
+    don't use up ANALYZE_MAX_RETRIES.
+    """
+    # Follow-up work (chunk subtasks, resumption) stays in the lane this run came from
+    queue = (self.request.delivery_info or {}).get('routing_key') or QUEUE_NORMAL
+    failures = self.request.retries - rate_limit_retries
+    try:
+        return _analyze_episode_with_tracing(url, force, queue=queue)
+    except RateLimitedError as e:
+        # Rate limits are transient: back off (honoring Retry-After) with a larger retry budget
+        if rate_limit_retries >= OPENAI_RATE_LIMIT_MAX_RETRIES:
+            raise
+        countdown = backoff_delay(rate_limit_retries, e.retry_after)
+        print(f"⏳ [TASK RATE LIMITED] - Retrying {url} in {countdown}s")
+        PodcastDB().update_episode_status(url, 'pending', error_message=str(e))
+        # Budgets are enforced here, per kind of retry, not by Celery's shared counter
+        raise self.retry(exc=e, args=[url], kwargs={'force': False, 'rate_limit_retries': rate_limit_retries + 1},
+                         countdown=countdown, max_retries=None)
+    except Exception as e:
+        if failures >= self.max_retries:
+            raise
+        countdown = ANALYZE_RETRY_DELAY_S * (2 ** failures)
+        print(f"🔁 [TASK RETRY] - Retrying {url} in {countdown}s (attempt {failures + 1}/{self.max_retries})")
+        PodcastDB().update_episode_status(url, 'pending', error_message=str(e))
+        # Never force on retry: the checkpoints written by this run must be reused
+        raise self.retry(exc=e, args=[url], kwargs={'force': False, 'rate_limit_retries': rate_limit_retries},
+                         countdown=countdown, max_retries=None)
+
+def enqueue_analysis(url, queue=QUEUE_NORMAL):
+    """Queue an episode for analysis in `queue`, prefetching its audio first when enabled."""
+    if PREFETCH_DOWNLOADS:
+        prefetch_audio.apply_async(args=[url], kwargs={'queue': queue}, queue=QUEUE_DOWNLOAD)
+    else:
+        analyze_episode.apply_async(args=[url], queue=queue)
+
+@celery_app.task(bind=True, max_retries=None)
+def prefetch_audio(self, url, queue=QUEUE_NORMAL, failures=0, transcript_checked=False):
+    """
+    Download an episode's audio on the download queue, then enqueue its analysis
+    in `queue`. The analysis finds the 'downloaded' checkpoint and goes straight
+    to transcription. If the prefetch keeps failing (`failures` counts the
+    attempts that did), the analysis is enqueued anyway and downloads the audio
+    itself (with its own retries). Busy download slots are not a failure; the
+    retry then skips the published transcript lookup already done.
+    """
+    db = PodcastDB()
+    episode = db.get_episode(url)
+    if episode and episode.get('status') != 'completed' and not _has_downloaded_audio(episode) \
+            and 'transcribed' not in episode.get('stages', {}):
+        try:
+            setup_directories()
+            downloader = PodcastDownloader(str(AUDIO_DIR))
+            if PUBLISHED_TRANSCRIPTS and not transcript_checked \
+                    and _use_published_transcript(db, url, episode, downloader):
+                print(f"📥 [PREFETCH] - Published transcript ready, no audio needed: {url}")
+            else:
+                _download_episode(db, url, episode, downloader, max_wait=0)
+                print(f"📥 [PREFETCH] - Audio ready: {url}")
+        except DownloadSlotTimeout as e:
+            # Contention, not failure: try again later and free this thread meanwhile
+            countdown = PREFETCH_SLOT_RETRY_S + random.uniform(0, PREFETCH_SLOT_RETRY_S)
+            print(f"⏳ [PREFETCH] - {e}; re-queued in {countdown:.0f}s")
+            raise self.retry(exc=e, countdown=countdown,
+                             kwargs={'queue': queue, 'failures': failures, 'transcript_checked': True})
+        except Exception as e:
+            if failures < PREFETCH_MAX_RETRIES:
+                countdown = PREFETCH_RETRY_DELAY_S * (2 ** failures)
+                print(f"🔁 [PREFETCH] - Retrying {url} in {countdown}s: {e}")
+                raise self.retry(exc=e, countdown=countdown, kwargs={
+                    'queue': queue, 'failures': failures + 1, 'transcript_checked': transcript_checked,
+                })
+            print(f"⚠️  [PREFETCH] - Giving up, the analysis will download the audio: {e}")
+    analyze_episode.apply_async(args=[url], queue=queue)
+    return {"status": "prefetched", "url": url}
+
+def _episode_from_checkpoint(episode):
+    """Rebuild the in-flight episode data from a stored episode."""
+    episode_data = {
+        'url': episode['url'],
+        'title': episode.get('title', ''),
+        'duration': episode.get('duration', 0),
+        'file_path': episode.get('file_path'),
+    }
+    if episode.get('transcription_file_path'):
+        episode_data['transcription_file_path'] = episode['transcription_file_path']
+    if episode.get('audio_info'):
+        episode_data['audio_info'] = episode['audio_info']
+    if episode.get('feed_id'):
+        episode_data['feed_id'] = episode['feed_id']
+    if episode.get('feed_title'):
+        episode_data['feed_title'] = episode['feed_title']
+    return episode_data
+
+def _has_downloaded_audio(episode):
+    """True if the episode's download is checkpointed and its audio file is still on disk."""
+    stages = (episode or {}).get('stages', {})
+    return 'downloaded' in stages and bool(episode.get('file_path')) and (DATA_DIR / episode['file_path']).exists()
+
+def _download_episode(db, url, episode, downloader, max_wait=DOWNLOAD_SLOT_MAX_WAIT_S):
+    """Download the episode's audio and checkpoint it. Returns the in-flight episode data.
+
+    Raises DownloadSlotTimeout if no download slot frees up within `max_wait` seconds.
+    """
+    # Get the original metadata from placeholder before download
+    original_title = episode.get('title', '') if episode else ''
+    original_feed_id = episode.get('feed_id') if episode else None
+    original_feed_title = episode.get('feed_title', '') if episode else ''
+
+    with StageMetrics('download') as download_metrics:
+        episode_data = downloader.download(url, title=original_title or None, max_wait=max_wait)
+    if not episode_data:
+        raise RuntimeError("Failed to download episode")
+    download_metrics.update(bytes_downloaded=episode_data.get('file_size'))
+    db.record_stage_metrics(url, 'download', download_metrics.data)
+
+    # Preserve the original RSS metadata if it exists (don't use the downloaded file's metadata)
+    if original_title:
+        episode_data['title'] = original_title
+    if original_feed_id:
+        episode_data['feed_id'] = original_feed_id
+    if original_feed_title:
+        episode_data['feed_title'] = original_feed_title
+
+    db.save_stage(url, 'downloaded', {
+        'title': episode_data['title'],
+        'duration': episode_data.get('duration', 0),
+        'file_path': episode_data['file_path'],
+        'audio_info': episode_data.get('audio_info'),
+    })
+    return episode_data
+
+def _use_published_transcript(db, url, episode, downloader):
+    """Checkpoint a transcript published with the episode (feed transcript or video captions).
+
+    Returns True if one was found, so neither the audio nor Whisper is needed.
+    """
+    episode = episode or {}
+    language = None
+    if episode.get('feed_id'):
+        feed = db.get_feed_by_id(str(episode['feed_id']))
+        language = (feed or {}).get('language') or None
+
+    with StageMetrics('transcribe') as transcribe_metrics:
+        published = fetch_published_transcript(episode.get('transcript_links'), language)
+        if published:
+            source, segments, duration = 'published', published['segments'], 0
+            language = published['language'] or language
+        elif is_page_url(url):
+            captions = downloader.fetch_captions(url, language)
+            if not captions:
+                return False
+            source, segments, duration = 'captions', parse_cues(captions['text']), captions['duration']
+            language = captions['language']
+        else:
+            return False
+    if not segments:
+        return False
+
+    index = SegmentIndex.from_segments(segments)
+    title = episode.get('title') or (captions['title'] if source == 'captions' else None) or url
+    transcript_path = AudioTranscriber.get_transcript_path(title)
+    transcript_path.parent.mkdir(parents=True, exist_ok=True)
+    transcript_path.write_text(index.text, encoding='utf-8')
+    stage_data = {
+        'raw_transcript': index.text,
+        'transcript_path': str(transcript_path),
+        'segment_index': index.to_document(),
+        'language': language,
+        'transcript_source': source,
+    }
+    if not episode.get('title'):
+        stage_data['title'] = title
+    if not episode.get('duration'):
+        stage_data['duration'] = duration or int(segments[-1][1])
+    db.save_stage(url, 'transcribed', stage_data)
+    db.record_stage_metrics(url, 'transcribe', transcribe_metrics.update(
+        model=f"{source}-transcript", language=language, audio_duration_s=stage_data.get('duration'),
+    ).data)
+    print(f"📜 [TRANSCRIPT] - Using {source} transcript ({len(segments)} segments), skipping Whisper")
+    # No audio is downloaded, but other copies of this episode should still match it
+    if FINGERPRINT_DEDUP and db.get_fingerprint(url) is None:
+        fingerprint_episode.apply_async(args=[url], queue=QUEUE_DOWNLOAD)
+    return True
+
+def _find_analyzed_duplicate(db, url, episode_data):
+    """Look for an analyzed episode with the same audio as this one.
+
+    The fingerprint normally comes from the ingest pass; it is only decoded
+    here when ingest didn't run (or failed). Returns (episode, coverage) of
+    the match, or None.
+    """
+    codes = codes_from_document(db.get_fingerprint(url))
+    if codes is None:
+        with StageMetrics('fingerprint') as fingerprint_metrics:
+            codes = fingerprint_file(_transcription_audio(episode_data))
+        db.save_fingerprint(to_document(codes, url))
+        db.record_stage_metrics(url, 'fingerprint', fingerprint_metrics.update(frames=len(codes)).data)
+    match = find_duplicate(db, url, codes)
+    if not match:
+        return None
+    source = db.get_episode(match[0])
+    if not source or source.get('status') != 'completed' or not source.get('raw_transcript'):
+        return None
+    return source, match[1]
+
+def _reuse_duplicate_analysis(db, url, episode_data, source):
+    """Checkpoint the transcript (and, for the same prompt category, the summary) of `source`."""
+    transcript_path = AudioTranscriber.get_transcript_path(episode_data['title'])
+    transcript_path.parent.mkdir(parents=True, exist_ok=True)
+    transcript_path.write_text(source['raw_transcript'], encoding='utf-8')
+    db.save_stage(url, 'transcribed', {
+        'raw_transcript': source['raw_transcript'],
+        'transcript_path': str(transcript_path),
+        'segment_index': source.get('segment_index'),
+        'language': source.get('language'),
+        'transcript_source': 'duplicate',
+        'duplicate_of': source['url'],
+    })
+    if source.get('transcript'):
+        db.save_stage(url, 'cleaned', {'transcript': source['transcript']})
+
+    # The summary depends on the prompt, so it is only reused for the same category
+    category = ""
+    if episode_data.get('feed_id'):
+        category = (db.get_feed_by_id(str(episode_data['feed_id'])) or {}).get('category', '')
+    if source.get('summary') and source.get('prompt_category', '') == category:
+        db.save_stage(url, 'summarized', {'summary': source['summary'], 'prompt_category': category})
+
+def _clean_piece(piece, title, index):
+    """Clean one transcript piece with its own cleaner (safe to run in a thread).
+
+    Returns (cleaned, usage, (started, finished, cpu_seconds)): perf_counter
+    timestamps and the CPU time of this thread.
+    """
+    started, cpu_start = time.perf_counter(), time.thread_time()
+    cleaner = TranscriptCleaner()
+    cleaned = cleaner.clean_transcript(piece, f"{title} (part {index + 1})")
+    return cleaned, cleaner.last_usage, (started, time.perf_counter(), time.thread_time() - cpu_start)
+
+def _transcribe_and_clean_streaming(transcriber, audio_path, title, duration=None, on_transcribed=None):
+    """
+    Overlap transcription and cleaning: every transcript piece is handed to the
+    LLM cleaner as soon as it is transcribed, so cleaning mostly finishes while
+    Whisper is still working. Returns (raw_transcript, clean_transcript, clean_usage);
+    the usage times cleaning from the first piece submitted to the last one cleaned.
+
+    `on_transcribed(raw_transcript, transcribe_metrics)` is called once Whisper
+    is done, before waiting for the cleaner, so the transcript can be
+    checkpointed even if cleaning a piece fails.
+    """
+    raw_pieces = []
+    futures = []
+    with ThreadPoolExecutor(max_workers=STREAMING_CLEAN_WORKERS) as pool:
+        with StageMetrics('transcribe') as transcribe_metrics:
+            for index, piece in enumerate(transcriber.transcribe_stream(audio_path, title, duration=duration)):
+                raw_pieces.append(piece)
+                futures.append(pool.submit(_clean_piece, piece, title, index))
+                print(f"🌊 [STREAMING] - Piece {index + 1} transcribed, cleaning in background")
+        if not raw_pieces:
+            raise RuntimeError("Failed to transcribe audio")
+        if on_transcribed:
+            on_transcribed(" ".join(raw_pieces), transcribe_metrics)
+        results = [future.result() for future in futures]
+
+    usage = {'model': None, 'input_tokens': 0, 'output_tokens': 0, 'pieces': len(results), 'streaming': True}
+    for _, piece_usage, _ in results:
+        usage['model'] = piece_usage.get('model', usage['model'])
+        usage['input_tokens'] += piece_usage.get('input_tokens', 0)
+        usage['output_tokens'] += piece_usage.get('output_tokens', 0)
+    # Pieces are cleaned in parallel while Whisper runs: wall time is the span they covered
+    timings = [timing for _, _, timing in results]
+    usage['wall_time_s'] = round(max(t[1] for t in timings) - min(t[0] for t in timings), 3)
+    usage['cpu_time_s'] = round(sum(t[2] for t in timings), 3)
+
+    raw_transcript = " ".join(raw_pieces)
+    clean_transcript = "\n\n".join(cleaned for cleaned, _, _ in results)
+    return raw_transcript, clean_transcript, usage
+
+def _checkpoint_whisper_transcript(db, url, transcriber, transcript_path, raw_transcript, transcribe_metrics,
+                                   **metrics):
+    """Checkpoint a Whisper transcript with its segment index, and record its transcribe metrics."""
+    db.record_stage_metrics(url, 'transcribe', transcribe_metrics.update(
+        model=f"whisper-{transcriber.model_name}",
+        profile=transcriber.profile,
+        language=transcriber.language,
+        **metrics,
+    ).data)
+    segment_index = transcriber.last_segment_index
+    db.save_stage(url, 'transcribed', {
+        'raw_transcript': raw_transcript,
+        'transcript_path': str(transcript_path),
+        'segment_index': segment_index.to_document() if segment_index is not None else None,
+        'transcription_profile': transcriber.profile,
+        'language': transcriber.language,
+        'transcript_source': 'whisper',
+    })
+
+def _transcription_audio(episode_data):
+    """Path of the audio to transcribe: the 16 kHz ingest copy when there is one."""
+    return f"data/{episode_data.get('transcription_file_path') or episode_data['file_path']}"
+
+def _ingest_audio(db, url, episode_data):
+    """Transcode the downloaded audio into transcription and playback copies (best effort).
+
+    The same ffmpeg pass feeds the acoustic fingerprint when duplicate
+    detection is on and the episode has none yet.
+    """
+    ingestor = AudioIngestor(DATA_DIR / "audio")
+    original_path = DATA_DIR / episode_data['file_path']
+    fingerprinter = Fingerprinter() if FINGERPRINT_DEDUP and db.get_fingerprint(url) is None else None
+    try:
+        with StageMetrics('ingest') as ingest_metrics:
+            result = ingestor.ingest(
+                original_path,
+                pcm_sink=fingerprinter.feed if fingerprinter else None,
+                pcm_sample_rate=FINGERPRINT_SAMPLE_RATE,
+            )
+    except Exception as e:
+        # The original stays usable for transcription and playback
+        print(f"⚠️  [INGEST] - Transcode failed, keeping original audio: {e}")
+        return
+    fingerprint_frames = None
+    if fingerprinter:
+        codes = fingerprinter.codes()
+        fingerprint_frames = len(codes)
+        try:
+            db.save_fingerprint(to_document(codes, url))
+        except Exception as e:
+            print(f"⚠️  [FINGERPRINT] - Could not store the fingerprint: {e}")
+    episode_data['transcription_file_path'] = str(result['transcription_path'].relative_to(DATA_DIR))
+    episode_data['file_path'] = str(result['playback_path'].relative_to(DATA_DIR))
+    # The original is deleted below: describe the copy that is kept and played
+    episode_data['audio_info'] = probe_audio(result['playback_path'])
+    db.save_stage(url, 'ingested', {
+        'file_path': episode_data['file_path'],
+        'transcription_file_path': episode_data['transcription_file_path'],
+        'audio_info': episode_data['audio_info'],
+    })
+    db.record_stage_metrics(url, 'ingest', ingest_metrics.update(
+        audio_duration_s=(episode_data['audio_info'] or {}).get('duration') or episode_data.get('duration') or None,
+        original_bytes=result['original_bytes'],
+        transcription_bytes=result['transcription_bytes'],
+        playback_bytes=result['playback_bytes'],
+        fingerprint_frames=fingerprint_frames,
+    ).data)
+    ingestor.discard_original(original_path)
+
+def _audio_duration(episode_data):
+    """Episode duration in seconds, from the audio itself where possible.
+
+    The stored probe wins, then a probe of the file; feed or yt-dlp metadata
+    (often rounded, or counting a different edit) is only the last resort.
     """
-    return _analyze_episode_with_tracing(url, force)
+    duration = (episode_data.get('audio_info') or {}).get('duration')
+    if not duration:
+        duration = probe_duration(_transcription_audio(episode_data))
+    return duration or episode_data.get('duration') or 0
+
+def _progress_reporter(db, url, stage):
+    """Progress callback publishing to the Celery result backend and the episode."""
+    def report(progress):
+        db.update_progress(url, stage, progress)
+        if current_task and current_task.request.id:
+            current_task.update_state(state='PROGRESS', meta=dict(progress, url=url, stage=stage))
+    return report
+
+def _transcriber_for_episode(db, episode_data):
+    """AudioTranscriber using the episode's feed profile ('auto' follows the backlog) and language."""
+    requested = None
+    language = None
+    if episode_data.get('feed_id'):
+        feed = db.get_feed_by_id(str(episode_data['feed_id']))
+        if feed:
+            requested = feed.get('transcription_profile')
+            language = feed.get('language')
+    backlog = db.count_backlog() if (requested or '').strip().lower() == 'auto' else None
+    profile = select_profile(requested, backlog)
+    print(f"🎚️  [PROFILE] - Transcribing with '{profile}' profile"
+          + (f" (auto, backlog {backlog})" if backlog is not None else ""))
+    return AudioTranscriber(profile=profile, language=language)
+
+def _dispatch_distributed_transcription(transcriber, url, episode_data, queue):
+    """Split the audio on the shared volume and transcribe the chunks as a Celery chord."""
+    chunk_dir = CHUNKS_DIR / hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    shutil.rmtree(chunk_dir, ignore_errors=True)
+    duration = _audio_duration(episode_data)
+    language = transcriber.resolve_language(_transcription_audio(episode_data), duration)
+    chunks = transcriber.split_for_distribution(_transcription_audio(episode_data), chunk_dir, duration=duration)
+    if not chunks:
+        raise RuntimeError("Failed to split audio for distributed transcription")
 
-def _analyze_episode_with_tracing(url, force):
+    print(f"🛰️  [DISTRIBUTED] - Dispatching {len(chunks)} chunks to the '{queue}' queue")
+    header = [
+        transcribe_chunk.s(str(chunk_path), offset, transcriber.profile, language).set(queue=queue)
+        for chunk_path, offset in chunks
+    ]
+    callback = merge_chunk_transcripts.s(
+        url, episode_data['title'], str(chunk_dir), queue, language=language
+    ).set(queue=queue)
+    callback.on_error(distributed_transcription_failed.s(url, str(chunk_dir)).set(queue=queue))
+    chord(header)(callback)
+
+def _analyze_episode_with_tracing(url, force, queue=QUEUE_NORMAL):
     """Internal function that does the actual work"""
     db = PodcastDB()
 
@@ -45,7 +496,6 @@ def _analyze_episode_with_tracing(url, force):
 
         # Initialize components
         downloader = PodcastDownloader(str(Path("data/audio")))
-        transcriber = AudioTranscriber()
         cleaner = TranscriptCleaner()
         summarizer = PodcastSummarizer()
 
@@ -55,37 +505,53 @@ def _analyze_episode_with_tracing(url, force):
             print("✅ Episode already processed. Use --force to re-analyze.")
             return {"status": "already_processed", "url": url}
 
-        # Step 1: Download
-        # Get the original metadata from placeholder before download
-        original_episode = db.get_episode(url)
-        original_title = original_episode.get('title', '') if original_episode else ''
-        original_feed_id = original_episode.get('feed_id') if original_episode else None
-        original_feed_title = original_episode.get('feed_title', '') if original_episode else ''
-
-        episode_data = downloader.download(url)
-        if not episode_data:
-            raise RuntimeError("Failed to download episode")
-
-        # Preserve the original RSS metadata if it exists (don't use the downloaded file's metadata)
-        if original_title:
-            episode_data['title'] = original_title
-        if original_feed_id:
-            episode_data['feed_id'] = original_feed_id
-        if original_feed_title:
-            episode_data['feed_title'] = original_feed_title
+        # A forced run ignores (and drops) checkpoints from earlier runs
+        if force and episode:
+            db.reset_stages(url)
+            episode = db.get_episode(url)
+        stages = (episode or {}).get('stages', {})
+        if stages:
+            print(f"⏭️  [CHECKPOINT] - Completed stages: {', '.join(s for s in PIPELINE_STAGES if s in stages)}")
 
-        # Step 2: Transcribe (or load existing)
-        transcript_path = transcriber.get_transcript_path(episode_data['title'])
-        if transcript_path.exists() and not force:
-            raw_transcript = transcript_path.read_text(encoding='utf-8')
-            transcribe_method = "loaded_from_cache"
+        # Step 0: A transcript published with the episode makes audio and Whisper unnecessary
+        if PUBLISHED_TRANSCRIPTS and episode and 'transcribed' not in stages and not _has_downloaded_audio(episode) \
+                and _use_published_transcript(db, url, episode, downloader):
+            episode = db.get_episode(url)
+            stages = episode.get('stages', {})
+
+        # Step 1: Download (or reuse the checkpointed or prefetched audio file)
+        if _has_downloaded_audio(episode):
+            print(f"⏭️  [CHECKPOINT] - Reusing downloaded audio: {episode['file_path']}")
+            episode_data = _episode_from_checkpoint(episode)
+        elif 'transcribed' in stages and episode.get('transcript_source') in ('published', 'captions'):
+            # Audio can still be fetched on demand for playback (see restore_audio)
+            print(f"⏭️  [CHECKPOINT] - Using the {episode['transcript_source']} transcript, audio not downloaded")
+            episode_data = _episode_from_checkpoint(episode)
         else:
-            raw_transcript = transcriber.transcribe(f"data/{episode_data['file_path']}", episode_data['title'])
-            if not raw_transcript:
-                raise RuntimeError("Failed to transcribe audio")
-            transcribe_method = "whisper_transcription"
+            episode_data = _download_episode(db, url, episode, downloader)
 
-        episode_data['raw_transcript'] = raw_transcript
+        # Step 1b: Transcode once into a 16 kHz mono transcription copy and a playback copy
+        if INGEST_TRANSCODE and 'transcribed' not in stages:
+            transcription_file = episode_data.get('transcription_file_path')
+            if 'ingested' in stages and transcription_file and (DATA_DIR / transcription_file).exists():
+                print(f"⏭️  [CHECKPOINT] - Reusing transcription audio: {transcription_file}")
+            else:
+                _ingest_audio(db, url, episode_data)
+
+        # Step 1c: The same audio may already be analyzed under another URL (enclosure vs video, republished).
+        # A forced run asked for a fresh analysis, so it doesn't copy one.
+        if FINGERPRINT_DEDUP and not force and 'transcribed' not in stages and episode_data.get('file_path'):
+            try:
+                duplicate = _find_analyzed_duplicate(db, url, episode_data)
+                if duplicate:
+                    source, coverage = duplicate
+                    print(f"🔁 [FINGERPRINT] - Same audio as {source['url']} ({coverage:.0%} matched), "
+                          f"reusing its analysis")
+                    _reuse_duplicate_analysis(db, url, episode_data, source)
+                    episode = db.get_episode(url)
+                    stages = episode.get('stages', {})
+            except Exception as e:
+                print(f"⚠️  [FINGERPRINT] - Duplicate check failed, analyzing normally: {e}")
 
         # Create session ID from sanitized episode title
         sanitized_title = "".join(c for c in episode_data['title'] if c.isalnum() or c in (' ', '_')).rstrip()
@@ -109,27 +575,98 @@ def _analyze_episode_with_tracing(url, force):
         except Exception as e:
             print(f"⚠️  [LANGFUSE] - Session setup failed: {e}")
 
+        # Step 2: Transcribe (or load existing)
+        transcriber = _transcriber_for_episode(db, episode_data)
+        transcriber.progress_callback = _progress_reporter(db, url, 'transcribe')
+        transcript_path = transcriber.get_transcript_path(episode_data['title'])
+        if 'transcribed' in stages and episode.get('raw_transcript'):
+            raw_transcript = episode['raw_transcript']
+            transcribe_method = "checkpoint"
+        elif transcript_path.exists() and not force:
+            raw_transcript = transcript_path.read_text(encoding='utf-8')
+            transcribe_method = "loaded_from_cache"
+        elif DISTRIBUTED_TRANSCRIPTION and _audio_duration(episode_data) >= DISTRIBUTED_MIN_DURATION_S:
+            # Fan chunks out to the cluster; the merge callback checkpoints the
+            # transcript and re-enqueues this task, which then resumes at cleaning.
+            _dispatch_distributed_transcription(transcriber, url, episode_data, queue)
+            return {"status": "transcribing_distributed", "url": url}
+        elif STREAMING_PIPELINE and 'cleaned' not in stages:
+            # Clean transcript pieces concurrently while transcription continues
+            duration = _audio_duration(episode_data)
+            print("\n🌊 Transcribing and cleaning in streaming mode...")
+            # The transcript is checkpointed as soon as Whisper finishes, so a
+            # piece that fails to clean resumes at cleaning, not transcription
+            raw_transcript, clean_transcript, clean_usage = _transcribe_and_clean_streaming(
+                transcriber, _transcription_audio(episode_data), episode_data['title'],
+                duration=duration,
+                on_transcribed=lambda raw, metrics: _checkpoint_whisper_transcript(
+                    db, url, transcriber, transcript_path, raw, metrics,
+                    audio_duration_s=duration or None, streaming=True,
+                ),
+            )
+            transcribe_method = "whisper_streaming"
+        else:
+            duration = _audio_duration(episode_data)
+            with StageMetrics('transcribe') as transcribe_metrics:
+                raw_transcript = transcriber.transcribe(
+                    _transcription_audio(episode_data), episode_data['title'], duration=duration
+                )
+            if not raw_transcript:
+                raise RuntimeError("Failed to transcribe audio")
+            transcribe_method = "whisper_transcription"
+            _checkpoint_whisper_transcript(
+                db, url, transcriber, transcript_path, raw_transcript, transcribe_metrics,
+                audio_duration_s=duration or None,
+            )
+
+        episode_data['raw_transcript'] = raw_transcript
+        if transcribe_method == "loaded_from_cache":
+            # A transcript loaded from the file cache has no timestamps; drop any stale index
+            db.save_stage(url, 'transcribed', {
+                'raw_transcript': raw_transcript,
+                'transcript_path': str(transcript_path),
+                'segment_index': None,
+            })
+
         # Step 3: Clean transcript (traced via @observe decorator)
-        print("\n🧹 Cleaning transcript...")
-        clean_transcript = cleaner.clean_transcript(raw_transcript, episode_data['title'])
+        if 'cleaned' in stages and episode.get('transcript'):
+            print("\n⏭️  [CHECKPOINT] - Reusing cleaned transcript")
+            clean_transcript = episode['transcript']
+        elif transcribe_method == "whisper_streaming":
+            db.save_stage(url, 'cleaned', {'transcript': clean_transcript})
+            db.record_stage_metrics(url, 'clean', clean_usage)
+        else:
+            print("\n🧹 Cleaning transcript...")
+            with StageMetrics('clean') as clean_metrics:
+                clean_transcript = cleaner.clean_transcript(raw_transcript, episode_data['title'])
+            db.save_stage(url, 'cleaned', {'transcript': clean_transcript})
+            db.record_stage_metrics(url, 'clean', clean_metrics.update(**cleaner.last_usage).data)
         episode_data['transcript'] = clean_transcript
 
         # Step 4: Summarize (traced via @observe decorator)
-        print("\n🤖 Generating summary...")
-        # Fetch custom instructions and category from the feed if available
-        custom_instructions = ""
-        category = ""
-        if episode_data.get('feed_id'):
-            feed = db.get_feed_by_id(str(episode_data['feed_id']))
-            if feed:
-                custom_instructions = feed.get('customPromptInstructions', '')
-                category = feed.get('category', '')
-                if custom_instructions:
-                    print(f"📋 Using custom instructions from feed: {feed.get('title', 'Unknown')}")
-                if category:
-                    print(f"📂 Using category: {category}")
+        if 'summarized' in stages and episode.get('summary'):
+            print("\n⏭️  [CHECKPOINT] - Reusing summary")
+            summary = episode['summary']
+            category = episode.get('prompt_category', '')
+        else:
+            print("\n🤖 Generating summary...")
+            # Fetch custom instructions and category from the feed if available
+            custom_instructions = ""
+            category = ""
+            if episode_data.get('feed_id'):
+                feed = db.get_feed_by_id(str(episode_data['feed_id']))
+                if feed:
+                    custom_instructions = feed.get('customPromptInstructions', '')
+                    category = feed.get('category', '')
+                    if custom_instructions:
+                        print(f"📋 Using custom instructions from feed: {feed.get('title', 'Unknown')}")
+                    if category:
+                        print(f"📂 Using category: {category}")
 
-        summary = summarizer.summarize(clean_transcript, episode_data['title'], custom_instructions=custom_instructions, category=category)
+            with StageMetrics('summarize') as summarize_metrics:
+                summary = summarizer.summarize(clean_transcript, episode_data['title'], custom_instructions=custom_instructions, category=category)
+            db.save_stage(url, 'summarized', {'summary': summary, 'prompt_category': category})
+            db.record_stage_metrics(url, 'summarize', summarize_metrics.update(**summarizer.last_usage).data)
         episode_data['summary'] = summary
         episode_data['prompt_category'] = category
 
@@ -138,8 +675,11 @@ def _analyze_episode_with_tracing(url, force):
         episode_data['status'] = 'completed'
         db.save_episode(episode_data)
 
-        # Keep audio file for web playback
-        print(f"🎵 Audio file kept for playback: {episode_data['file_path']}")
+        # Keep audio file for web playback; the storage manager tiers it down as it ages
+        if episode_data.get('file_path'):
+            print(f"🎵 Audio file kept for playback: {episode_data['file_path']}")
+        if STORAGE_MANAGEMENT:
+            enforce_storage_quota.apply_async(queue=QUEUE_LOW)
 
         total_time = time.time() - start_time
         print(f"\n🎉 [TASK SUCCESS] - Analysis complete! Total time: {total_time:.1f}s")
@@ -173,15 +713,17 @@ def _analyze_episode_with_tracing(url, force):
         raise
 
 @celery_app.task(bind=True)
-def resummarize_episode(self, episode_id, category=None):
+def resummarize_episode(self, episode_id, category=None, rate_limit_retries=0):
     """
     Re-run cleaning and summarization on an existing episode using the raw transcript.
     Accepts an optional category override for prompt selection.
     LLM calls are automatically traced via @observe decorators.
+    Rate limits are retried (`rate_limit_retries` so far); other errors fail the episode.
     """
     from bson.objectid import ObjectId
 
     db = PodcastDB()
+    episode = None
     try:
         print(f"🔄 [RESUMMARIZE START] - Episode ID: {episode_id}")
 
@@ -225,7 +767,9 @@ def resummarize_episode(self, episode_id, category=None):
 
         # Step 3: Generate new summary (traced via @observe)
         print("\n🤖 Re-generating summary...")
-        summary = summarizer.summarize(clean_transcript, episode['title'], custom_instructions=custom_instructions, category=category)
+        with StageMetrics('summarize') as summarize_metrics:
+            summary = summarizer.summarize(clean_transcript, episode['title'], custom_instructions=custom_instructions, category=category)
+        db.record_stage_metrics(episode['url'], 'summarize', summarize_metrics.update(**summarizer.last_usage).data)
 
         # Step 4: Update the episode with new summary
         update_data = {
@@ -250,6 +794,18 @@ def resummarize_episode(self, episode_id, category=None):
         except Exception as flush_error:
             print(f"⚠️  [LANGFUSE] - Flush warning: {flush_error}")
 
+    except RateLimitedError as e:
+        if rate_limit_retries >= OPENAI_RATE_LIMIT_MAX_RETRIES:
+            if episode:
+                db.update_episode_status(episode['url'], 'failed', error_message=str(e))
+            raise
+        countdown = backoff_delay(rate_limit_retries, e.retry_after)
+        print(f"⏳ [RESUMMARIZE RATE LIMITED] - Retrying episode {episode_id} in {countdown}s")
+        if episode:
+            db.update_episode_status(episode['url'], 'pending', error_message=str(e))
+        raise self.retry(exc=e, countdown=countdown, max_retries=None, kwargs={
+            'category': category, 'rate_limit_retries': rate_limit_retries + 1,
+        })
     except Exception as e:
         print(f"❌ [RESUMMARIZE FAILED] - Error re-summarizing episode {episode_id}: {e}")
         if episode:
@@ -257,11 +813,12 @@ def resummarize_episode(self, episode_id, category=None):
         raise
 
 @celery_app.task(bind=True)
-def reclean_episode(self, episode_id):
+def reclean_episode(self, episode_id, rate_limit_retries=0):
     """
     Re-clean the raw transcript and re-summarize an existing episode.
     Does NOT re-download or re-transcribe.
     LLM calls are automatically traced via @observe decorators.
+    Rate limits are retried (`rate_limit_retries` so far); other errors fail the episode.
     """
     from bson.objectid import ObjectId
 
@@ -288,7 +845,9 @@ def reclean_episode(self, episode_id):
 
         # Step 1: Re-clean the raw transcript (traced via @observe)
         print("\n🧹 Re-cleaning transcript...")
-        clean_transcript = cleaner.clean_transcript(episode['raw_transcript'], episode['title'])
+        with StageMetrics('clean') as clean_metrics:
+            clean_transcript = cleaner.clean_transcript(episode['raw_transcript'], episode['title'])
+        db.record_stage_metrics(episode['url'], 'clean', clean_metrics.update(**cleaner.last_usage).data)
 
         # Step 2: Resolve category and custom instructions
         custom_instructions = ""
@@ -309,7 +868,9 @@ def reclean_episode(self, episode_id):
 
         # Step 3: Generate new summary (traced via @observe)
         print("\n🤖 Re-generating summary...")
-        summary = summarizer.summarize(clean_transcript, episode['title'], custom_instructions=custom_instructions, category=category)
+        with StageMetrics('summarize') as summarize_metrics:
+            summary = summarizer.summarize(clean_transcript, episode['title'], custom_instructions=custom_instructions, category=category)
+        db.record_stage_metrics(episode['url'], 'summarize', summarize_metrics.update(**summarizer.last_usage).data)
 
         # Step 4: Update the episode with new cleaned transcript and summary
         update_data = {
@@ -334,8 +895,142 @@ def reclean_episode(self, episode_id):
         except Exception as flush_error:
             print(f"⚠️  [LANGFUSE] - Flush warning: {flush_error}")
 
+    except RateLimitedError as e:
+        if rate_limit_retries >= OPENAI_RATE_LIMIT_MAX_RETRIES:
+            if episode:
+                db.update_episode_status(episode['url'], 'failed', error_message=str(e))
+            raise
+        countdown = backoff_delay(rate_limit_retries, e.retry_after)
+        print(f"⏳ [RECLEAN RATE LIMITED] - Retrying episode {episode_id} in {countdown}s")
+        if episode:
+            db.update_episode_status(episode['url'], 'pending', error_message=str(e))
+        raise self.retry(exc=e, countdown=countdown, max_retries=None,
+                         kwargs={'rate_limit_retries': rate_limit_retries + 1})
     except Exception as e:
         print(f"❌ [RECLEAN FAILED] - Error re-cleaning episode {episode_id}: {e}")
         if episode:
             db.update_episode_status(episode['url'], 'failed', error_message=str(e))
         raise
+
+@celery_app.task(bind=True, max_retries=BATCH_MAX_RETRIES)
+def advance_batch_job(self, job_id):
+    """
+    Drive a batch re-summarization job: collect finished batches, submit the
+    next pages of the selection, and re-schedule itself until the job is done.
+    Runs on the low-priority lane so it never competes with interactive work.
+    Errors are retried; the job is marked failed only once retries run out.
+    """
+    from batch_resummarizer import BatchResummarizer, BATCH_POLL_INTERVAL_S
+
+    db = PodcastDB()
+    try:
+        status = BatchResummarizer(db=db).advance(job_id)
+        if status == 'running':
+            advance_batch_job.apply_async(args=[job_id], countdown=BATCH_POLL_INTERVAL_S, queue=QUEUE_LOW)
+        return {"job_id": job_id, "status": status}
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            print(f"⚠️  [BATCH RESUMMARIZE] - Job {job_id}: {e}; retrying "
+                  f"({self.request.retries + 1}/{self.max_retries})")
+            raise self.retry(exc=e, countdown=min(BATCH_POLL_INTERVAL_S, 60 * 2 ** self.request.retries))
+        print(f"❌ [BATCH RESUMMARIZE FAILED] - Job {job_id}: {e}")
+        db.update_batch_job(job_id, {'$set': {'status': 'failed', 'error_message': str(e)}})
+        raise
+
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=30)
+def transcribe_chunk(self, chunk_path, offset, profile=None, language=None):
+    """Transcribe one chunk of a distributed episode. Returns [[start, end, text]]."""
+    try:
+        # Models stay warm in this worker process between chunk subtasks
+        transcriber = AudioTranscriber(profile=profile, language=language)
+        print(f"🛰️  [CHUNK] - Transcribing {chunk_path} (offset {offset:.0f}s, "
+              f"profile {transcriber.profile}, model {transcriber.model_name})")
+        return [list(segment) for segment in transcriber.transcribe_chunk_file(chunk_path, offset)]
+    except Exception as e:
+        raise self.retry(exc=e)
+
+@celery_app.task(bind=True)
+def merge_chunk_transcripts(self, chunk_results, url, title, chunk_dir, queue=QUEUE_NORMAL, language=None):
+    """
+    Chord callback: stitch chunk transcripts (in chunk order, timestamps already
+    in episode time), checkpoint the transcript and resume the episode pipeline.
+    """
+    db = PodcastDB()
+    segments = [segment for chunk in chunk_results for segment in chunk]
+    raw_transcript = " ".join(text for _, _, text in segments)
+    if not raw_transcript.strip():
+        db.update_episode_status(url, 'failed', error_message="Distributed transcription produced no text")
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+        return {"status": "failed", "url": url}
+
+    transcript_path = AudioTranscriber.get_transcript_path(title)
+    transcript_path.parent.mkdir(parents=True, exist_ok=True)
+    transcript_path.write_text(raw_transcript, encoding='utf-8')
+    db.save_stage(url, 'transcribed', {
+        'raw_transcript': raw_transcript,
+        'transcript_path': str(transcript_path),
+        'segment_index': SegmentIndex.from_segments(segments).to_document(),
+        'language': language,
+        'transcript_source': 'whisper',
+    })
+    shutil.rmtree(chunk_dir, ignore_errors=True)
+    print(f"🛰️  [DISTRIBUTED] - Merged {len(chunk_results)} chunks ({len(segments)} segments), resuming pipeline")
+
+    analyze_episode.apply_async(args=[url], queue=queue)
+    return {"status": "transcribed", "url": url, "segments": len(segments)}
+
+@celery_app.task
+def distributed_transcription_failed(request, exc, traceback, url, chunk_dir):
+    """Chord error callback: mark the episode failed and drop its chunks."""
+    print(f"❌ [DISTRIBUTED FAILED] - Chunk transcription failed for {url}: {exc}")
+    shutil.rmtree(chunk_dir, ignore_errors=True)
+    PodcastDB().update_episode_status(url, 'failed', error_message=str(exc))
+
+@celery_app.task
+def enforce_storage_quota():
+    """Archive old episode audio and evict least-recently-played audio over the disk quota."""
+    return StorageManager(PodcastDB(), DATA_DIR).enforce()
+
+@celery_app.task(bind=True, max_retries=None)
+def fingerprint_episode(self, url, failures=0):
+    """
+    Fingerprint an episode that was analyzed from a published transcript or
+    captions: its audio is streamed through ffmpeg (within a download slot)
+    without being stored, so a copy arriving under another URL matches it.
+    """
+    db = PodcastDB()
+    if db.get_fingerprint(url) is not None:
+        return {"status": "fingerprinted", "url": url}
+    try:
+        setup_directories()
+        downloader = PodcastDownloader(str(AUDIO_DIR))
+        with get_download_manager().slot(url, max_wait=0) as throttle:
+            media_url, headers = downloader.stream_source(url)
+            with StageMetrics('fingerprint') as fingerprint_metrics:
+                # ffmpeg fetches the audio itself: only the slot lease is renewed
+                codes = fingerprint_file(media_url, headers=headers, on_block=lambda: throttle(0))
+    except DownloadSlotTimeout as e:
+        countdown = PREFETCH_SLOT_RETRY_S + random.uniform(0, PREFETCH_SLOT_RETRY_S)
+        print(f"⏳ [FINGERPRINT] - {e}; re-queued in {countdown:.0f}s")
+        raise self.retry(exc=e, countdown=countdown, kwargs={'failures': failures})
+    except Exception as e:
+        if failures < PREFETCH_MAX_RETRIES:
+            countdown = PREFETCH_RETRY_DELAY_S * (2 ** failures)
+            print(f"🔁 [FINGERPRINT] - Retrying {url} in {countdown}s: {e}")
+            raise self.retry(exc=e, countdown=countdown, kwargs={'failures': failures + 1})
+        print(f"⚠️  [FINGERPRINT] - Giving up on {url}: {e}")
+        return {"status": "failed", "url": url}
+    db.save_fingerprint(to_document(codes, url))
+    db.record_stage_metrics(url, 'fingerprint', fingerprint_metrics.update(frames=len(codes)).data)
+    print(f"🔎 [FINGERPRINT] - Fingerprinted {url} from streamed audio ({len(codes)} frames)")
+    return {"status": "fingerprinted", "url": url}
+
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=60)
+def restore_audio(self, url):
+    """Re-fetch an episode's evicted audio from its original URL."""
+    try:
+        setup_directories()
+        file_path = StorageManager(PodcastDB(), DATA_DIR).restore(url, PodcastDownloader(str(AUDIO_DIR)))
+    except Exception as e:
+        raise self.retry(exc=e)
+    return {"status": "restored", "url": url, "file_path": file_path}
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test batch re-summarization against the local Batch API stand-in and an
+in-memory job store (no MongoDB or OpenAI needed): paging through a selection,
+collecting results, and resuming after a crash or a failure.
+"""
+import copy
+
+from bson.objectid import ObjectId
+
+import batch_resummarizer
+from batch_resummarizer import BatchResummarizer, LocalBatchBackend
+
+batch_resummarizer.BATCH_PAGE_SIZE = 2
+
+
+class MemoryDB:
+    """The PodcastDB methods BatchResummarizer uses, over plain dicts."""
+
+    def __init__(self, episode_count):
+        self.episodes = [
+            {'_id': ObjectId(), 'title': f"Episode {i}", 'transcript': f"Transcript {i}", 'feed_id': None}
+            for i in range(episode_count)
+        ]
+        self.jobs = {}
+
+    def create_batch_job(self, selection, category=None):
+        job_id = ObjectId()
+        self.jobs[job_id] = {
+            '_id': job_id, 'selection': selection, 'category': category, 'status': 'pending',
+            'cursor': None, 'exhausted': False, 'pending_batches': [],
+            'counts': {'submitted': 0, 'completed': 0, 'failed': 0},
+        }
+        return copy.deepcopy(self.jobs[job_id])
+
+    def get_batch_job(self, job_id):
+        return copy.deepcopy(self.jobs.get(ObjectId(job_id)))
+
+    def update_batch_job(self, job_id, update):
+        job = self.jobs[ObjectId(job_id)]
+        job.update(update.get('$set', {}))
+        for key in update.get('$unset', {}):
+            job.pop(key, None)
+        for key, value in update.get('$push', {}).items():
+            job[key].append(copy.deepcopy(value))
+        for key, match in update.get('$pull', {}).items():
+            job[key] = [item for item in job[key] if any(item.get(k) != v for k, v in match.items())]
+        for key, amount in update.get('$inc', {}).items():
+            parent, _, field = key.partition('.')
+            job[parent][field] += amount
+
+    def claim_batch_page(self, job_id, cursor, submission):
+        job = self.jobs[ObjectId(job_id)]
+        if 'submitting' in job or job['cursor'] != cursor:
+            return False
+        job['submitting'] = copy.deepcopy(submission)
+        return True
+
+    def select_episodes_for_batch(self, selection, after_id=None, limit=100):
+        after = ObjectId(after_id) if after_id else None
+        return [e for e in self.episodes if after is None or e['_id'] > after][:limit]
+
+    def bulk_update_episodes(self, updates):
+        by_id = {str(e['_id']): e for e in self.episodes}
+        for episode_id, fields in updates:
+            by_id[episode_id].update(fields)
+
+    def get_feed_by_id(self, feed_id):
+        return None
+
+
+class PromptOnlySummarizer:
+    def build_messages(self, transcript, title="Podcast Episode", custom_instructions="", category=""):
+        return [{'role': 'user', 'content': f"{title}: {transcript}"}], None, None
+
+
+def _resummarizer(db, backend=None):
+    LocalBatchBackend._batches.clear()
+    LocalBatchBackend._keys.clear()
+    return BatchResummarizer(db=db, backend=backend or LocalBatchBackend(), summarizer=PromptOnlySummarizer())
+
+
+def test_pages_through_selection():
+    db = MemoryDB(5)
+    job = db.create_batch_job({'category': 'news'})
+    assert _resummarizer(db).advance(str(job['_id'])) == 'completed'
+
+    job = db.get_batch_job(job['_id'])
+    assert job['counts'] == {'submitted': 5, 'completed': 5, 'failed': 0}
+    assert not job['pending_batches']
+    # Pages of BATCH_PAGE_SIZE episodes
+    assert len(LocalBatchBackend._batches) == 3
+    assert all(e['summary'].startswith("[local batch summary] Episode") for e in db.episodes)
+
+
+def test_collect_counts_failed_requests():
+    db = MemoryDB(4)
+    job = db.create_batch_job({'category': 'news'})
+    # The request for "Episode 2" errors out in the batch
+    backend = LocalBatchBackend(responder=lambda body: None if "Episode 2" in body['messages'][0]['content'] else "ok")
+    assert _resummarizer(db, backend).advance(str(job['_id'])) == 'completed'
+
+    assert db.get_batch_job(job['_id'])['counts'] == {'submitted': 4, 'completed': 3, 'failed': 1}
+    assert 'summary' not in db.episodes[2]
+
+
+class CrashAfterSubmit(LocalBatchBackend):
+    """Submits the first page, then the worker 'dies' before the batch is recorded."""
+
+    def submit(self, requests, idempotency_key=None):
+        super().submit(requests, idempotency_key)
+        raise RuntimeError("worker lost")
+
+
+def test_resume_after_crash_between_submit_and_record():
+    db = MemoryDB(4)
+    job = db.create_batch_job({'category': 'news'})
+    resummarizer = _resummarizer(db, CrashAfterSubmit())
+    try:
+        resummarizer.advance(str(job['_id']))
+        raise AssertionError("the crash should propagate")
+    except RuntimeError:
+        pass
+    assert db.get_batch_job(job['_id'])['submitting']
+
+    # The retry finds the submitted batch by its key instead of submitting the page again
+    resummarizer.backend = LocalBatchBackend()
+    assert resummarizer.advance(str(job['_id'])) == 'completed'
+    job = db.get_batch_job(job['_id'])
+    assert len(LocalBatchBackend._batches) == 2
+    assert job['counts'] == {'submitted': 4, 'completed': 4, 'failed': 0}
+    assert 'submitting' not in job
+
+
+def test_failed_job_resumes_from_cursor():
+    db = MemoryDB(4)
+    job = db.create_batch_job({'category': 'news'})
+    resummarizer = _resummarizer(db)
+    batch_resummarizer.BATCH_MAX_IN_FLIGHT, max_in_flight = 1, batch_resummarizer.BATCH_MAX_IN_FLIGHT
+    try:
+        # One page goes out, then the job fails (e.g. retries ran out on a polling error)
+        resummarizer._submit_next_page(db.get_batch_job(job['_id']))
+        db.update_batch_job(job['_id'], {'$set': {'status': 'failed', 'error_message': 'poll failed'}})
+
+        assert resummarizer.advance(str(job['_id'])) == 'completed'
+    finally:
+        batch_resummarizer.BATCH_MAX_IN_FLIGHT = max_in_flight
+    job = db.get_batch_job(job['_id'])
+    assert job['counts'] == {'submitted': 4, 'completed': 4, 'failed': 0}
+    assert 'error_message' not in job
+    assert len(LocalBatchBackend._batches) == 2
+
+
+def test_page_is_submitted_once_by_racing_runs():
+    db = MemoryDB(4)
+    job = db.create_batch_job({'category': 'news'})
+    resummarizer = _resummarizer(db)
+    # Two runs read the job before either claims the first page
+    first, second = db.get_batch_job(job['_id']), db.get_batch_job(job['_id'])
+    assert resummarizer._submit_next_page(first)
+    assert not resummarizer._submit_next_page(second)
+    assert len(LocalBatchBackend._batches) == 1
+    assert db.get_batch_job(job['_id'])['counts']['submitted'] == 2
+
+
+if __name__ == "__main__":
+    tests = [(name, fn) for name, fn in list(globals().items()) if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {e!r}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Test the direct enclosure downloader against a local HTTP server (no network needed):
+full download, resume after a dropped connection, restart when the file changed,
+and size/checksum verification.
+"""
+import base64
+import hashlib
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import http_downloader
+from http_downloader import DownloadIntegrityError, EnclosureDownloader
+
+http_downloader.HTTP_RESUME_DELAY_S = 0
+# A read cut short by a dropped connection loses its chunk; small chunks keep the resume points exact
+http_downloader.HTTP_CHUNK_BYTES = 1000
+
+AUDIO = bytes(range(256)) * 4096  # 1 MiB
+
+
+class EnclosureHandler(BaseHTTPRequestHandler):
+    """Serves AUDIO at /episode.mp3 with ETag and Range support.
+
+    Server attributes: `etag`, `drop_after` (bytes sent before the next
+    response is cut off), `content_md5` and `slow` (stream the body slowly).
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Content-Length', str(len(AUDIO)))
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        start = 0
+        status = 200
+        range_header = self.headers.get('Range')
+        if range_header and self.headers.get('If-Range') in (None, server.etag):
+            start = int(range_header.split('=')[1].split('-')[0])
+            if start >= len(AUDIO):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(AUDIO)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
+
+        body = AUDIO[start:]
+        self.send_response(status)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{len(AUDIO) - 1}/{len(AUDIO)}')
+        if server.content_md5:
+            self.send_header('Content-MD5', server.content_md5)
+        self.end_headers()
+
+        if server.drop_after:
+            # Send part of the body, then drop the connection
+            self.wfile.write(body[:server.drop_after])
+            server.drop_after = 0
+            self.close_connection = True
+            return
+        if server.slow:
+            for start in range(0, len(body), 64 * 1024):
+                self.wfile.write(body[start:start + 64 * 1024])
+                time.sleep(0.02)
+            return
+        self.wfile.write(body)
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EnclosureHandler)
+    server.etag = '"v1"'
+    server.drop_after = 0
+    server.content_md5 = None
+    server.slow = False
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _url(server, path='/episode.mp3'):
+    return f'http://127.0.0.1:{server.server_address[1]}{path}'
+
+
+def _downloader():
+    downloader = EnclosureDownloader()
+    downloader.debug = False
+    return downloader
+
+
+def test_full_download():
+    server = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = Path(tmp) / 'episode.mp3'
+            result = _downloader().download(_url(server), dest)
+            assert dest.read_bytes() == AUDIO
+            assert result['bytes'] == len(AUDIO)
+            assert not result['resumed']
+            assert not list(Path(tmp).glob('*.part*'))
+    finally:
+        server.shutdown()
+
+
+def test_resume_after_dropped_connection():
+    server = start_server()
+    server.drop_after = 300_000
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = Path(tmp) / 'episode.mp3'
+            result = _downloader().download(_url(server), dest)
+            assert dest.read_bytes() == AUDIO
+            assert result['resumed']
+            # Only the missing tail was fetched again
+            assert server.requests[-1]['Range'] == 'bytes=300000-'
+            assert server.requests[-1]['If-Range'] == '"v1"'
+            assert result['bytes_transferred'] == len(AUDIO)
+    finally:
+        server.shutdown()
+
+
+def test_resume_partial_file_from_earlier_run():
+    server = start_server()
+    server.drop_after = 500_000
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = Path(tmp) / 'episode.mp3'
+            http_downloader.HTTP_MAX_RESUMES, max_resumes = 0, http_downloader.HTTP_MAX_RESUMES
+            try:
+                _downloader().download(_url(server), dest)
+                raise AssertionError("dropped connection should fail without resumes")
+            except Exception as e:
+                assert not isinstance(e, AssertionError)
+            finally:
+                http_downloader.HTTP_MAX_RESUMES = max_resumes
+            assert Path(tmp, 'episode.mp3.part').stat().st_size == 500_000
+
+            # A new run (e.g. a task retry) picks up the partial file
+            result = _downloader().download(_url(server), dest)
+            assert dest.read_bytes() == AUDIO
+            assert result['resumed']
+            assert result['bytes_transferred'] == len(AUDIO) - 500_000
+    finally:
+        server.shutdown()
+
+
+def test_changed_file_restarts_download():
+    server = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = Path(tmp) / 'episode.mp3'
+            Path(tmp, 'episode.mp3.part').write_bytes(b'x' * 1000)
+            Path(tmp, 'episode.mp3.part.json').write_text('{"etag": "\\"v0\\"", "total": 1048576}')
+
+            # The ETag no longer matches, so the server sends the whole (new) file
+            result = _downloader().download(_url(server), dest)
+            assert dest.read_bytes() == AUDIO
+            assert result['bytes_transferred'] == len(AUDIO)
+    finally:
+        server.shutdown()
+
+
+def test_complete_partial_file_is_finalized():
+    server = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = Path(tmp) / 'episode.mp3'
+            Path(tmp, 'episode.mp3.part').write_bytes(AUDIO)
+            Path(tmp, 'episode.mp3.part.json').write_text('{"etag": "\\"v1\\"", "total": 1048576}')
+
+            result = _downloader().download(_url(server), dest)
+            assert dest.read_bytes() == AUDIO
+            assert result['bytes_transferred'] == 0
+    finally:
+        server.shutdown()
+
+
+def test_checksum_verified():
+    server = start_server()
+    server.content_md5 = base64.b64encode(hashlib.md5(b'other').digest()).decode()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = Path(tmp) / 'episode.mp3'
+            try:
+                _downloader().download(_url(server), dest)
+                raise AssertionError("checksum mismatch not detected")
+            except DownloadIntegrityError:
+                pass
+            assert not dest.exists()
+            assert not Path(tmp, 'episode.mp3.part').exists()
+
+            server.content_md5 = base64.b64encode(hashlib.md5(AUDIO).digest()).decode()
+            _downloader().download(_url(server), dest)
+            assert dest.read_bytes() == AUDIO
+    finally:
+        server.shutdown()
+
+
+def test_concurrent_downloads_share_one_file():
+    server = start_server()
+    server.slow = True
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = Path(tmp) / 'episode.mp3'
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(_downloader().download(_url(server), dest)))
+                for _ in range(2)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert dest.read_bytes() == AUDIO
+            # One download fetched the file, the other waited and reused it
+            assert sorted(r['bytes_transferred'] for r in results) == [0, len(AUDIO)]
+            assert len(server.requests) == 1
+            assert not list(Path(tmp).glob('*.part*')) and not list(Path(tmp).glob('*.lock'))
+    finally:
+        server.shutdown()
+
+
+def test_direct_audio_detection():
+    server = start_server()
+    try:
+        downloader = _downloader()
+        assert downloader.is_direct_audio(_url(server))
+        # No audio extension: decided by the HEAD Content-Type
+        assert downloader.is_direct_audio(_url(server, '/enclosure?id=42'))
+        assert not downloader.is_direct_audio('https://www.youtube.com/watch?v=abc123')
+        assert not downloader.is_direct_audio('https://youtu.be/abc123')
+    finally:
+        server.shutdown()
+
+
+def test_extension_for():
+    downloader = _downloader()
+    assert downloader.extension_for('https://cdn.example.com/show/episode.M4A?x=1') == '.m4a'
+    assert downloader.extension_for('https://example.com/play?id=1', 'audio/mp4') == '.m4a'
+    assert downloader.extension_for('https://example.com/play?id=1') == '.mp3'
+
+
+if __name__ == "__main__":
+    tests = [(name, fn) for name, fn in list(globals().items()) if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {e!r}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Test transcription planning without ffmpeg or Whisper models: how audio is
+split for distributed transcription, how the parallel path recovers from a
+killed worker, how the language is detected and how profiles are chosen.
+"""
+import tempfile
+from concurrent.futures import Future
+from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import numpy as np
+
+import transcriber
+from transcriber import AudioTranscriber
+
+
+@contextmanager
+def _patched(**values):
+    """Temporarily replace transcriber module globals."""
+    originals = {name: getattr(transcriber, name) for name in values}
+    for name, value in values.items():
+        setattr(transcriber, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(transcriber, name, value)
+
+
+def _transcriber():
+    audio_transcriber = AudioTranscriber()
+    audio_transcriber.debug = False
+    return audio_transcriber
+
+
+def _split_commands(audio_transcriber, duration, silences=()):
+    """Run _split_audio with ffmpeg replaced by a recorder; returns the ffmpeg command."""
+    commands = []
+
+    def fake_run(cmd, **kwargs):
+        commands.append(cmd)
+        segment_list = Path(cmd[cmd.index("-segment_list") + 1])
+        segment_list.write_text("chunk_000.mp3,0.000000,10.000000\n")
+
+    run, transcriber.subprocess.run = transcriber.subprocess.run, fake_run
+    audio_transcriber._detect_silences = lambda path: list(silences)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            audio_transcriber._split_audio("episode.mp3", tmp, duration, chunk_s=1800)
+    finally:
+        transcriber.subprocess.run = run
+    return commands[0]
+
+
+def test_split_without_cuts_keeps_segment_time():
+    # Short enough for no cuts: must not fall back to ffmpeg's 2 s segments
+    cmd = _split_commands(_transcriber(), duration=2000)
+    assert cmd[cmd.index("-segment_time") + 1] == "1800"
+    assert "-segment_times" not in cmd
+
+
+def test_split_cuts_at_silences():
+    cmd = _split_commands(_transcriber(), duration=5400, silences=[(1790, 1792), (3650, 3652)])
+    assert cmd[cmd.index("-segment_times") + 1] == "1791.0,3651.0"
+
+
+def test_split_ignores_local_memory_plan():
+    audio_transcriber = _transcriber()
+    audio_transcriber.chunk_s = 4 * 3600  # e.g. planned on a worker with lots of free memory
+    cmd = _split_commands(audio_transcriber, duration=5400)
+    assert cmd[cmd.index("-segment_times") + 1] == "1800.0,3600.0"
+
+
+def test_streamed_windows_cut_at_silences():
+    rate = 100  # keeps the fake PCM small
+    pcm = np.random.default_rng(0).integers(-10000, 10000, 5400 * rate).astype(np.int16)
+    for start, end in [(1790, 1792), (3650, 3652)]:
+        pcm[start * rate:end * rate] = 0
+    data = pcm.tobytes()
+
+    def fake_blocks(path):
+        for offset in range(0, len(data), 77777):
+            yield data[offset:offset + 77777]
+
+    with _patched(SAMPLE_RATE=rate, _iter_pcm_blocks=fake_blocks):
+        windows = list(transcriber._iter_pcm_windows_at_silences("episode.opus", 5400, target=1800))
+
+    assert [offset for offset, _ in windows] == [0, 1791, 3651]
+    assert np.array_equal(np.concatenate([window for _, window in windows]), pcm)
+
+
+def test_streamed_windows_stay_bounded_past_probed_duration():
+    rate = 100
+    pcm = np.random.default_rng(1).integers(-10000, 10000, 9000 * rate).astype(np.int16)
+    data = pcm.tobytes()
+
+    with _patched(SAMPLE_RATE=rate, _iter_pcm_blocks=lambda path: iter([data[:len(data) // 2], data[len(data) // 2:]])):
+        # Probed at 30 minutes, actually 2.5 hours
+        windows = list(transcriber._iter_pcm_windows_at_silences("episode.mp3", 1800, target=1800))
+
+    assert max(len(window) for _, window in windows) <= (1800 + 450) * rate
+    assert np.array_equal(np.concatenate([window for _, window in windows]), pcm)
+
+
+def test_memory_retry_resumes_after_last_segment():
+    audio_transcriber = _transcriber()
+    audio_transcriber.chunk_s = 600
+    calls = []
+
+    def fake_segments(audio, offset=0.0):
+        # The first pass runs out of memory after three segments; the retry
+        # segments differ, as Whisper's would on differently cut audio
+        calls.append(offset)
+        length = 10 if len(calls) == 1 else 12
+        end_of_audio = offset + len(audio) / 10
+        start = offset
+        while start < end_of_audio:
+            if len(calls) == 1 and start >= 30:
+                raise MemoryError("only 100 MB free")
+            yield start, min(start + length, end_of_audio), ""
+            start += length
+
+    audio_transcriber._iter_file_segments = fake_segments
+    with _patched(SAMPLE_RATE=10):
+        segments = list(audio_transcriber._iter_window_segments(0.0, np.zeros(12000, dtype=np.int16)))
+
+    assert audio_transcriber.chunk_s == 300
+    assert calls[1] == 30
+    assert all(abs(prev[1] - seg[0]) < 1e-6 for prev, seg in zip(segments, segments[1:]))
+    assert abs(segments[-1][1] - 1200) < 1e-6
+
+
+class FlakyPool:
+    """In-process stand-in for ProcessPoolExecutor whose first pool breaks on its third submit."""
+    pools = 0
+
+    def __init__(self, max_workers, **kwargs):
+        FlakyPool.pools += 1
+        self.break_on_submit = 3 if FlakyPool.pools == 1 else None
+        self.submitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        if self.submitted == self.break_on_submit:
+            raise BrokenProcessPool("a worker was killed")
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_parallel_windows_survive_broken_pool():
+    audio_transcriber = _transcriber()
+    audio_transcriber.workers = 2
+    audio_transcriber.chunk_s = 600
+    FlakyPool.pools = 0
+    with _patched(
+        SAMPLE_RATE=10,  # keeps the fake PCM small
+        ProcessPoolExecutor=FlakyPool,
+        _transcribe_chunk_in_worker=lambda pcm, offset: [(offset, offset + len(pcm) / 10, "")],
+    ):
+        # Two 40-minute windows: each is split into pieces, and the pool breaks
+        # with one piece being submitted and another still unsubmitted
+        windows = [(0.0, np.zeros(24000, dtype=np.int16)), (2400.0, np.zeros(24000, dtype=np.int16))]
+        segments = list(audio_transcriber._iter_windows_parallel(windows))
+
+    assert FlakyPool.pools == 2
+    assert audio_transcriber.chunk_s == 300
+    # Every second of audio transcribed exactly once, in order
+    assert segments[0][0] == 0
+    assert all(abs(prev[1] - seg[0]) < 1e-6 for prev, seg in zip(segments, segments[1:]))
+    assert abs(segments[-1][1] - 4800) < 1e-6
+
+
+def test_select_profile_defaults_without_setting():
+    assert transcriber.select_profile(None, backlog=0) == transcriber.DEFAULT_PROFILE
+    assert transcriber.select_profile('', backlog=100) == transcriber.DEFAULT_PROFILE
+    assert transcriber.select_profile('accurate', backlog=100) == 'accurate'
+    # Backlog-driven choice only when the feed opted in
+    assert transcriber.select_profile('auto', backlog=0) == 'accurate'
+    assert transcriber.select_profile('auto', backlog=transcriber.AUTO_PROFILE_BACKLOG_HIGH + 1) == 'fast'
+
+
+class FakeDetector:
+    """Whisper stand-in whose language probabilities depend on the excerpt's level."""
+
+    def detect_language(self, audio):
+        if audio.max() > 0.4:
+            return 'en', 0.9, [('en', 0.9), ('de', 0.1)]
+        return 'de', 0.7, [('de', 0.7), ('en', 0.3)]
+
+
+def _resolve_language(levels, duration):
+    """resolve_language over excerpts at the given levels (None = no speech); returns (language, model, reads)."""
+    reads = []
+
+    def fake_read(path, start, length):
+        reads.append(start)
+        return np.full(100, int(levels[len(reads) - 1] * 32767) if levels[len(reads) - 1] else 0, dtype=np.int16)
+
+    audio_transcriber = _transcriber()
+    with _patched(
+        _read_pcm=fake_read,
+        _speech_only=lambda audio: audio if audio.any() else None,
+        _load_model=lambda *args, **kwargs: FakeDetector(),
+    ):
+        language = audio_transcriber.resolve_language("episode.opus", duration)
+    return language, audio_transcriber.model_name, reads
+
+
+def test_language_detected_across_the_file():
+    # The intro (first excerpt) has no speech; the rest is English
+    language, model_name, reads = _resolve_language([None, 0.5, 0.5, 0.5, 0.5], duration=3600)
+    assert language == 'en' and model_name.endswith('.en')
+    assert len(reads) == transcriber.LANGUAGE_DETECT_SAMPLES
+    assert reads[0] > 0 and reads[-1] > 3600 * 0.75
+
+
+def test_uncertain_language_is_not_pinned():
+    # Mixed excerpts average to 0.66 English: keep the multilingual weights
+    language, model_name, _ = _resolve_language([0.5, 0.5, 0.5, 0.1, 0.1], duration=3600)
+    assert language is None
+    assert not model_name.endswith('.en')
+
+
+if __name__ == "__main__":
+    tests = [(name, fn) for name, fn in list(globals().items()) if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {e!r}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    raise SystemExit(1 if failed else 0)
@@ -1,29 +1,628 @@
 """
-Audio transcription using faster-whisper with chunked processing
-to avoid OOM on long episodes.
+Audio transcription using faster-whisper. Audio is decoded once through an
+ffmpeg pipe and transcribed in in-memory windows to avoid OOM on long episodes.
 """
 import os
+import re
 import subprocess
-import tempfile
-import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from faster_whisper import WhisperModel
+from collections import OrderedDict, deque
+import numpy as np
+from faster_whisper import WhisperModel, BatchedInferencePipeline
+from faster_whisper.vad import get_speech_timestamps
+from audio_probe import probe_duration
+from metrics import current_rss_mb
+from segment_index import SegmentIndex
 import time
 from datetime import datetime
 
-# Maximum chunk duration in seconds (30 minutes).
-# Keeps peak memory well under 2 GB even for stereo 44.1 kHz audio.
-CHUNK_DURATION_S = 1800
+# Whisper's native input: 16 kHz mono. Audio is decoded once by a single ffmpeg
+# process piping 16-bit PCM, and sliced into in-memory windows.
+SAMPLE_RATE = 16000
+PCM_READ_BYTES = 1 << 20
+SILENCE_FRAME_S = 0.1  # RMS frame for silence detection on PCM
 
-# Files longer than this threshold (in seconds) will be split into chunks.
-CHUNK_THRESHOLD_S = 2400  # 40 minutes
+# Chunk (window) length is sized from the memory available to this process
+# (cgroup limits included) and the model's footprint, so small workers chunk
+# finely and big ones don't chunk at all. CHUNK_DURATION_S > 0 pins it instead.
+# Files up to 25% longer than the chunk length are transcribed in one piece.
+CHUNK_DURATION_S = int(os.getenv('CHUNK_DURATION_S', '0'))
+DEFAULT_CHUNK_DURATION_S = 1800  # when memory can't be read
+MIN_CHUNK_DURATION_S = 300
+MAX_CHUNK_DURATION_S = 4 * 3600
+MEMORY_HEADROOM = 0.8
+
+# Chunk length for distributed transcription. The chunks are transcribed on
+# other workers, so this is a fixed cluster setting, not planned from memory here.
+DISTRIBUTED_CHUNK_S = int(os.getenv('DISTRIBUTED_CHUNK_S', '1800'))
+
+# Transcription memory per second of audio in a window (PCM, float copy and
+# log-mel features), and model footprints (int8) until measured at load time.
+WINDOW_MEMORY_MB_PER_S = 0.35
+MODEL_MEMORY_MB = {'tiny': 150, 'base': 250, 'small': 600, 'medium': 1500, 'large': 3200}
+
+# Watchdog: when free memory drops below this while a window is transcribed,
+# the window is abandoned and retried in halves (and the chunk size shrinks)
+# rather than letting the kernel OOM-kill the worker.
+WATCHDOG_MIN_FREE_MB = int(os.getenv('TRANSCRIBE_WATCHDOG_MIN_FREE_MB', '200'))
+WATCHDOG_INTERVAL_S = 0.5
+
+# Silence-aware chunking: instead of cutting at exact chunk-length
+# multiples (mid-word), each cut is moved to the silence closest to the target
+# within +/- SPLIT_SEARCH_WINDOW_S. A silence is at least SILENCE_MIN_S below
+# SILENCE_NOISE_DB. Local transcription finds them in the PCM it is already
+# streaming (frame RMS); distributed splits, which stream-copy the file without
+# decoding it, use ffmpeg silencedetect.
+VAD_CHUNKING = os.getenv('VAD_CHUNKING', 'true').lower() == 'true'
+SILENCE_NOISE_DB = int(os.getenv('SILENCE_NOISE_DB', '-35'))
+SILENCE_MIN_S = float(os.getenv('SILENCE_MIN_S', '0.5'))
+SPLIT_SEARCH_WINDOW_S = float(os.getenv('SPLIT_SEARCH_WINDOW_S', '120'))
+
+# Skip non-speech (silence, music beds, ad gaps) inside each chunk with
+# faster-whisper's Silero VAD before decoding.
+WHISPER_VAD_FILTER = os.getenv('WHISPER_VAD_FILTER', 'true').lower() == 'true'
+
+# Named speed/quality trade-offs, assignable per feed ('transcription_profile').
+# 'balanced' matches the original hardcoded settings.
+TRANSCRIPTION_PROFILES = {
+    'fast': {'model_size': 'tiny', 'beam_size': 1},
+    'balanced': {'model_size': 'base', 'beam_size': 5},
+    'accurate': {'model_size': 'small', 'beam_size': 5},
+}
+DEFAULT_PROFILE = os.getenv('TRANSCRIPTION_PROFILE', 'balanced')
+
+# The 'auto' profile follows the backlog of episodes waiting to be processed:
+# above AUTO_PROFILE_BACKLOG_HIGH it downgrades to 'fast', at or below
+# AUTO_PROFILE_BACKLOG_IDLE (workers idle) it upgrades to 'accurate'.
+AUTO_PROFILE_BACKLOG_HIGH = int(os.getenv('AUTO_PROFILE_BACKLOG_HIGH', '20'))
+AUTO_PROFILE_BACKLOG_IDLE = int(os.getenv('AUTO_PROFILE_BACKLOG_IDLE', '1'))
+
+# Language is detected once per episode unless declared by the feed, then
+# pinned for every window. The opening seconds are often music or an ad, so
+# detection listens to LANGUAGE_DETECT_SAMPLES excerpts spread across the file,
+# keeps up to LANGUAGE_DETECT_S seconds of VAD speech from each and averages
+# the language probabilities. A language below LANGUAGE_MIN_PROBABILITY is not
+# pinned (each window detects its own). English episodes use the English-only
+# weights, which are faster and more accurate.
+LANGUAGE_DETECT_S = 30
+LANGUAGE_DETECT_SAMPLES = int(os.getenv('LANGUAGE_DETECT_SAMPLES', '5'))
+LANGUAGE_SAMPLE_S = 90  # audio decoded around each sample point
+LANGUAGE_MIN_PROBABILITY = float(os.getenv('LANGUAGE_MIN_PROBABILITY', '0.8'))
+ENGLISH_ONLY_MODELS = {'tiny', 'base', 'small', 'medium'}
+
+# Loaded models stay warm in the process between episodes (least recently
+# used beyond this count are dropped).
+MAX_WARM_MODELS = int(os.getenv('WHISPER_MAX_WARM_MODELS', '3'))
+
+# Batched inference: decode many VAD speech segments of a file at once through
+# faster-whisper's BatchedInferencePipeline (much higher CPU throughput).
+# WHISPER_BATCH_SIZE=0 sizes the batch from available memory.
+WHISPER_BATCHED = os.getenv('WHISPER_BATCHED', 'false').lower() == 'true'
+WHISPER_BATCH_SIZE = int(os.getenv('WHISPER_BATCH_SIZE', '0'))
+MAX_BATCH_SIZE = 32
+
+# Approximate extra memory per batch item (MB), by model size
+BATCH_ITEM_MEMORY_MB = {'tiny': 40, 'base': 60, 'small': 120, 'medium': 250, 'large': 500}
+
+# Worker processes used to transcribe chunks in parallel (1 = sequential,
+# in-process). Each process loads its own model with cpu_threads sized so that
+# processes x threads matches the available cores.
+TRANSCRIBE_WORKERS = int(os.getenv('TRANSCRIBE_WORKERS', '1'))
+
+# Minimum seconds between progress reports (percent, real-time factor, ETA)
+PROGRESS_INTERVAL_S = float(os.getenv('TRANSCRIBE_PROGRESS_INTERVAL_S', '15'))
+
+# Size of the transcript pieces yielded by transcribe_stream (~3k tokens),
+# small enough for the cleaner to return each piece without truncation.
+STREAM_PIECE_CHARS = int(os.getenv('STREAM_PIECE_CHARS', '12000'))
+
+
+def _available_cpus():
+    """Number of CPUs this process may run on (respects affinity / container cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def select_profile(requested=None, backlog=None):
+    """Resolve a feed's profile setting to a concrete profile name.
+
+    'auto' (opt-in) picks a profile from the current backlog size; no setting
+    and unknown names fall back to DEFAULT_PROFILE.
+    """
+    requested = (requested or '').strip().lower()
+    if requested in TRANSCRIPTION_PROFILES:
+        return requested
+    if requested == 'auto' and backlog is not None:
+        if backlog > AUTO_PROFILE_BACKLOG_HIGH:
+            return 'fast'
+        if backlog <= AUTO_PROFILE_BACKLOG_IDLE:
+            return 'accurate'
+    return DEFAULT_PROFILE
+
+
+def transcription_progress(position, duration, elapsed):
+    """Progress of a transcription that has reached `position` seconds of audio.
+
+    Returns percent complete, the real-time factor so far (wall seconds per
+    audio second) and the ETA in seconds extrapolated from it.
+    """
+    progress = {
+        'audio_position_s': round(position, 1),
+        'audio_duration_s': round(duration, 1) if duration else None,
+        'elapsed_s': round(elapsed, 1),
+        'percent': None,
+        'real_time_factor': None,
+        'eta_s': None,
+    }
+    if position > 0:
+        rtf = elapsed / position
+        progress['real_time_factor'] = round(rtf, 4)
+        if duration:
+            position = min(position, duration)
+            progress['percent'] = round(100 * position / duration, 1)
+            progress['eta_s'] = round((duration - position) * rtf)
+    return progress
+
+
+def model_name_for_language(model_size, language=None):
+    """English-only weights ('base.en') for English audio where they exist."""
+    if language == 'en' and model_size in ENGLISH_ONLY_MODELS:
+        return f"{model_size}.en"
+    return model_size
+
+
+_warm_models = OrderedDict()
+
+
+def _load_model(model_name, compute_type, device="auto", cpu_threads=0):
+    """WhisperModel from the per-process warm cache, loading it on first use."""
+    key = (model_name, compute_type, device, cpu_threads)
+    if key in _warm_models:
+        _warm_models.move_to_end(key)
+        return _warm_models[key]
+    rss_before = current_rss_mb()
+    model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+    rss_after = current_rss_mb()
+    if rss_before is not None and rss_after is not None and rss_after > rss_before:
+        _model_footprint_mb[model_name] = rss_after - rss_before
+    _warm_models[key] = model
+    while len(_warm_models) > MAX_WARM_MODELS:
+        _warm_models.popitem(last=False)
+    return model
+
+
+def _transcribe_options(beam_size=5, batch_size=None, language=None):
+    """Keyword arguments for WhisperModel.transcribe shared by every code path.
+
+    With `batch_size` set the options target BatchedInferencePipeline, which
+    always segments the audio with VAD. A pinned `language` skips detection.
+    """
+    options = {'beam_size': beam_size}
+    if language:
+        options['language'] = language
+    if WHISPER_VAD_FILTER or batch_size:
+        options['vad_filter'] = True
+        options['vad_parameters'] = {'min_silence_duration_ms': 500}
+    if batch_size:
+        options['batch_size'] = batch_size
+    return options
+
+
+# (limit, usage, stat) files of cgroup v2 and v1 memory controllers
+CGROUP_MEMORY_FILES = [
+    ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current', '/sys/fs/cgroup/memory.stat', 'inactive_file'),
+    ('/sys/fs/cgroup/memory/memory.limit_in_bytes', '/sys/fs/cgroup/memory/memory.usage_in_bytes',
+     '/sys/fs/cgroup/memory/memory.stat', 'total_inactive_file'),
+]
+
+
+def _cgroup_available_mb():
+    """Headroom under the container's memory limit in MB (None without a limit)."""
+    for limit_path, usage_path, stat_path, inactive_key in CGROUP_MEMORY_FILES:
+        try:
+            with open(limit_path) as f:
+                limit = f.read().strip()
+            with open(usage_path) as f:
+                usage = int(f.read())
+        except (OSError, ValueError):
+            continue
+        if limit == 'max' or int(limit) >= 1 << 60:
+            return None
+        # Inactive page cache counts as usage but is reclaimed before an OOM kill
+        try:
+            with open(stat_path) as f:
+                for line in f:
+                    key, value = line.split()
+                    if key == inactive_key:
+                        usage -= int(value)
+                        break
+        except (OSError, ValueError):
+            pass
+        return max(0, int(limit) - usage) / 1024 / 1024
+    return None
+
+
+def _available_memory_mb():
+    """Memory available to new allocations in MB: MemAvailable, capped by the cgroup limit."""
+    available = None
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    available = int(line.split()[1]) / 1024
+                    break
+    except OSError:
+        pass
+    cgroup = _cgroup_available_mb()
+    if cgroup is not None:
+        available = cgroup if available is None else min(available, cgroup)
+    return available
+
+
+# Resident memory each loaded model added to this process, in MB
+_model_footprint_mb = {}
+
+
+def _model_memory_mb(model_name):
+    """Measured footprint of a model, or the estimate for its size until it is loaded."""
+    if model_name in _model_footprint_mb:
+        return _model_footprint_mb[model_name]
+    return MODEL_MEMORY_MB.get(model_name.split('.')[0].split('-')[0], 1500)
+
+
+def plan_chunking(model_name, workers=1, available_mb=None, model_loaded=False):
+    """Chunk length (seconds) and worker count that fit in available memory.
+
+    Each worker process needs the model plus one window of audio; the
+    in-process path needs only the window once the model is loaded.
+    Returns (chunk_duration_s, workers).
+    """
+    if available_mb is None:
+        available_mb = _available_memory_mb()
+    if CHUNK_DURATION_S > 0 or available_mb is None:
+        return CHUNK_DURATION_S or DEFAULT_CHUNK_DURATION_S, workers
+    budget = available_mb * MEMORY_HEADROOM
+    model_mb = _model_memory_mb(model_name)
+    if workers > 1:
+        min_worker_mb = model_mb + MIN_CHUNK_DURATION_S * WINDOW_MEMORY_MB_PER_S
+        workers = max(1, min(workers, int(budget // min_worker_mb)))
+    if workers > 1 or not model_loaded:
+        per_worker_mb = budget / workers - model_mb
+    else:
+        per_worker_mb = budget
+    chunk = per_worker_mb / WINDOW_MEMORY_MB_PER_S
+    return int(max(MIN_CHUNK_DURATION_S, min(MAX_CHUNK_DURATION_S, chunk))), workers
+
+
+class MemoryPressureError(MemoryError):
+    """Free memory fell below the watchdog floor while transcribing."""
+
+
+class MemoryWatchdog:
+    """Samples free memory in the background while a window is transcribed.
+
+    check() raises MemoryPressureError once free memory dropped below
+    WATCHDOG_MIN_FREE_MB, so the caller can back off between segments.
+    """
+
+    def __init__(self, min_free_mb=WATCHDOG_MIN_FREE_MB):
+        self.min_free_mb = min_free_mb
+        self.lowest_free_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _watch(self):
+        while not self._stop.is_set():
+            free = _available_memory_mb()
+            if free is not None and (self.lowest_free_mb is None or free < self.lowest_free_mb):
+                self.lowest_free_mb = free
+            self._stop.wait(WATCHDOG_INTERVAL_S)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def check(self):
+        if self.lowest_free_mb is not None and self.lowest_free_mb < self.min_free_mb:
+            raise MemoryPressureError(f"only {self.lowest_free_mb:.0f} MB free")
+
+
+def _auto_batch_size(model_size, workers=1):
+    """Largest batch that fits in half of the available memory, split across workers."""
+    if WHISPER_BATCH_SIZE > 0:
+        return WHISPER_BATCH_SIZE
+    available = _available_memory_mb()
+    if available is None:
+        return 8
+    per_item = BATCH_ITEM_MEMORY_MB.get(model_size.split('.')[0].split('-')[0], 250)
+    return max(1, min(MAX_BATCH_SIZE, int(available * 0.5 / workers / per_item)))
+
+
+def _choose_split_points(silences, duration, target=DEFAULT_CHUNK_DURATION_S, window=SPLIT_SEARCH_WINDOW_S):
+    """Pick cut times (seconds) roughly every `target` seconds, preferring silences.
+
+    `silences` is a list of (start, end). For each cut the silence whose
+    midpoint is closest to the ideal position (within `window`) wins; with no
+    silence nearby the cut falls back to the ideal position. The final chunk
+    may run up to 25% over `target` rather than leaving a tiny tail.
+    """
+    midpoints = sorted((start + end) / 2 for start, end in silences)
+    cuts = []
+    last_cut = 0.0
+    while duration - last_cut > target * 1.25:
+        ideal = last_cut + target
+        nearby = [m for m in midpoints if abs(m - ideal) <= window and m > last_cut]
+        cut = min(nearby, key=lambda m: abs(m - ideal)) if nearby else ideal
+        cuts.append(round(cut, 3))
+        last_cut = cut
+    return cuts
+
+
+def _split_pcm(offset, pcm, chunk_s):
+    """Split a PCM window into pieces of about `chunk_s` seconds, as (offset, samples)."""
+    size = int(chunk_s * SAMPLE_RATE)
+    if len(pcm) <= size * 1.25:
+        return [(offset, pcm)]
+    # Equal pieces rather than a short tail
+    pieces = -(-len(pcm) // size)
+    size = -(-len(pcm) // pieces)
+    return [(offset + start / SAMPLE_RATE, pcm[start:start + size]) for start in range(0, len(pcm), size)]
+
+
+def _pcm_to_float(pcm):
+    """int16 PCM samples to the float32 [-1, 1) array faster-whisper expects."""
+    return pcm.astype(np.float32) / 32768.0
+
+
+def _read_pcm(audio_file_path, start_s, length_s):
+    """int16 PCM of `length_s` seconds from `start_s` (ffmpeg seeks there; nothing before is decoded)."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start_s:.3f}", "-t", str(length_s), "-i", str(audio_file_path),
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-",
+    ]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {audio_file_path}: "
+                           f"{result.stderr.decode('utf-8', errors='replace').strip()}")
+    data = result.stdout
+    return np.frombuffer(data[:len(data) - len(data) % 2], dtype=np.int16)
+
+
+def _language_sample_starts(duration, samples=LANGUAGE_DETECT_SAMPLES):
+    """Start times of the excerpts language detection listens to, spread evenly over the file."""
+    if not duration or duration <= LANGUAGE_SAMPLE_S * samples:
+        # Short (or unknown length): consecutive excerpts from the start
+        return [i * LANGUAGE_SAMPLE_S for i in range(samples)
+                if not duration or i * LANGUAGE_SAMPLE_S < duration]
+    step = duration / samples
+    return [round(step * i + (step - LANGUAGE_SAMPLE_S) / 2, 3) for i in range(samples)]
+
+
+def _speech_only(audio, max_s=LANGUAGE_DETECT_S):
+    """The VAD speech of a float32 excerpt, joined and capped at `max_s` seconds."""
+    chunks = get_speech_timestamps(audio)
+    if not chunks:
+        return None
+    return np.concatenate([audio[c['start']:c['end']] for c in chunks])[:int(max_s * SAMPLE_RATE)]
+
+
+def _iter_pcm_blocks(audio_file_path):
+    """Raw 16 kHz mono s16le PCM of the file, decoded through one ffmpeg pipe."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", str(audio_file_path),
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            block = proc.stdout.read(PCM_READ_BYTES)
+            if not block:
+                break
+            yield block
+        stderr = proc.stderr.read().decode('utf-8', errors='replace').strip()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to decode {audio_file_path}: {stderr}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+def _iter_pcm_windows(audio_file_path, cuts=(), window_s=None):
+    """Decode audio through one ffmpeg pipe, yielding (start_seconds, int16 samples).
+
+    Windows end at each time in `cuts`; after the last cut a new window starts
+    every `window_s` seconds (or the rest of the file is one window). Only the
+    current window is held in memory and nothing is written to disk.
+    """
+    cut_samples = [int(cut * SAMPLE_RATE) for cut in cuts]
+    window_samples = int(window_s * SAMPLE_RATE) if window_s else None
+
+    def boundary_after(position):
+        for cut in cut_samples:
+            if cut > position:
+                return cut
+        return position + window_samples if window_samples else None
+
+    start = 0
+    end = boundary_after(start)
+    buffered = bytearray()
+    for block in _iter_pcm_blocks(audio_file_path):
+        buffered += block
+        while end is not None and len(buffered) >= (end - start) * 2:
+            size = (end - start) * 2
+            yield start / SAMPLE_RATE, np.frombuffer(bytes(buffered[:size]), dtype=np.int16)
+            del buffered[:size]
+            start, end = end, boundary_after(end)
+    tail = len(buffered) - len(buffered) % 2
+    if tail:
+        yield start / SAMPLE_RATE, np.frombuffer(bytes(buffered[:tail]), dtype=np.int16)
+
+
+def _silent_cut(pcm, ideal, window):
+    """Sample index to cut `pcm` at: the silence midpoint closest to `ideal` within +/- `window` samples.
+
+    Silences are runs of SILENCE_FRAME_S frames whose RMS stays below
+    SILENCE_NOISE_DB for at least SILENCE_MIN_S. Without one, `ideal` itself.
+    """
+    frame = int(SILENCE_FRAME_S * SAMPLE_RATE)
+    lo = max(0, ideal - window)
+    count = (min(len(pcm), ideal + window) - lo) // frame
+    if count <= 0:
+        return ideal
+    frames = pcm[lo:lo + count * frame].astype(np.float32).reshape(count, frame) / 32768.0
+    level_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+    silent = np.concatenate([[False], level_db < SILENCE_NOISE_DB, [False]])
+    edges = np.flatnonzero(silent[1:] != silent[:-1])
+    min_frames = max(1, round(SILENCE_MIN_S / SILENCE_FRAME_S))
+    midpoints = [lo + (run_start + run_end) * frame // 2
+                 for run_start, run_end in zip(edges[::2], edges[1::2]) if run_end - run_start >= min_frames]
+    midpoints = [m for m in midpoints if m > 0]
+    return min(midpoints, key=lambda m: abs(m - ideal)) if midpoints else ideal
+
+
+def _iter_pcm_windows_at_silences(audio_file_path, duration, target, window=SPLIT_SEARCH_WINDOW_S):
+    """Like _iter_pcm_windows with cuts from _choose_split_points, decoding the file once.
+
+    Each cut is looked for in the PCM as it streams: once `target` + `window`
+    seconds of the current window are buffered, it ends at the silence closest
+    to `target`. The final window may run up to 25% over `target`. `duration`
+    is only an estimate: past it, windows keep being cut once they outgrow
+    `target` plus that slack, so no window is unbounded.
+    """
+    target_samples = int(target * SAMPLE_RATE)
+    window_samples = int(window * SAMPLE_RATE)
+    slack_samples = max(int(target_samples * 0.25), window_samples)
+    total_samples = int(duration * SAMPLE_RATE)
+    start = 0
+    buffered = bytearray()
+    for block in _iter_pcm_blocks(audio_file_path):
+        buffered += block
+        while len(buffered) >= (target_samples + window_samples) * 2 and (
+                total_samples - start > target_samples * 1.25
+                # Longer than probed (e.g. VBR MP3 without a Xing header)
+                or len(buffered) > (target_samples + slack_samples) * 2):
+            pcm = np.frombuffer(bytes(buffered[:(target_samples + window_samples) * 2]), dtype=np.int16)
+            cut = _silent_cut(pcm, target_samples, window_samples)
+            yield start / SAMPLE_RATE, pcm[:cut]
+            del buffered[:cut * 2]
+            start += cut
+    tail = len(buffered) - len(buffered) % 2
+    if tail:
+        yield start / SAMPLE_RATE, np.frombuffer(bytes(buffered[:tail]), dtype=np.int16)
+
+
+# Per-process model used by the chunk worker pool
+_worker_model = None
+_worker_options = None
+
+
+def _init_chunk_worker(model_name, compute_type, cpu_threads, beam_size=5, batch_size=None, language=None):
+    """Pool initializer: load one WhisperModel per worker process."""
+    global _worker_model, _worker_options
+    _worker_model = _load_model(model_name, compute_type, device="cpu", cpu_threads=cpu_threads)
+    if batch_size:
+        _worker_model = BatchedInferencePipeline(model=_worker_model)
+    _worker_options = _transcribe_options(beam_size, batch_size, language)
+
+
+def _transcribe_chunk_in_worker(pcm, offset):
+    """Transcribe one int16 PCM window in a pool worker. Returns [(start, end, text)]."""
+    segments, _ = _worker_model.transcribe(_pcm_to_float(pcm), **_worker_options)
+    return [(offset + seg.start, offset + seg.end, seg.text.strip()) for seg in segments]
 
 
 class AudioTranscriber:
-    def __init__(self, model_size="base"):
-        self.model_size = model_size
+    def __init__(self, model_size=None, workers=None, batched=None, profile=None, beam_size=None, language=None,
+                 compute_type=None, cpu_threads=0):
+        self.profile = profile if profile in TRANSCRIPTION_PROFILES else DEFAULT_PROFILE
+        settings = TRANSCRIPTION_PROFILES[self.profile]
+        self.model_size = model_size or settings['model_size']
+        self.beam_size = beam_size or settings['beam_size']
+        self.compute_type = compute_type or "int8"
+        # CTranslate2 threads for the in-process model (0 = library default)
+        self.cpu_threads = cpu_threads
+        self.workers = max(1, workers or TRANSCRIBE_WORKERS)
+        self.batched = WHISPER_BATCHED if batched is None else batched
         self.debug = True
-        self.model = WhisperModel(model_size, device="auto", compute_type="int8")
+        self.batch_size = _auto_batch_size(self.model_size) if self.batched else None
+        # Declared language (e.g. from the feed); None = detect once per episode
+        self.language = (language or '').strip().lower() or None
+        # Timestamps of the most recent transcript (read by the pipeline)
+        self.last_segment_index = None
+        # Called with a transcription_progress() dict at most every PROGRESS_INTERVAL_S
+        self.progress_callback = None
+        # Chunk length in seconds, planned from available memory when transcription starts
+        self.chunk_s = None
+        self._pipelines = {}
+
+    @property
+    def model_name(self):
+        """Weights used for the current language ('base.en' for English)."""
+        return model_name_for_language(self.model_size, self.language)
+
+    @property
+    def model(self):
+        # Loaded on first use from the warm cache, so runs that resume past transcription load nothing
+        return _load_model(self.model_name, self.compute_type, cpu_threads=self.cpu_threads)
+
+    @property
+    def pipeline(self):
+        if not self.batched:
+            return None
+        if self.model_name not in self._pipelines:
+            self._pipelines[self.model_name] = BatchedInferencePipeline(model=self.model)
+        return self._pipelines[self.model_name]
+
+    def resolve_language(self, audio_file_path, duration=None):
+        """Pin the episode language, detecting it from speech across the file if not declared.
+
+        Returns None (nothing pinned) when no speech is found or no language
+        reaches LANGUAGE_MIN_PROBABILITY.
+        """
+        if self.language:
+            return self.language
+        if duration is None:
+            duration = self._get_audio_duration(audio_file_path)
+        excerpts = []
+        for start in _language_sample_starts(duration):
+            speech = _speech_only(_pcm_to_float(_read_pcm(audio_file_path, start, LANGUAGE_SAMPLE_S)))
+            if speech is not None:
+                excerpts.append(speech)
+        if not excerpts:
+            self._debug_log("No speech found for language detection; each window detects its own")
+            return None
+
+        # Detection needs the multilingual weights
+        detector = _load_model(self.model_size, self.compute_type)
+        scores = {}
+        for speech in excerpts:
+            _, _, probabilities = detector.detect_language(audio=speech)
+            for language, probability in probabilities:
+                scores[language] = scores.get(language, 0.0) + probability / len(excerpts)
+        language, probability = max(scores.items(), key=lambda item: item[1])
+        if probability < LANGUAGE_MIN_PROBABILITY:
+            self._debug_log(f"Language uncertain ('{language}' at {probability:.2f} over {len(excerpts)} "
+                            f"excerpts); each window detects its own")
+            return None
+        self.language = language
+        self._debug_log(f"Detected language '{language}' with probability {probability:.2f} over "
+                        f"{len(excerpts)} excerpts; pinned for the episode (model {self.model_name})")
+        return self.language
 
     def _debug_log(self, message):
         """Debug logging with timestamp"""
@@ -31,120 +630,349 @@ class AudioTranscriber:
             timestamp = datetime.now().strftime("%H:%M:%S")
             print(f"[{timestamp}] TRANSCRIBER: {message}")
 
-    def get_transcript_path(self, title):
+    @staticmethod
+    def get_transcript_path(title):
         """Get the path for the transcript file."""
         sanitized_title = "".join(c for c in title if c.isalnum() or c in (' ', '.', '_')).rstrip()
         transcript_filename = f"{sanitized_title.replace(' ', '_')}.txt"
         return Path("data/transcripts") / transcript_filename
 
     def _get_audio_duration(self, audio_file_path):
-        """Get duration of audio file in seconds using ffprobe."""
-        try:
-            result = subprocess.run(
-                ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", str(audio_file_path)],
-                capture_output=True, text=True, timeout=30,
-            )
-            info = json.loads(result.stdout)
-            return float(info["format"]["duration"])
-        except Exception as e:
-            self._debug_log(f"Could not determine duration via ffprobe: {e}")
-            return None
+        """Duration of the audio file in seconds (probed once per file, then cached)."""
+        duration = probe_duration(audio_file_path)
+        if duration is None:
+            self._debug_log(f"Could not determine duration of {audio_file_path} via ffprobe")
+        return duration
+
+    def _detect_silences(self, audio_file_path):
+        """Find silent stretches with ffmpeg silencedetect. Returns [(start, end)] in seconds."""
+        cmd = [
+            "ffmpeg", "-hide_banner", "-nostats", "-i", str(audio_file_path),
+            "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_S}",
+            "-f", "null", "-",
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        starts = [float(v) for v in re.findall(r"silence_start: (-?[\d.]+)", result.stderr)]
+        ends = [float(v) for v in re.findall(r"silence_end: (-?[\d.]+)", result.stderr)]
+        return list(zip(starts, ends))
+
+    def _split_audio(self, audio_file_path, tmp_dir, duration=None, chunk_s=DISTRIBUTED_CHUNK_S):
+        """Split audio into chunk files of about `chunk_s` seconds using ffmpeg (for distributed transcription).
+
+        Returns list of (chunk_path, start_seconds).
+        """
+        # Keep the source container: stream copy can't put e.g. AAC into an .mp3 file
+        suffix = Path(audio_file_path).suffix or ".mp3"
+        chunk_pattern = os.path.join(tmp_dir, f"chunk_%03d{suffix}")
+        segment_list = os.path.join(tmp_dir, "chunks.csv")
+
+        # Without cuts (short file) the segment muxer would fall back to its 2 s default
+        split_args = ["-segment_time", str(chunk_s)]
+        if duration:
+            cuts = self._window_cuts(audio_file_path, duration, target=chunk_s)
+            if cuts:
+                split_args = ["-segment_times", ",".join(str(c) for c in cuts)]
 
-    def _split_audio(self, audio_file_path, tmp_dir):
-        """Split audio into chunks using ffmpeg. Returns list of chunk paths."""
-        chunk_pattern = os.path.join(tmp_dir, "chunk_%03d.mp3")
         cmd = [
             "ffmpeg", "-i", str(audio_file_path),
-            "-f", "segment", "-segment_time", str(CHUNK_DURATION_S),
+            "-f", "segment", *split_args,
+            "-segment_list", segment_list, "-segment_list_type", "csv",
             "-c", "copy",  # no re-encoding, fast
             "-y", chunk_pattern,
         ]
-        self._debug_log(f"Splitting audio into {CHUNK_DURATION_S}s chunks...")
-        subprocess.run(cmd, capture_output=True, timeout=120, check=True)
+        self._debug_log(f"Splitting audio into ~{chunk_s}s chunks...")
+        subprocess.run(cmd, capture_output=True, check=True)
 
-        chunks = sorted(Path(tmp_dir).glob("chunk_*.mp3"))
+        # The segment list holds the real start time of every chunk: with
+        # stream copy, cuts snap to packet boundaries rather than exact multiples.
+        chunks = []
+        for line in Path(segment_list).read_text().splitlines():
+            name, start, _end = line.rsplit(",", 2)
+            chunks.append((Path(tmp_dir) / name, float(start)))
         self._debug_log(f"Created {len(chunks)} chunks")
         return chunks
 
-    def _transcribe_single(self, audio_file_path):
-        """Transcribe a single audio file and return (text, segment_count)."""
-        segments, info = self.model.transcribe(str(audio_file_path), beam_size=5)
-        texts = []
-        count = 0
-        for seg in segments:
-            texts.append(seg.text.strip())
-            count += 1
-        return " ".join(texts), count
-
-    def transcribe(self, audio_file_path, title="Podcast Episode"):
-        """Transcribe audio file using faster-whisper, chunking long files."""
-        self._debug_log(f"Starting transcription for: {title}")
-        self._debug_log(f"Using model: {self.model_size}")
+    def _report_progress(self, position, duration, elapsed):
+        progress = transcription_progress(position, duration, elapsed)
+        if progress['percent'] is not None:
+            self._debug_log(f"Progress: {progress['percent']}% (RTF {progress['real_time_factor']}, "
+                            f"ETA {progress['eta_s']}s)")
+        if self.progress_callback:
+            try:
+                self.progress_callback(progress)
+            except Exception as e:
+                self._debug_log(f"Progress callback failed: {e}")
 
-        start_time = time.time()
+    def _iter_file_segments(self, audio, offset=0.0):
+        """Transcribe an audio file or float32 16 kHz samples, yielding (start, end, text) shifted by `offset`."""
+        if isinstance(audio, (str, Path)):
+            audio = str(audio)
+        if self.pipeline is not None:
+            segments, info = self.pipeline.transcribe(
+                audio, **_transcribe_options(self.beam_size, self.batch_size, self.language)
+            )
+        else:
+            segments, info = self.model.transcribe(audio, **_transcribe_options(self.beam_size, language=self.language))
+        if not self.language:
+            self._debug_log(f"Detected language '{info.language}' with probability {info.language_probability}")
+        for i, segment in enumerate(segments):
+            if self.debug and (i % 20 == 0 or i == 0):
+                self._debug_log(f" > Transcribed segment {i+1}...")
+            yield offset + segment.start, offset + segment.end, segment.text.strip()
+
+    def plan_chunks(self):
+        """Size chunks and worker count for the memory available right now."""
+        model_loaded = any(key[0] == self.model_name for key in _warm_models)
+        self.chunk_s, workers = plan_chunking(self.model_name, self.workers, model_loaded=model_loaded)
+        if workers < self.workers:
+            self._debug_log(f"Memory allows {workers} of {self.workers} transcription workers")
+        self.workers = workers
+        self._debug_log(f"Chunk length {self.chunk_s}s ({_available_memory_mb() or 0:.0f} MB available, "
+                        f"model ~{_model_memory_mb(self.model_name):.0f} MB)")
+
+    def _shrink_chunks(self, reason, window_s=None):
+        """Halve the chunk length (or the failed window's) after memory pressure. False at the minimum."""
+        current = min(self.chunk_s, window_s) if window_s else self.chunk_s
+        if current <= MIN_CHUNK_DURATION_S:
+            return False
+        self.chunk_s = max(MIN_CHUNK_DURATION_S, int(current // 2))
+        self._debug_log(f"⚠️  Memory pressure ({reason}); chunk length reduced to {self.chunk_s}s")
+        return True
+
+    def _window_cuts(self, audio_file_path, duration, target=None):
+        """Cut times for splitting a file for distribution: at silences near every chunk length, or exact multiples."""
+        silences = self._detect_silences(audio_file_path) if VAD_CHUNKING else []
+        cuts = _choose_split_points(silences, duration, target=target or self.chunk_s)
+        self._debug_log(f"Found {len(silences)} silences; cutting at {', '.join(f'{c:.0f}s' for c in cuts) or 'nothing'}")
+        return cuts
 
+    def _needs_chunking(self, duration):
+        return duration is None or duration > self.chunk_s * 1.25
+
+    def _iter_windows(self, audio_file_path, duration):
+        """PCM windows of the file: one for short files, about chunk_s seconds each for long ones."""
+        if duration is None:
+            # Unknown length: fall back to fixed windows so memory stays bounded
+            return _iter_pcm_windows(audio_file_path, window_s=self.chunk_s)
+        if not self._needs_chunking(duration):
+            return _iter_pcm_windows(audio_file_path)
+        self._debug_log(f"File is long — transcribing in ~{self.chunk_s}s windows to avoid OOM")
+        if VAD_CHUNKING:
+            # Cuts are found in the streamed PCM: no separate silencedetect decode
+            return _iter_pcm_windows_at_silences(audio_file_path, duration, self.chunk_s)
+        # Windows past the last cut stay bounded even if the probed duration is short
+        return _iter_pcm_windows(audio_file_path, cuts=_choose_split_points([], duration, target=self.chunk_s),
+                                 window_s=self.chunk_s * 1.25)
+
+    def _iter_window_segments(self, offset, pcm):
+        """Transcribe one PCM window under the memory watchdog.
+
+        Under memory pressure the window is abandoned between segments, the
+        chunk length is halved and the rest of the window, from the end of the
+        last segment yielded, is transcribed in pieces, so nothing at the seam
+        is repeated or skipped.
+        """
+        emitted_until = offset
         try:
-            duration = self._get_audio_duration(audio_file_path)
-            if duration:
-                self._debug_log(f"Audio duration: {duration:.0f}s ({duration/60:.1f}m)")
+            with MemoryWatchdog() as watchdog:
+                for segment in self._iter_file_segments(_pcm_to_float(pcm), offset=offset):
+                    watchdog.check()
+                    emitted_until = segment[1]
+                    yield segment
+        except MemoryError as e:
+            if not self._shrink_chunks(str(e) or "MemoryError", window_s=len(pcm) / SAMPLE_RATE):
+                raise
+            done = max(0, int(round((emitted_until - offset) * SAMPLE_RATE)))
+            if done >= len(pcm):
+                return
+            for piece_offset, piece in _split_pcm(emitted_until, pcm[done:], self.chunk_s):
+                yield from self._iter_window_segments(piece_offset, piece)
+
+    def _iter_segments(self, audio_file_path, duration):
+        """Yield (start, end, text) for the whole file, decoded once and transcribed window by window."""
+        self.plan_chunks()
+        windows = self._iter_windows(audio_file_path, duration)
+        if self.workers > 1 and duration is not None and self._needs_chunking(duration):
+            yield from self._iter_windows_parallel(windows)
+            return
 
-            needs_chunking = duration is not None and duration > CHUNK_THRESHOLD_S
+        total_segments = 0
+        for idx, (offset, pcm) in enumerate(windows):
+            if offset:
+                self._debug_log(f"Transcribing window {idx+1} at {offset:.0f}s")
+            seg_count = 0
+            # Windows cut before an earlier shrink are split to the current chunk length
+            for piece_offset, piece in _split_pcm(offset, pcm, self.chunk_s):
+                for segment in self._iter_window_segments(piece_offset, piece):
+                    seg_count += 1
+                    yield segment
+            total_segments += seg_count
+            self._debug_log(f" > Window {idx+1} done: {seg_count} segments")
 
-            if needs_chunking:
-                transcript_text = self._transcribe_chunked(audio_file_path)
+        self._debug_log(f"All windows transcribed. Total segments: {total_segments}")
+
+    def _iter_windows_parallel(self, windows):
+        """Transcribe PCM windows across a process pool, yielding segments in window order.
+
+        At most one window per worker is queued beyond those running, so the
+        decoded audio held in memory stays bounded for any episode length. If
+        a worker dies (OOM kill), the pool restarts with fewer workers and
+        shorter windows and the unfinished windows are resubmitted.
+        """
+        workers = self.workers
+        # Windows (or pieces of them) taken from `windows` but not transcribed yet
+        pending = deque()
+        windows = iter(windows)
+
+        def next_piece():
+            """Next piece at the current chunk length, or None at the end of the audio."""
+            if pending:
+                offset, pcm = pending.popleft()
             else:
-                transcript_text = self._transcribe_whole(audio_file_path)
+                try:
+                    offset, pcm = next(windows)
+                except StopIteration:
+                    return None
+            first, *rest = _split_pcm(offset, pcm, self.chunk_s)
+            pending.extendleft(reversed(rest))
+            return first
 
-            if transcript_text is None:
-                return None
+        total_segments = 0
+        done = 0
+        while True:
+            cpu_threads = max(1, _available_cpus() // workers)
+            self._debug_log(f"Transcribing windows with {workers} processes x {cpu_threads} threads")
+            in_flight = deque()
+            piece = None
+            try:
+                # spawn: CTranslate2 state must not be inherited through fork
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_chunk_worker,
+                    initargs=(
+                        self.model_name, self.compute_type, cpu_threads, self.beam_size,
+                        _auto_batch_size(self.model_size, workers) if self.batched else None,
+                        self.language,
+                    ),
+                ) as pool:
+                    while True:
+                        piece = next_piece()
+                        if piece is None:
+                            break
+                        offset, pcm = piece
+                        in_flight.append((pool.submit(_transcribe_chunk_in_worker, pcm, offset), offset, pcm))
+                        piece = None
+                        # Reassemble in order; later windows keep running while earlier ones are consumed
+                        while len(in_flight) > workers:
+                            segments = in_flight[0][0].result()
+                            in_flight.popleft()
+                            done += 1
+                            total_segments += len(segments)
+                            self._debug_log(f" > Window {done} done: {len(segments)} segments")
+                            yield from segments
+                    while in_flight:
+                        segments = in_flight[0][0].result()
+                        in_flight.popleft()
+                        done += 1
+                        total_segments += len(segments)
+                        self._debug_log(f" > Window {done} done: {len(segments)} segments")
+                        yield from segments
+                break
+            except BrokenProcessPool:
+                shrunk = self._shrink_chunks("transcription worker was killed")
+                if not shrunk and workers == 1:
+                    raise
+                workers = max(1, workers // 2)
+                # Unfinished windows, then the one being submitted, go ahead of the rest
+                unfinished = [(offset, pcm) for _, offset, pcm in in_flight] + ([piece] if piece else [])
+                pending.extendleft(reversed(unfinished))
 
-            elapsed = time.time() - start_time
-            self._debug_log(f"Transcription completed in {elapsed:.2f}s")
+        self._debug_log(f"All windows transcribed. Total segments: {total_segments}")
 
-            # Save transcript to file
-            transcript_path = self.get_transcript_path(title)
-            transcript_path.parent.mkdir(exist_ok=True)
-            transcript_path.write_text(transcript_text, encoding='utf-8')
-            self._debug_log(f"Transcript saved to: {transcript_path}")
+    def split_for_distribution(self, audio_file_path, chunk_dir, duration=None):
+        """Split audio into chunks inside `chunk_dir` (on the shared data volume).
 
-            return transcript_text
+        Returns [(chunk_path, start_seconds)] for fan-out to other workers.
+        Call resolve_language first so every chunk can be pinned to it.
+        """
+        Path(chunk_dir).mkdir(parents=True, exist_ok=True)
+        if duration is None:
+            duration = self._get_audio_duration(audio_file_path)
+        return self._split_audio(audio_file_path, chunk_dir, duration)
 
-        except Exception as e:
-            self._debug_log(f"Error during transcription: {str(e)}")
-            return None
+    def transcribe_chunk_file(self, chunk_path, offset=0.0):
+        """Transcribe one chunk file. Returns [(start, end, text)] in episode time."""
+        return list(self._iter_file_segments(chunk_path, offset=offset))
 
-    def _transcribe_whole(self, audio_file_path):
-        """Transcribe a single file without chunking (original behaviour)."""
-        segments, info = self.model.transcribe(str(audio_file_path), beam_size=5)
-        self._debug_log(f"Detected language '{info.language}' with probability {info.language_probability}")
+    def transcribe_stream(self, audio_file_path, title="Podcast Episode", piece_chars=STREAM_PIECE_CHARS, duration=None):
+        """Transcribe audio, yielding the transcript in pieces as soon as they are ready.
 
-        full_transcript = []
-        for i, segment in enumerate(segments):
-            full_transcript.append(segment.text.strip())
-            if self.debug and (i % 20 == 0 or i == 0):
-                self._debug_log(f" > Transcribed segment {i+1}...")
+        Each piece is a run of whole segments of roughly `piece_chars` characters,
+        so downstream steps (LLM cleaning) can start while transcription continues.
+        Joining the pieces with a space gives the full transcript, which is also
+        saved to the transcript file once the last piece is produced. A known
+        `duration` (seconds) saves probing the file.
+        """
+        self._debug_log(f"Starting transcription for: {title}")
+        if self.batched:
+            self._debug_log(f"Batched inference: batch size {self.batch_size}")
+
+        start_time = time.time()
 
-        return " ".join(full_transcript)
+        if not duration:
+            duration = self._get_audio_duration(audio_file_path)
+        if duration:
+            self._debug_log(f"Audio duration: {duration:.0f}s ({duration/60:.1f}m)")
+
+        self.resolve_language(audio_file_path, duration)
+        self._debug_log(f"Using profile '{self.profile}': model {self.model_name}, beam size {self.beam_size}, "
+                        f"language {self.language or 'auto'}")
 
-    def _transcribe_chunked(self, audio_file_path):
-        """Split audio into chunks, transcribe each, and combine."""
-        self._debug_log("File is long — using chunked transcription to avoid OOM")
+        self.last_segment_index = None
+        segments = []
+        pieces = []
+        current = []
+        current_len = 0
+        last_report = time.time()
+        for segment in self._iter_segments(audio_file_path, duration):
+            segments.append(segment)
+            if time.time() - last_report >= PROGRESS_INTERVAL_S:
+                last_report = time.time()
+                self._report_progress(segment[1], duration, last_report - start_time)
+            text = segment[2]
+            current.append(text)
+            current_len += len(text) + 1
+            if current_len >= piece_chars:
+                pieces.append(" ".join(current))
+                current, current_len = [], 0
+                yield pieces[-1]
+        if current:
+            pieces.append(" ".join(current))
+            yield pieces[-1]
 
-        with tempfile.TemporaryDirectory(prefix="whisper_chunks_") as tmp_dir:
-            chunks = self._split_audio(audio_file_path, tmp_dir)
-            if not chunks:
-                self._debug_log("No chunks produced by ffmpeg split")
-                return None
+        if not pieces:
+            return
 
-            all_texts = []
-            total_segments = 0
+        elapsed = time.time() - start_time
+        self._report_progress(duration or segments[-1][1], duration, elapsed)
+        self._debug_log(f"Transcription completed in {elapsed:.2f}s")
+        self.last_segment_index = SegmentIndex.from_segments(segments)
 
-            for idx, chunk_path in enumerate(chunks):
-                self._debug_log(f"Transcribing chunk {idx+1}/{len(chunks)}: {chunk_path.name}")
-                text, seg_count = self._transcribe_single(chunk_path)
-                total_segments += seg_count
-                all_texts.append(text)
-                self._debug_log(f" > Chunk {idx+1} done: {seg_count} segments")
+        # Save transcript to file
+        transcript_path = self.get_transcript_path(title)
+        transcript_path.parent.mkdir(exist_ok=True)
+        transcript_path.write_text(" ".join(pieces), encoding='utf-8')
+        self._debug_log(f"Transcript saved to: {transcript_path}")
 
-            self._debug_log(f"All chunks transcribed. Total segments: {total_segments}")
-            return " ".join(all_texts)
\ No newline at end of file
+    def transcribe(self, audio_file_path, title="Podcast Episode", duration=None):
+        """Transcribe audio file using faster-whisper, chunking long files."""
+        try:
+            pieces = list(self.transcribe_stream(audio_file_path, title, duration=duration))
+        except Exception as e:
+            self._debug_log(f"Error during transcription: {str(e)}")
+            return None
+
+        if not pieces:
+            return None
+        return " ".join(pieces)
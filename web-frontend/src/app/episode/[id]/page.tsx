@@ -4,6 +4,7 @@ import React from 'react';
 import { useQuery } from '@tanstack/react-query';
 import { useParams, useRouter } from 'next/navigation';
 import { getEpisode } from '@/lib/api';
+import { formatProgress } from '@/lib/format';
 import { EpisodeMenu } from '@/components/EpisodeMenu';
 import { Accordion, AccordionContent, AccordionItem, AccordionTrigger } from '@/components/ui/accordion';
 import { Badge } from '@/components/ui/badge';
@@ -28,6 +29,8 @@ export default function EpisodeDetailPage() {
     queryKey: ['episode', episodeId],
     queryFn: () => getEpisode(episodeId),
     enabled: !!episodeId,
+    // Poll while the episode is being processed so progress stays live
+    refetchInterval: (query) => (query.state.data?.status === 'processing' ? 15000 : false),
   });
 
   if (isLoading) {
@@ -58,7 +61,7 @@ export default function EpisodeDetailPage() {
     const secs = seconds % 60;
     return `${mins}:${String(secs).padStart(2, '0')}`;
   };
-  
+
   const formatDate = (dateStr: string | any | undefined) => {
     if (!dateStr) return 'Unknown';
     try {
@@ -98,10 +101,25 @@ export default function EpisodeDetailPage() {
               hasTranscript={!!episode.transcript}
               status={episode.status}
               currentCategory={episode.prompt_category || ''}
+              audioEvicted={episode.audio_tier === 'evicted' || (episode.status === 'completed' && !episode.file_path)}
             />
           </div>
           <h1 className="text-2xl font-bold text-gray-900 leading-tight">{episode.title}</h1>
           <p className="text-sm text-gray-600 mt-2">📡 {episode.feed_title || episode.feed_source || 'Unknown'}</p>
+          {episode.audio_info?.codec && (
+            <p className="text-xs text-gray-500 mt-1">
+              🎧 {episode.audio_info.codec}
+              {episode.audio_info.sample_rate ? ` · ${(episode.audio_info.sample_rate / 1000).toFixed(1)} kHz` : ''}
+              {episode.audio_info.channels ? ` · ${episode.audio_info.channels === 1 ? 'mono' : 'stereo'}` : ''}
+              {episode.audio_info.bit_rate ? ` · ${Math.round(episode.audio_info.bit_rate / 1000)} kbps` : ''}
+            </p>
+          )}
+          {episode.audio_tier === 'archived' && (
+            <p className="text-xs text-gray-500 mt-1">📦 Audio archived at reduced quality</p>
+          )}
+          {episode.audio_tier === 'evicted' && (
+            <p className="text-xs text-gray-500 mt-1">🗑️ Audio removed to save space (restore it from the menu)</p>
+          )}
         </div>
       </div>
 
@@ -121,7 +139,9 @@ export default function EpisodeDetailPage() {
           </div>
         ) : episode.status === 'processing' ? (
           <div className="mb-8 p-6 bg-orange-50 border border-orange-200 rounded-lg">
-            <p className="text-orange-700 text-base">⏳ Processing... This usually takes a few minutes.</p>
+            <p className="text-orange-700 text-base">
+              ⏳ {formatProgress(episode.progress) || 'Processing... This usually takes a few minutes.'}
+            </p>
           </div>
         ) : episode.status === 'failed' ? (
           <div className="mb-8 p-6 bg-red-50 border border-red-200 rounded-lg">
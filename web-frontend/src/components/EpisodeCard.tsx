@@ -13,6 +13,7 @@ import {
 import { Button } from '@/components/ui/button';
 import { MoreVertical, RotateCcw, RefreshCw, Eraser, Trash2, AlertCircle, Loader2, XCircle } from 'lucide-react';
 import { Episode, EPISODE_CATEGORIES } from '@/lib/api';
+import { formatProgress } from '@/lib/format';
 import { useMutation, useQueryClient } from '@tanstack/react-query';
 import { retryEpisode, recleanEpisode, deleteEpisode } from '@/lib/api';
 import { toast } from 'sonner';
@@ -118,7 +119,7 @@ export function EpisodeCard({ episode }: EpisodeCardProps) {
                         <Loader2 className="w-4 h-4 text-orange-500 animate-spin" />
                       </span>
                     </TooltipTrigger>
-                    <TooltipContent>Processing... Estimated completion: 5 minutes</TooltipContent>
+                    <TooltipContent>{formatProgress(episode.progress) || 'Processing...'}</TooltipContent>
                   </Tooltip>
                 )}
                 {episode.status === 'failed' && (
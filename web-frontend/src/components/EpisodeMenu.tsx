@@ -8,9 +8,9 @@ import {
   DropdownMenuTrigger,
 } from '@/components/ui/dropdown-menu';
 import { Button } from '@/components/ui/button';
-import { MoreVertical, RotateCcw, RefreshCw, Eraser, Trash2 } from 'lucide-react';
+import { MoreVertical, RotateCcw, RefreshCw, Eraser, Trash2, Download } from 'lucide-react';
 import { useMutation, useQueryClient } from '@tanstack/react-query';
-import { retryEpisode, recleanEpisode, deleteEpisode } from '@/lib/api';
+import { retryEpisode, recleanEpisode, deleteEpisode, restoreEpisodeAudio } from '@/lib/api';
 import { toast } from 'sonner';
 import { useRouter } from 'next/navigation';
 import { ResummarizeModal } from '@/components/ResummarizeModal';
@@ -20,9 +20,10 @@ interface EpisodeMenuProps {
   hasTranscript?: boolean;
   status?: string;
   currentCategory?: string;
+  audioEvicted?: boolean;
 }
 
-export function EpisodeMenu({ episodeId, hasTranscript = true, status, currentCategory = '' }: EpisodeMenuProps) {
+export function EpisodeMenu({ episodeId, hasTranscript = true, status, currentCategory = '', audioEvicted = false }: EpisodeMenuProps) {
   const queryClient = useQueryClient();
   const router = useRouter();
   const [showResummarizeModal, setShowResummarizeModal] = useState(false);
@@ -51,6 +52,18 @@ export function EpisodeMenu({ episodeId, hasTranscript = true, status, currentCa
     },
   });
 
+  const { mutate: handleRestoreAudio, isPending: isRestoreAudioPending } = useMutation({
+    mutationFn: () => restoreEpisodeAudio(episodeId),
+    onSuccess: () => {
+      toast.success('Audio is being re-downloaded');
+      queryClient.invalidateQueries({ queryKey: ['episode', episodeId] });
+    },
+    onError: (error: any) => {
+      const errorMessage = error?.response?.data?.error || 'Failed to restore audio';
+      toast.error(errorMessage);
+    },
+  });
+
   const { mutate: handleDelete, isPending: isDeletePending } = useMutation({
     mutationFn: () => deleteEpisode(episodeId),
     onSuccess: () => {
@@ -108,6 +121,15 @@ export function EpisodeMenu({ episodeId, hasTranscript = true, status, currentCa
                 <RotateCcw className="w-4 h-4 mr-2" />
                 Re-summarize
               </DropdownMenuItem>
+              {audioEvicted && (
+                <DropdownMenuItem
+                  onClick={() => handleRestoreAudio()}
+                  disabled={isRestoreAudioPending}
+                >
+                  <Download className="w-4 h-4 mr-2" />
+                  {isRestoreAudioPending ? 'Restoring audio...' : 'Restore audio'}
+                </DropdownMenuItem>
+              )}
               <DropdownMenuItem
                 onClick={() => handleDelete()}
                 disabled={isDeletePending}
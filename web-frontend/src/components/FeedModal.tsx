@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { useMutation, useQueryClient } from '@tanstack/react-query';
-import { addFeed, updateFeed, Feed, FeedCategory, FEED_CATEGORIES } from '@/lib/api';
+import { addFeed, updateFeed, Feed, FeedCategory, FEED_CATEGORIES, TranscriptionProfile, TRANSCRIPTION_PROFILES } from '@/lib/api';
 import { toast } from 'sonner';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
@@ -28,6 +28,8 @@ export function FeedModal({ isOpen, onClose, feed }: FeedModalProps) {
     feed_title: '',
     custom_prompt: '',
     category: '_none',
+    transcription_profile: '_default',
+    language: '',
   });
 
   useEffect(() => {
@@ -40,9 +42,11 @@ export function FeedModal({ isOpen, onClose, feed }: FeedModalProps) {
           feed_title: feed.title,
           custom_prompt: feed.customPromptInstructions || '',
           category: feed.category || '_none',
+          transcription_profile: feed.transcription_profile || '_default',
+          language: feed.language || '',
         });
       } else {
-        setFormData({ feed_url: '', feed_title: '', custom_prompt: '', category: '_none' });
+        setFormData({ feed_url: '', feed_title: '', custom_prompt: '', category: '_none', transcription_profile: '_default', language: '' });
       }
     }
   }, [isOpen]);
@@ -54,9 +58,12 @@ export function FeedModal({ isOpen, onClose, feed }: FeedModalProps) {
       }
       // Convert _none sentinel back to empty string for API
       const category = (formData.category === '_none' ? '' : formData.category) as FeedCategory;
+      const transcription_profile = (formData.transcription_profile === '_default'
+        ? '' : formData.transcription_profile) as TranscriptionProfile;
       const payload = {
         ...formData,
         category,
+        transcription_profile,
       };
       if (feed) {
         return updateFeed(feed.id, payload);
@@ -112,6 +119,33 @@ export function FeedModal({ isOpen, onClose, feed }: FeedModalProps) {
           </SelectContent>
         </Select>
       </div>
+      <div>
+        <Label htmlFor="transcription-profile">Transcription Profile</Label>
+        <Select
+          value={formData.transcription_profile}
+          onValueChange={(value) => setFormData({ ...formData, transcription_profile: value })}
+        >
+          <SelectTrigger id="transcription-profile">
+            <SelectValue placeholder="Default (server setting)" />
+          </SelectTrigger>
+          <SelectContent>
+            {TRANSCRIPTION_PROFILES.map((profile) => (
+              <SelectItem key={profile.value} value={profile.value}>
+                {profile.label}
+              </SelectItem>
+            ))}
+          </SelectContent>
+        </Select>
+      </div>
+      <div>
+        <Label htmlFor="language">Language (Optional)</Label>
+        <Input
+          id="language"
+          placeholder="Auto-detect (e.g. en, es)"
+          value={formData.language}
+          onChange={(e) => setFormData({ ...formData, language: e.target.value })}
+        />
+      </div>
       <div>
         <Label htmlFor="prompt">Custom Prompt Instructions (Optional)</Label>
         <Textarea
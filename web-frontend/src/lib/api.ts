@@ -21,6 +21,27 @@ const apiClient: AxiosInstance = axios.create({
   },
 });
 
+export interface EpisodeProgress {
+  stage: string;
+  percent: number | null;
+  audio_position_s: number;
+  audio_duration_s: number | null;
+  elapsed_s: number;
+  real_time_factor: number | null;
+  eta_s: number | null;
+  updated_at?: string;
+}
+
+export interface AudioInfo {
+  duration: number | null;
+  codec: string | null;
+  sample_rate: number | null;
+  channels: number | null;
+  bit_rate: number | null;
+  format?: string | null;
+  size?: number | null;
+}
+
 export interface Episode {
   id: string;
   title: string;
@@ -39,6 +60,26 @@ export interface Episode {
   created_at?: string;
   updated_at?: string;
   prompt_category?: string;
+  progress?: EpisodeProgress;
+  audio_info?: AudioInfo;
+  audio_tier?: AudioTier;
+  last_played_at?: string | { $date: string };
+}
+
+// full: original quality; archived: transcoded to low-bitrate Opus; evicted: deleted, re-fetchable
+export type AudioTier = 'full' | 'archived' | 'evicted';
+
+export interface StorageStats {
+  usage: {
+    total_bytes: number;
+    quota_bytes: number | null;
+    episodes: Partial<Record<AudioTier, number>>;
+  };
+  full_quality_days: number;
+  archive_bitrate: string;
+  is_running: boolean;
+  last_run_time: string | null;
+  last_run?: { archived: number; evicted: number; bytes_freed: number };
 }
 
 export type FeedCategory = '' | 'news' | 'products_ai' | 'spanish_learning';
@@ -57,6 +98,16 @@ export const EPISODE_CATEGORIES: { value: string; label: string }[] = [
   { value: 'spanish_learning', label: 'Spanish Learning' },
 ];
 
+export type TranscriptionProfile = '' | 'auto' | 'fast' | 'balanced' | 'accurate';
+
+export const TRANSCRIPTION_PROFILES: { value: string; label: string }[] = [
+  { value: '_default', label: 'Default (server setting)' },
+  { value: 'auto', label: 'Auto (based on backlog)' },
+  { value: 'fast', label: 'Fast' },
+  { value: 'balanced', label: 'Balanced' },
+  { value: 'accurate', label: 'Accurate' },
+];
+
 export interface Feed {
   id: string;
   title: string;
@@ -66,6 +117,8 @@ export interface Feed {
   status?: 'active' | 'error';
   customPromptInstructions?: string;
   category?: FeedCategory;
+  transcription_profile?: TranscriptionProfile;
+  language?: string;
 }
 
 export interface FeederStatus {
@@ -93,6 +146,25 @@ export const getEpisode = async (id: string) => {
   return response.data;
 };
 
+export interface TranscriptSegment {
+  index: number;
+  start: number;
+  end: number;
+  offset: number;
+  text: string;
+}
+
+// Transcript <-> audio seeking (looked up server-side, no segment list on the client)
+export const getTranscriptAtTime = async (id: string, seconds: number): Promise<TranscriptSegment> => {
+  const response = await apiClient.get(`/api/episodes/${id}/transcript/at`, { params: { t: seconds } });
+  return response.data;
+};
+
+export const getTimeOfTranscriptOffset = async (id: string, offset: number) => {
+  const response = await apiClient.get(`/api/episodes/${id}/transcript/time`, { params: { offset } });
+  return response.data as { offset: number; time: number | null; segment: TranscriptSegment | null };
+};
+
 export const addEpisode = async (url: string) => {
   const response = await apiClient.post('/api/episodes', { url });
   return response.data;
@@ -124,6 +196,16 @@ export const recleanEpisode = async (episodeId: string) => {
   return response.data;
 };
 
+export const restoreEpisodeAudio = async (episodeId: string) => {
+  const response = await apiClient.post(`/api/episodes/${episodeId}/audio/restore`);
+  return response.data;
+};
+
+export const getStorageStats = async (): Promise<StorageStats> => {
+  const response = await apiClient.get('/api/storage');
+  return response.data;
+};
+
 export const deleteEpisode = async (episodeId: string) => {
   const response = await apiClient.delete(`/api/episodes/${episodeId}`);
   return response.data;
@@ -140,6 +222,8 @@ export const addFeed = async (data: {
   feed_title: string;
   custom_prompt?: string;
   category?: FeedCategory;
+  transcription_profile?: TranscriptionProfile;
+  language?: string;
 }) => {
   const response = await apiClient.post('/api/feeds', data);
   return response.data;
@@ -150,6 +234,8 @@ export const updateFeed = async (feedId: string, data: {
   feed_title: string;
   custom_prompt?: string;
   category?: FeedCategory;
+  transcription_profile?: TranscriptionProfile;
+  language?: string;
 }) => {
   const response = await apiClient.put(`/api/feeds/${feedId}`, data);
   return response.data;
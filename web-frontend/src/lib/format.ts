@@ -0,0 +1,9 @@
+import { EpisodeProgress } from '@/lib/api';
+
+// Live transcription progress as shown on episode cards and pages (null before the first report)
+export const formatProgress = (progress?: EpisodeProgress) => {
+  if (!progress || progress.percent == null) return null;
+  if (progress.eta_s == null) return `${Math.round(progress.percent)}% transcribed`;
+  const etaMinutes = Math.max(1, Math.round(progress.eta_s / 60));
+  return `${Math.round(progress.percent)}% transcribed, about ${etaMinutes} min left`;
+};
@@ -12,7 +12,9 @@ import json
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from database import PodcastDB
-from tasks import analyze_episode
+from tasks import enqueue_analysis
+from celery_app import QUEUE_HIGH, QUEUE_LOW
+from transcriber import TRANSCRIPTION_PROFILES
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
@@ -111,6 +113,13 @@ def health():
 @app.route('/data/<path:filename>')
 def serve_audio(filename):
     """Serve audio files from the data directory."""
+    # The first request of a playback (later ones are ranges into the file)
+    # marks the episode as played, which keeps its audio from being evicted
+    if filename.startswith('audio/') and request.headers.get('Range', 'bytes=0-').startswith('bytes=0-'):
+        try:
+            PodcastDB().mark_audio_played(filename)
+        except Exception as e:
+            print(f"Warning: Could not record playback of {filename}: {e}")
     return send_from_directory('../data', filename)
 
 # Episode Management JSON API Endpoints
@@ -173,7 +182,7 @@ def api_retry_episode(episode_id):
         if result.modified_count > 0:
             episode = db.get_episode_by_id(episode_id)
             if episode:
-                analyze_episode.delay(episode['url'])
+                enqueue_analysis(episode['url'], queue=QUEUE_HIGH)
             return app.response_class(
                 response=dumps({'success': True, 'message': 'Episode queued for retry'}),
                 status=200,
@@ -294,6 +303,7 @@ def api_episodes():
         ep['id'] = str(ep['_id'])
         ep.pop('_id', None)
         ep.pop('feed_info', None)  # Remove aggregation field
+        ep.pop('segment_index', None)  # Served by the transcript lookup endpoints
         # Convert any remaining ObjectId fields
         if 'feed_id' in ep and isinstance(ep['feed_id'], ObjectId):
             ep['feed_id'] = str(ep['feed_id'])
@@ -302,6 +312,8 @@ def api_episodes():
             ep['created_at'] = ep['created_at'].isoformat()
         if 'updated_at' in ep and ep['updated_at']:
             ep['updated_at'] = ep['updated_at'].isoformat()
+        if ep.get('progress', {}).get('updated_at'):
+            ep['progress']['updated_at'] = ep['progress']['updated_at'].isoformat()
 
     # Use bson.json_util to serialize the response
     return app.response_class(
@@ -321,6 +333,7 @@ def api_episode_detail(episode_id):
         
         episode['id'] = str(episode['_id'])
         episode.pop('_id', None)
+        episode['has_segment_index'] = bool(episode.pop('segment_index', None))
 
         # Convert any remaining ObjectId fields
         if 'feed_id' in episode and isinstance(episode['feed_id'], ObjectId):
@@ -330,6 +343,8 @@ def api_episode_detail(episode_id):
             episode['created_at'] = episode['created_at'].isoformat()
         if 'updated_at' in episode and episode['updated_at']:
             episode['updated_at'] = episode['updated_at'].isoformat()
+        if episode.get('progress', {}).get('updated_at'):
+            episode['progress']['updated_at'] = episode['progress']['updated_at'].isoformat()
 
         # Use bson.json_util to serialize the response
         return app.response_class(
@@ -367,7 +382,7 @@ def api_add_episode():
             )
         
         db.create_placeholder(url, title="Manual Submission")
-        analyze_episode.delay(url)
+        enqueue_analysis(url, queue=QUEUE_HIGH)
         return app.response_class(
             response=dumps({'success': True, 'message': 'Episode queued for analysis'}),
             status=201,
@@ -473,6 +488,8 @@ def api_delete_episode(episode_id):
             files_to_delete.append(f"data/{episode['file_path']}")
         if episode.get('audio_path') and episode.get('audio_path') != episode.get('file_path'):
             files_to_delete.append(f"data/{episode['audio_path']}")
+        if episode.get('transcription_file_path'):
+            files_to_delete.append(f"data/{episode['transcription_file_path']}")
 
         for file_path in files_to_delete:
             if os.path.exists(file_path):
@@ -484,6 +501,7 @@ def api_delete_episode(episode_id):
 
         # Delete episode from database
         result = db.delete_episode(episode_id)
+        db.delete_fingerprint(episode['url'])
 
         if result.deleted_count > 0:
             return app.response_class(
@@ -504,6 +522,240 @@ def api_delete_episode(episode_id):
             mimetype='application/json'
         )
 
+# Batch Re-summarization API Endpoints
+@app.route('/api/batch-resummarize', methods=['POST'])
+def api_batch_resummarize():
+    """API endpoint to re-summarize every episode of a feed, category or date range."""
+    from datetime import datetime
+    data = request.get_json(silent=True) or {}
+
+    selection = {}
+    if data.get('feed_id'):
+        selection['feed_id'] = data['feed_id']
+    if data.get('category') is not None:
+        selection['category'] = data['category']
+    try:
+        for key in ('since', 'until'):
+            if data.get(key):
+                selection[key] = datetime.fromisoformat(data[key])
+    except ValueError:
+        return jsonify({'error': 'since/until must be ISO-8601 dates'}), 400
+
+    if not selection:
+        return jsonify({'error': 'Select episodes by feed_id, category, since or until'}), 400
+
+    try:
+        db = PodcastDB()
+        # Optional prompt category override (same as the per-episode "summarize again")
+        job = db.create_batch_job(selection, category=data.get('prompt_category'))
+        job_id = str(job['_id'])
+
+        from tasks import advance_batch_job
+        advance_batch_job.apply_async(args=[job_id], queue=QUEUE_LOW)
+        return jsonify({'success': True, 'job_id': job_id, 'message': 'Batch re-summarization queued'}), 202
+    except Exception as e:
+        return app.response_class(
+            response=dumps({'error': str(e)}),
+            status=500,
+            mimetype='application/json'
+        )
+
+@app.route('/api/batch-resummarize/<job_id>', methods=['GET'])
+def api_batch_resummarize_status(job_id):
+    """API endpoint to get the progress of a batch re-summarization job."""
+    db = PodcastDB()
+    try:
+        job = db.get_batch_job(job_id)
+        if not job:
+            return jsonify({'error': 'Batch job not found'}), 404
+
+        job['id'] = str(job.pop('_id'))
+        job['pending_batches'] = [
+            {'batch_id': b['batch_id'], 'episode_count': len(b['episode_ids'])}
+            for b in job.get('pending_batches', [])
+        ]
+        return app.response_class(
+            response=dumps(job),
+            status=200,
+            mimetype='application/json'
+        )
+    except Exception as e:
+        return app.response_class(
+            response=dumps({'error': str(e)}),
+            status=400,
+            mimetype='application/json'
+        )
+
+@app.route('/api/batch-resummarize/<job_id>/resume', methods=['POST'])
+def api_batch_resummarize_resume(job_id):
+    """API endpoint to resume a failed batch re-summarization job from its cursor."""
+    db = PodcastDB()
+    try:
+        job = db.get_batch_job(job_id)
+        if not job:
+            return jsonify({'error': 'Batch job not found'}), 404
+        # A running job already has an advance_batch_job chain; a second one would race it
+        if job['status'] != 'failed':
+            return jsonify({'error': f"Only failed batch jobs can be resumed (job is {job['status']})"}), 409
+
+        from tasks import advance_batch_job
+        advance_batch_job.apply_async(args=[job_id], queue=QUEUE_LOW)
+        return jsonify({'success': True, 'job_id': job_id, 'message': 'Batch re-summarization resumed'}), 202
+    except Exception as e:
+        return app.response_class(
+            response=dumps({'error': str(e)}),
+            status=500,
+            mimetype='application/json'
+        )
+
+@app.route('/api/episodes/<episode_id>/progress', methods=['GET'])
+def api_episode_progress(episode_id):
+    """API endpoint to poll the status and live progress (percent, RTF, ETA) of an episode."""
+    db = PodcastDB()
+    try:
+        episode = db.get_episode_by_id(episode_id)
+        if not episode:
+            return jsonify({'error': 'Episode not found'}), 404
+        progress = episode.get('progress')
+        if progress and progress.get('updated_at'):
+            progress['updated_at'] = progress['updated_at'].isoformat()
+        return jsonify({
+            'id': episode_id,
+            'status': episode.get('status'),
+            'pipeline_stage': episode.get('pipeline_stage'),
+            'progress': progress,
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+# Transcript Timestamp API Endpoints
+def _load_segment_index(episode_id):
+    """(SegmentIndex, None) for an episode, or (None, error response)."""
+    from segment_index import SegmentIndex
+    episode = PodcastDB().get_episode_by_id(episode_id)
+    if not episode:
+        return None, (jsonify({'error': 'Episode not found'}), 404)
+    index = SegmentIndex.from_document(episode.get('segment_index'), episode.get('raw_transcript', ''))
+    if index is None:
+        return None, (jsonify({'error': 'Episode has no segment timestamps'}), 404)
+    return index, None
+
+@app.route('/api/episodes/<episode_id>/transcript/at', methods=['GET'])
+def api_transcript_at_time(episode_id):
+    """API endpoint to get the raw transcript segment spoken at ?t=<seconds>."""
+    try:
+        seconds = float(request.args['t'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Query parameter t (seconds) is required'}), 400
+    try:
+        index, error = _load_segment_index(episode_id)
+        if error:
+            return error
+        return jsonify(index.segment_at_time(seconds))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/episodes/<episode_id>/transcript/time', methods=['GET'])
+def api_transcript_time_of_offset(episode_id):
+    """API endpoint to get the time at which character ?offset=<n> of the raw transcript is spoken."""
+    try:
+        offset = int(request.args['offset'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Query parameter offset (characters) is required'}), 400
+    try:
+        index, error = _load_segment_index(episode_id)
+        if error:
+            return error
+        segment = index.segment_at_offset(offset)
+        return jsonify({'offset': offset, 'time': segment['start'] if segment else None, 'segment': segment})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+# Pipeline Metrics API Endpoints
+@app.route('/api/episodes/<episode_id>/metrics', methods=['GET'])
+def api_episode_metrics(episode_id):
+    """API endpoint to get per-stage timing and resource metrics of an episode."""
+    db = PodcastDB()
+    try:
+        episode = db.get_episode_by_id(episode_id)
+        if not episode:
+            return jsonify({'error': 'Episode not found'}), 404
+        return jsonify({'id': episode_id, 'metrics': episode.get('metrics', {})})
+    except Exception as e:
+        return app.response_class(
+            response=dumps({'error': str(e)}),
+            status=400,
+            mimetype='application/json'
+        )
+
+@app.route('/api/metrics', methods=['GET'])
+def api_metrics_summary():
+    """API endpoint to get metric percentiles per feed or per model."""
+    from metrics import aggregate_metrics
+    group_by = request.args.get('group_by', 'feed')
+    if group_by not in ('feed', 'model'):
+        return jsonify({'error': "group_by must be 'feed' or 'model'"}), 400
+
+    db = PodcastDB()
+    try:
+        episodes = db.list_episode_metrics(feed_id=request.args.get('feed_id'))
+        return jsonify({
+            'group_by': group_by,
+            'episode_count': len(episodes),
+            'groups': aggregate_metrics(episodes, group_by=group_by),
+        })
+    except Exception as e:
+        return app.response_class(
+            response=dumps({'error': str(e)}),
+            status=500,
+            mimetype='application/json'
+        )
+
+@app.route('/api/storage', methods=['GET'])
+def api_storage():
+    """API endpoint to get audio disk usage, the quota and the last archive/eviction run."""
+    from storage_manager import StorageManager, AUDIO_FULL_QUALITY_DAYS, AUDIO_ARCHIVE_BITRATE
+    db = PodcastDB()
+    try:
+        status = db.get_storage_status() or {}
+        last_run_time = status.get('last_run_time')
+        return jsonify({
+            'usage': StorageManager(db).usage(),
+            'full_quality_days': AUDIO_FULL_QUALITY_DAYS,
+            'archive_bitrate': AUDIO_ARCHIVE_BITRATE,
+            'is_running': status.get('is_running', False),
+            'last_run_time': last_run_time.isoformat() if last_run_time else None,
+            'last_run': status.get('last_run'),
+        })
+    except Exception as e:
+        return app.response_class(
+            response=dumps({'error': str(e)}),
+            status=500,
+            mimetype='application/json'
+        )
+
+@app.route('/api/episodes/<episode_id>/audio/restore', methods=['POST'])
+def api_restore_audio(episode_id):
+    """API endpoint to re-fetch an episode's evicted audio from its original URL."""
+    from tasks import restore_audio
+    db = PodcastDB()
+    episode = db.get_episode_by_id(episode_id)
+    if not episode:
+        return jsonify({'error': 'Episode not found'}), 404
+    if episode.get('file_path') and os.path.exists(f"data/{episode['file_path']}"):
+        return jsonify({'success': True, 'file_path': episode['file_path']})
+    restore_audio.delay(episode['url'])
+    return jsonify({'success': True, 'message': 'Audio restore queued'}), 202
+
+@app.route('/api/downloads', methods=['GET'])
+def api_downloads():
+    """API endpoint to get the downloads in flight and the download limits."""
+    from download_manager import get_download_manager
+    stats = get_download_manager().stats()
+    if stats is None:
+        return jsonify({'error': 'Download manager unavailable'}), 503
+    return jsonify(stats)
+
 # RSS Feeds API Endpoints
 @app.route('/api/feeds', methods=['GET'])
 def api_feeds():
@@ -526,6 +778,14 @@ def api_feeds():
         mimetype='application/json'
     )
 
+def _valid_transcription_profile(profile):
+    """Feeds take a named transcription profile, 'auto' (chosen from the backlog) or '' for the default."""
+    return profile in ('', 'auto') or profile in TRANSCRIPTION_PROFILES
+
+def _valid_language(language):
+    """Feed language: a Whisper language code such as 'en' or 'es', or '' to detect per episode."""
+    return language == '' or (language.isalpha() and 2 <= len(language) <= 3)
+
 @app.route('/api/feeds', methods=['POST'])
 def api_add_feed():
     """API endpoint to add a new RSS feed."""
@@ -534,6 +794,8 @@ def api_add_feed():
     feed_title = data.get('feed_title', '')
     custom_prompt = data.get('custom_prompt', '')
     category = data.get('category', '')
+    transcription_profile = data.get('transcription_profile') or ''
+    language = (data.get('language') or '').strip().lower()
 
     if not feed_url:
         return app.response_class(
@@ -541,6 +803,18 @@ def api_add_feed():
             status=400,
             mimetype='application/json'
         )
+    if not _valid_transcription_profile(transcription_profile):
+        return app.response_class(
+            response=dumps({'error': f'Unknown transcription profile: {transcription_profile}'}),
+            status=400,
+            mimetype='application/json'
+        )
+    if not _valid_language(language):
+        return app.response_class(
+            response=dumps({'error': f'Invalid language code: {language}'}),
+            status=400,
+            mimetype='application/json'
+        )
     
     try:
         db = PodcastDB()
@@ -551,7 +825,7 @@ def api_add_feed():
                 mimetype='application/json'
             )
         
-        feed = db.add_feed(feed_url, feed_title, custom_prompt, category)
+        feed = db.add_feed(feed_url, feed_title, custom_prompt, category, transcription_profile, language)
         feed['id'] = str(feed['_id'])
         feed.pop('_id', None)
         feed['episode_count'] = 0
@@ -581,6 +855,23 @@ def api_update_feed(feed_id):
             'customPromptInstructions': data.get('custom_prompt', ''),
             'category': data.get('category', '')
         }
+        if 'transcription_profile' in data:
+            if not _valid_transcription_profile(data['transcription_profile']):
+                return app.response_class(
+                    response=dumps({'error': f"Unknown transcription profile: {data['transcription_profile']}"}),
+                    status=400,
+                    mimetype='application/json'
+                )
+            update_data['transcription_profile'] = data['transcription_profile']
+        if 'language' in data:
+            language = (data['language'] or '').strip().lower()
+            if not _valid_language(language):
+                return app.response_class(
+                    response=dumps({'error': f'Invalid language code: {language}'}),
+                    status=400,
+                    mimetype='application/json'
+                )
+            update_data['language'] = language
         print(f"DEBUG: Update data: {update_data}")
         result = db.update_feed(feed_id, update_data)
         